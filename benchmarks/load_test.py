@@ -0,0 +1,200 @@
+"""Headless load test: many simulated users driving the workout app at once.
+
+Each session is an AppTest of streamlit_workout_app/app.py clicking through
+workouts the way a user does: generate, start, pause, resume, skip ahead,
+stop and generate again. AppTest isn't thread-safe, so the sessions of one
+process take turns rerunning, which is also how a single Streamlit server
+process shares its CPU; --processes spreads sessions over several.
+
+    python benchmarks/load_test.py --sessions 50 --processes 4 --steps 40
+"""
+import argparse
+import json
+import math
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import time
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+APP_DIR = os.path.join(PROJECT_ROOT, 'streamlit_workout_app')
+APP_FILE = os.path.join(APP_DIR, 'app.py')
+sys.path.insert(0, APP_DIR)
+
+import data_loader  # noqa: E402
+from run_benchmarks import write_catalog  # noqa: E402
+
+
+def rss_bytes() -> int:
+    """Current resident set size of this process (Linux)."""
+    with open('/proc/self/statm', 'r') as f:
+        return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of already sorted values."""
+    if not sorted_values:
+        return 0.0
+    return sorted_values[max(0, math.ceil(fraction * len(sorted_values)) - 1)]
+
+
+class SimulatedSession:
+    """One user's browser session, choosing its next click from the buttons on screen."""
+
+    def __init__(self, seed: int, timeout: float = 60):
+        from streamlit.testing.v1 import AppTest
+
+        self.rng = random.Random(seed)
+        self.app = AppTest.from_file(APP_FILE, default_timeout=timeout)
+        self.errors = 0
+
+    def _button(self, text: str) -> Optional[Any]:
+        for button in self.app.button:
+            if text in button.label and not button.disabled:
+                return button
+        return None
+
+    def _choose(self) -> Tuple[str, Optional[Any]]:
+        """Pick the next action the way a user would, given what is on screen."""
+        for text in ("Start New Workout", "Start Workout"):
+            button = self._button(text)
+            if button is not None:
+                return text, button
+
+        pause, resume, next_button = self._button("Pause"), self._button("Start/Resume"), self._button("Next")
+        if pause is None and resume is None:
+            return "Generate Workout", self._button("Generate Workout")
+        if next_button is None:
+            # Last exercise: finish up and start over
+            return "Stop", self._button("Stop")
+
+        roll = self.rng.random()
+        if resume is not None:
+            return ("Start/Resume", resume) if roll < 0.7 else ("Next", next_button)
+        if roll < 0.4:
+            return "Pause", pause
+        if roll < 0.8:
+            return "Next", next_button
+        # A rerun with no click, as when the browser reports the countdown or reconnects
+        return "Rerun", None
+
+    def step(self) -> Tuple[str, float]:
+        """Perform one action; returns (action, seconds the rerun took)."""
+        if not self.app.button:
+            action, button = "Open", None
+        else:
+            action, button = self._choose()
+        if button is not None:
+            button.click()
+
+        start = time.perf_counter()
+        self.app.run()
+        latency = time.perf_counter() - start
+        if self.app.exception or self.app.error:
+            self.errors += 1
+        return action, latency
+
+
+def run_worker(work: Tuple[int, int, int, Optional[str]]) -> Dict[str, Any]:
+    """Drive a share of the sessions in one process and collect its measurements."""
+    sessions_count, steps, seed, catalog = work
+    if catalog:
+        data_loader.EXERCISES_FILE = catalog
+    data_loader.load_all_exercises()
+
+    baseline = rss_bytes()
+    sessions = [SimulatedSession(seed + i) for i in range(sessions_count)]
+    latencies: List[float] = []
+    actions: Counter = Counter()
+
+    # Every session opens the page before timing starts, so RSS counts live sessions
+    for session in sessions:
+        session.step()
+    per_session = (rss_bytes() - baseline) / max(1, sessions_count)
+
+    start = time.perf_counter()
+    for _ in range(steps):
+        for session in sessions:
+            action, latency = session.step()
+            actions[action] += 1
+            latencies.append(latency)
+    elapsed = time.perf_counter() - start
+
+    return {'latencies': latencies, 'actions': dict(actions), 'elapsed': elapsed,
+            'rss_per_session': per_session, 'rss': rss_bytes(), 'errors': sum(s.errors for s in sessions)}
+
+
+def load_test(sessions: int, processes: int = 1, steps: int = 20, seed: int = 0,
+              catalog: Optional[str] = None) -> Dict[str, Any]:
+    """Run sessions simulated users for steps actions each and summarise the reruns."""
+    processes = max(1, min(processes, sessions))
+    shares = [sessions // processes + (i < sessions % processes) for i in range(processes)]
+    work = [(share, steps, seed + i * 100003, catalog) for i, share in enumerate(shares)]
+
+    start = time.perf_counter()
+    if processes == 1:
+        results = [run_worker(work[0])]
+    else:
+        with multiprocessing.Pool(processes) as pool:
+            results = pool.map(run_worker, work)
+    wall = time.perf_counter() - start
+
+    latencies = sorted(latency for result in results for latency in result['latencies'])
+    actions: Counter = Counter()
+    for result in results:
+        actions.update(result['actions'])
+    # Workers start together, so the slowest one bounds the measured period
+    busy = max(result['elapsed'] for result in results)
+    return {
+        'sessions': sessions,
+        'processes': processes,
+        'steps_per_session': steps,
+        'reruns': len(latencies),
+        'reruns_per_sec': round(len(latencies) / busy, 1) if busy else 0.0,
+        'latency_ms': {
+            'p50': round(percentile(latencies, 0.50) * 1e3, 1),
+            'p90': round(percentile(latencies, 0.90) * 1e3, 1),
+            'p99': round(percentile(latencies, 0.99) * 1e3, 1),
+            'max': round(latencies[-1] * 1e3, 1) if latencies else 0.0,
+        },
+        'rss_per_session_mb': round(sum(r['rss_per_session'] for r in results) / len(results) / 2 ** 20, 2),
+        'rss_per_process_mb': round(max(r['rss'] for r in results) / 2 ** 20, 1),
+        'errors': sum(result['errors'] for result in results),
+        'actions': dict(actions.most_common()),
+        'wall_seconds': round(wall, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulate concurrent workout app sessions headlessly.")
+    parser.add_argument("--sessions", type=int, default=20, help="Simulated users.")
+    parser.add_argument("--processes", type=int, default=1, help="Processes to spread the sessions over.")
+    parser.add_argument("--steps", type=int, default=20, help="Actions (reruns) per session.")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for the users' choices.")
+    parser.add_argument("--catalog-size", type=int, default=None,
+                        help="Use a synthetic catalog of this many exercises instead of exercises.json.")
+    parser.add_argument("--output", default=None, help="Also write the report to this JSON file.")
+    args = parser.parse_args()
+
+    if args.sessions < 1 or args.steps < 1:
+        parser.error("--sessions and --steps must be at least 1")
+
+    with tempfile.TemporaryDirectory(prefix="workout-load-") as workdir:
+        catalog = None
+        if args.catalog_size:
+            catalog = os.path.join(workdir, "catalog.json")
+            write_catalog(catalog, args.catalog_size)
+        report = load_test(args.sessions, args.processes, args.steps, args.seed, catalog)
+
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,238 @@
+"""Benchmarks for the workout app's hot paths.
+
+Not a test suite: this measures, against synthetic catalogs of several
+sizes, how long the data_loader functions the app calls on every rerun
+take, plus one full simulated render of app.py. Results are saved as JSON
+so two runs (say, before and after a change) can be compared:
+
+    python benchmarks/run_benchmarks.py run --sizes 10 1000 --output before.json
+    python benchmarks/run_benchmarks.py compare before.json after.json
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+APP_DIR = os.path.join(PROJECT_ROOT, 'streamlit_workout_app')
+sys.path.insert(0, APP_DIR)
+
+import data_loader  # noqa: E402
+import workout_export  # noqa: E402
+
+SIZES = (10, 1000, 100000, 1000000)
+EQUIPMENT = ('bodyweight', 'dumbbells')
+FOCUS_AREAS = ('full_body', 'upper', 'lower', 'core')
+MUSCLES = ('Quadriceps', 'Glutes', 'Hamstrings', 'Core', 'Shoulders', 'Chest', 'Triceps', 'Biceps', 'Back',
+           'Calves', 'Hip flexors', 'Obliques')
+MOVES = ('Squat', 'Lunge', 'Plank', 'Press', 'Row', 'Curl', 'Bridge', 'Raise', 'Crunch', 'Step-Up')
+
+# Keep timing each benchmark until this much time has been spent, in rounds of at least MIN_ROUND_TIME
+MIN_ROUND_TIME = 0.1
+ROUNDS = 5
+# A single call slower than this is timed once rather than in rounds
+SLOW_CALL = 2.0
+
+
+def synthetic_exercise(i: int, rng: random.Random) -> Dict[str, Any]:
+    """Make one catalog entry shaped like those in exercises.json."""
+    move = MOVES[i % len(MOVES)]
+    return {
+        'name': f"{move} Variation {i}",
+        'description': f"Synthetic {move.lower()} for benchmarking",
+        'instructions': [f"Step {step} of the {move.lower()}" for step in range(1, 4)],
+        'tips': ["Keep your core engaged", "Breathe steadily"],
+        'muscles_worked': rng.sample(MUSCLES, 3),
+        'equipment': EQUIPMENT[i % len(EQUIPMENT)],
+        'focus_area': FOCUS_AREAS[i % len(FOCUS_AREAS)],
+        # Both duration forms the catalog allows
+        'duration': rng.choice((20, 30, 45, 60)) if i % 3 else f"{rng.choice((30, 45))} seconds",
+    }
+
+
+def write_catalog(path: str, size: int, seed: int = 0) -> None:
+    """Write a synthetic catalog of size exercises, one entry at a time."""
+    rng = random.Random(seed)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('[\n')
+        for i in range(size):
+            if i:
+                f.write(',\n')
+            f.write(json.dumps(synthetic_exercise(i, rng)))
+        f.write('\n]\n')
+
+
+def measure(func: Callable[[], Any]) -> Dict[str, Any]:
+    """Time func: seconds per call over ROUNDS rounds, each of enough calls to last MIN_ROUND_TIME."""
+    gc.collect()
+    start = time.perf_counter()
+    func()
+    first = time.perf_counter() - start
+    if first >= SLOW_CALL:
+        return {'median': first, 'min': first, 'mean': first, 'loops': 1, 'rounds': 1}
+
+    loops = max(1, int(MIN_ROUND_TIME / max(first, 1e-7)))
+    timings = []
+    for _ in range(ROUNDS):
+        start = time.perf_counter()
+        for _ in range(loops):
+            func()
+        timings.append((time.perf_counter() - start) / loops)
+    return {'median': statistics.median(timings), 'min': min(timings), 'mean': statistics.fmean(timings),
+            'loops': loops, 'rounds': ROUNDS}
+
+
+def _cold_load() -> None:
+    data_loader.clear_catalog_cache()
+    data_loader.load_all_exercises()
+
+
+def _app_render(size: int) -> Optional[Callable[[], Any]]:
+    """Get a function rerunning app.py headlessly with a workout shown, or None without Streamlit."""
+    try:
+        from streamlit.testing.v1 import AppTest
+    except ImportError:
+        print("Streamlit is not installed; skipping the app render benchmark", file=sys.stderr)
+        return None
+
+    app = AppTest.from_file(os.path.join(APP_DIR, 'app.py'), default_timeout=max(60, size // 1000))
+    app.run()
+    next(button for button in app.button if "Generate Workout" in button.label).click().run()
+    if app.exception or app.error:
+        raise RuntimeError(f"app.py failed to render: {app.exception or app.error[0].value}")
+    return app.run
+
+
+def bench_catalog(size: int, workdir: str, render: bool = True) -> Dict[str, Dict[str, Any]]:
+    """Run every benchmark against a synthetic catalog of size exercises."""
+    path = os.path.join(workdir, f"catalog_{size}.json")
+    write_catalog(path, size)
+    data_loader.EXERCISES_FILE = path
+    data_loader.clear_catalog_cache()
+
+    results = {}
+
+    def bench(name: str, func: Callable[[], Any]) -> None:
+        results[name] = measure(func)
+        print(f"  {name:<36} {results[name]['median'] * 1e6:14.1f} us", file=sys.stderr)
+
+    print(f"Catalog of {size} exercises:", file=sys.stderr)
+    bench("load_all_exercises[cold]", _cold_load)
+    bench("load_all_exercises[cached]", data_loader.load_all_exercises)
+    bench("get_exercises[all]", data_loader.get_exercises)
+    bench("get_exercises[bodyweight,lower]", lambda: data_loader.get_exercises("bodyweight", "lower"))
+    bench("get_random_workout[dumbbells,upper]", lambda: data_loader.get_random_workout("dumbbells", "upper"))
+
+    workout = data_loader.get_random_workout(seed=size)
+    exercise = workout[0]
+    bench("calculate_workout_duration", lambda: data_loader.calculate_workout_duration(workout))
+    bench("get_workout_stats", lambda: data_loader.get_workout_stats(workout))
+    bench("ensure_image", lambda: data_loader.ensure_image(exercise))
+    # create_download_link was replaced by export_workout, which the download buttons call on click
+    bench("export_workout[txt]", lambda: workout_export.export_workout(workout, 'txt'))
+    # Only formats without a generated-on time are memoized
+    bench("export_workout[csv,cached]", lambda: workout_export.export_workout(workout, 'csv'))
+
+    if render:
+        rerun = _app_render(size)
+        if rerun is not None:
+            bench("app_main_rerun", rerun)
+    return results
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=PROJECT_ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(sizes: List[int], output: str, render: bool = True) -> Dict[str, Any]:
+    """Benchmark every size and save the results to output."""
+    report = {
+        'meta': {
+            'timestamp': datetime.now().astimezone().isoformat(timespec='seconds'),
+            'commit': _git_commit(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+        },
+        'results': {},
+    }
+    with tempfile.TemporaryDirectory(prefix="workout-bench-") as workdir:
+        for size in sizes:
+            for name, timing in bench_catalog(size, workdir, render).items():
+                report['results'][f"{name}[n={size}]"] = timing
+
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"Saved results to {output}", file=sys.stderr)
+    return report
+
+
+def compare(baseline_path: str, current_path: str, threshold: float = 0.1) -> int:
+    """Print the change in time per benchmark; returns how many regressed by more than threshold.
+
+    Runs are compared by their fastest round, which machine noise affects least.
+    """
+    with open(baseline_path, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)['results']
+    with open(current_path, 'r', encoding='utf-8') as f:
+        current = json.load(f)['results']
+
+    regressions = 0
+    for name in sorted(set(baseline) & set(current)):
+        before, after = baseline[name]['min'], current[name]['min']
+        change = after / before - 1 if before else 0.0
+        flag = ""
+        if change > threshold:
+            flag = "  REGRESSION"
+            regressions += 1
+        elif change < -threshold:
+            flag = "  faster"
+        print(f"{name:<52} {before * 1e6:12.1f} us -> {after * 1e6:12.1f} us  {change:+7.1%}{flag}")
+    for label, names in (("baseline", set(baseline) - set(current)), ("current", set(current) - set(baseline))):
+        if names:
+            print(f"{len(names)} benchmarks only in the {label} run")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the workout app's hot paths.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = subparsers.add_parser("run", help="Run the benchmarks and save the results as JSON.")
+    run_parser.add_argument("--sizes", type=int, nargs='+', default=list(SIZES), help="Catalog sizes to use.")
+    run_parser.add_argument("--output", default=None,
+                            help="Results file (default: benchmarks/results-<timestamp>.json).")
+    run_parser.add_argument("--no-render", action="store_true", help="Skip the simulated app.py render.")
+
+    compare_parser = subparsers.add_parser("compare", help="Compare two results files.")
+    compare_parser.add_argument("baseline", help="Results from before the change.")
+    compare_parser.add_argument("current", help="Results from after the change.")
+    compare_parser.add_argument("--threshold", type=float, default=0.1,
+                                help="Slowdown (as a fraction of the baseline) counted as a regression.")
+    args = parser.parse_args()
+
+    if args.command == "run":
+        output = args.output or os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                             f"results-{datetime.now():%Y%m%d-%H%M%S}.json")
+        run(args.sizes, output, not args.no_render)
+    else:
+        regressions = compare(args.baseline, args.current, args.threshold)
+        if regressions:
+            print(f"{regressions} benchmarks regressed by more than {args.threshold:.0%}", file=sys.stderr)
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,55 +1,139 @@
-import time
+import asyncio
 import argparse
+import json
+import os
 from datetime import datetime
 
+from session_log import (FSYNC_POLICIES, LEGACY_LOG_FILE, LOG_FILE, SessionLog, build_report, format_report,
+                         import_legacy_log, make_record)
+from timer_engine import WORK, PomodoroTimer, TimerEngine
+from timer_server import DEFAULT_HOST, DEFAULT_PORT, run_server
+from timer_state import (PAUSE_SIGNAL, RESUME_SIGNAL, STATE_FILE, TimerState, apply_offline, handle_pause_signals,
+                         load_state, process_alive)
+
 def format_time(seconds):
     """Formats seconds into MM:SS string."""
     return f"{seconds // 60:02d}:{seconds % 60:02d}"
 
-def countdown(duration, session_type):
-    """Runs a countdown for a given duration."""
-    while duration >= 0:
-        print(f"{session_type}: {format_time(duration)}", end='\r')
-        time.sleep(1)
-        duration -= 1
-    print()
+async def run_timers(names, work_seconds, break_seconds, cycles=None, log=None, state_path=None, saved=None):
+    """Runs one Pomodoro timer per name on a single event loop until they finish.
+
+    With state_path, the timers are checkpointed there; saved timer records
+    (from load_state) are resumed in place of starting new ones. On Ctrl+C
+    running timers are saved with their time left, so the next run carries
+    on from there, while after a crash they keep their deadlines.
+    """
+    single = len(saved or names) == 1
+
+    def show_tick(timer: PomodoroTimer, seconds: int):
+        print(f"{timer.phase}: {format_time(seconds)}", end='\r', flush=True)
+
+    def phase_ended(timer: PomodoroTimer, phase: str):
+        if log is not None:
+            ended_at = datetime.fromtimestamp(engine.wall_deadline(timer)).astimezone()
+            log.append(make_record(phase, timer.phase_seconds(phase), timer.name, ended_at))
+        prefix = "" if single else f"[{timer.name}] "
+        if single:
+            print()
+        if phase == WORK:
+            print(f"{prefix}Work session complete! Sessions completed: {timer.sessions_completed}")
+        else:
+            print(f"{prefix}Break session complete!")
 
-def log_session(session_type, duration_minutes):
-    """Logs session details to a file."""
-    with open("pomodoro_log.txt", "a") as f:
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        f.write(f"{timestamp} - {session_type}: {duration_minutes} minutes\n")
+    def signalled(action: str):
+        print(f"\nTimers {action}d.")
+
+    engine = TimerEngine(on_tick=show_tick, on_phase_end=phase_ended)
+    state = TimerState(engine, state_path) if state_path else None
+    handle_pause_signals(engine, signalled)
+    if saved:
+        for timer in state.restore(saved):
+            status = "paused" if timer.paused else f"{timer.phase}, {format_time(engine.seconds_left(timer))} left"
+            print(f"Resuming {timer.name}: {status}")
+            engine.watch(timer.name, single)
+    else:
+        for name in names:
+            # With several timers a live countdown line would be unreadable, so only the single one is watched
+            engine.add(name, work_seconds, break_seconds, cycles, watch=single)
+            engine.start(name)
+    try:
+        await engine.wait_idle()
+    finally:
+        if state is not None:
+            state.save(suspend=True)
 
 def main():
     """Main function to run the Pomodoro timer."""
     parser = argparse.ArgumentParser(description="A simple command-line Pomodoro timer.")
     parser.add_argument("-w", "--work", type=int, default=25, help="Work session duration in minutes.")
     parser.add_argument("-b", "--break", type=int, default=5, help="Break session duration in minutes.", dest="break_duration")
+    parser.add_argument("-c", "--cycles", type=int, default=None, help="Stop after this many work/break cycles.")
+    parser.add_argument("-n", "--name", action="append", dest="names",
+                        help="Name of a timer to run; repeat to run several at once.")
+    parser.add_argument("--log", default=LOG_FILE, help="Structured session log (JSON Lines).")
+    parser.add_argument("--fsync", choices=FSYNC_POLICIES, default="batch",
+                        help="When to fsync the session log.")
+    parser.add_argument("--state", default=STATE_FILE, help="Checkpoint of running timers, resumed on restart.")
+    parser.add_argument("--fresh", action="store_true", help="Start new timers instead of resuming saved ones.")
+    subparsers = parser.add_subparsers(dest="command")
+
+    report_parser = subparsers.add_parser("report", help="Show totals per day and week, and streaks.")
+    report_parser.add_argument("--days", type=int, default=7, help="Number of recent days to show.")
+    report_parser.add_argument("--weeks", type=int, default=4, help="Number of recent weeks to show.")
+    report_parser.add_argument("--json", action="store_true", help="Print the report as JSON.")
+
+    serve_parser = subparsers.add_parser("serve",
+                                         help="Run timers for many users behind a local HTTP/WebSocket API.")
+    serve_parser.add_argument("--host", default=DEFAULT_HOST, help="Address to listen on.")
+    serve_parser.add_argument("--port", type=int, default=DEFAULT_PORT, help="Port to listen on.")
+
+    subparsers.add_parser("pause", help="Pause the running (or saved) timers.")
+    subparsers.add_parser("resume", help="Resume paused timers.")
+
+    import_parser = subparsers.add_parser("import-legacy", help="Copy an old text log into the structured log.")
+    import_parser.add_argument("path", nargs='?', default=LEGACY_LOG_FILE, help="The pomodoro_log.txt to import.")
     args = parser.parse_args()
 
-    work_duration_minutes = args.work
-    break_duration_minutes = args.break_duration
-    work_duration_seconds = work_duration_minutes * 60
-    break_duration_seconds = break_duration_minutes * 60
-    session_count = 0
+    if args.command == "report":
+        report = build_report(args.log, args.days, args.weeks)
+        print(json.dumps(report, indent=2) if args.json else format_report(report))
+        return
+    if args.command == "import-legacy":
+        with SessionLog(args.log, args.fsync) as log:
+            print(f"Imported {import_legacy_log(args.path, log)} sessions into {args.log}")
+        return
+
+    state = load_state(args.state)
+    if args.command in ("pause", "resume"):
+        if process_alive(state['pid'], state['pid_started']) and PAUSE_SIGNAL is not None:
+            os.kill(state['pid'], PAUSE_SIGNAL if args.command == "pause" else RESUME_SIGNAL)
+            print(f"Sent {args.command} to timer process {state['pid']}.")
+        else:
+            print(f"{args.command.capitalize()}d {apply_offline(args.state, args.command)} saved timers.")
+        return
+    # --fresh discards the saved timers, so whoever wrote them doesn't matter
+    if not args.fresh and process_alive(state['pid'], state['pid_started']):
+        parser.error(f"timers in {args.state} are already running in process {state['pid']}")
+    saved = [] if args.fresh else state['timers']
+
+    if args.command == "serve":
+        run_server(args.host, args.port, args.log, args.fsync, args.work * 60, args.break_duration * 60,
+                   args.state, saved)
+        return
+
+    names = args.names or ["pomodoro"]
+    if len(set(names)) != len(names):
+        parser.error("timer names must be unique")
 
     print("Starting Pomodoro timer. Press Ctrl+C to exit.")
 
-    try:
-        while True:
-            # Work session
-            countdown(work_duration_seconds, "Work")
-            log_session("Work", work_duration_minutes)
-            session_count += 1
-            print(f"Work session complete! Sessions completed: {session_count}")
-
-            # Break session
-            countdown(break_duration_seconds, "Break")
-            log_session("Break", break_duration_minutes)
-            print("Break session complete!")
-
-    except KeyboardInterrupt:
-        print("\nPomodoro timer stopped.")
+    # Sessions are minutes apart, so each one is written (and synced) as it ends
+    with SessionLog(args.log, args.fsync, flush_interval=0) as log:
+        try:
+            asyncio.run(run_timers(names, args.work * 60, args.break_duration * 60, args.cycles, log,
+                                   args.state, saved))
+        except KeyboardInterrupt:
+            print("\nPomodoro timer stopped.")
 
 if __name__ == "__main__":
     main()
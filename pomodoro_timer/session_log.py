@@ -0,0 +1,249 @@
+import json
+import os
+import re
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List, Optional, TextIO
+
+from timer_engine import BREAK, WORK
+
+LOG_FILE = os.environ.get("POMODORO_LOG_FILE",
+                          os.path.join(os.path.dirname(os.path.abspath(__file__)), "pomodoro_log.jsonl"))
+LEGACY_LOG_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "pomodoro_log.txt")
+
+# "always": fsync every record; "batch": fsync each buffered write; "never": leave it to the OS
+FSYNC_POLICIES = ("always", "batch", "never")
+
+_LEGACY_LINE = re.compile(r'^(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}) - (?:(.+) )?(Work|Break): (\d+) minutes$')
+
+
+def make_record(phase: str, seconds: int, timer: str = "pomodoro", ended_at: Optional[datetime] = None
+                ) -> Dict[str, Any]:
+    """Build one log record: a finished phase of a timer."""
+    ended_at = ended_at or datetime.now().astimezone()
+    return {'ts': ended_at.isoformat(timespec='seconds'), 'timer': timer, 'phase': phase, 'seconds': seconds}
+
+
+class SessionLog:
+    """Append-only JSON Lines log of finished sessions, with buffered writes.
+
+    Records are held in memory until buffer_size of them have accumulated
+    or flush_interval seconds have passed since the last write, then
+    written in one go. fsync follows one of FSYNC_POLICIES. Use it as a
+    context manager, or call close(), so buffered records reach the file.
+    """
+
+    def __init__(self, path: Optional[str] = None, fsync: str = "batch", buffer_size: int = 64,
+                 flush_interval: float = 5.0):
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"fsync must be one of {', '.join(FSYNC_POLICIES)}")
+        self.path = path or LOG_FILE
+        self.fsync = fsync
+        self.buffer_size = buffer_size
+        self.flush_interval = flush_interval
+        self._buffer: List[str] = []
+        self._last_flush = time.monotonic()
+        self._file: Optional[TextIO] = None
+
+    def append(self, record: Dict[str, Any]) -> None:
+        """Queue a record, writing the buffer out if it is due."""
+        self._buffer.append(json.dumps(record, ensure_ascii=False, separators=(',', ':')) + "\n")
+        if (self.fsync == "always" or len(self._buffer) >= self.buffer_size
+                or time.monotonic() - self._last_flush >= self.flush_interval):
+            self.flush()
+
+    def flush(self) -> None:
+        """Write buffered records in a single write."""
+        self._last_flush = time.monotonic()
+        if not self._buffer:
+            return
+        if self._file is None:
+            self._file = open(self.path, 'a', encoding='utf-8')
+        self._file.write("".join(self._buffer))
+        self._buffer.clear()
+        self._file.flush()
+        if self.fsync != "never":
+            os.fsync(self._file.fileno())
+
+    def close(self) -> None:
+        """Flush and close the log."""
+        self.flush()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self) -> "SessionLog":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def get_summary_path(path: Optional[str] = None) -> str:
+    """Get the path of the rolled-up summary kept next to a log."""
+    return (path or LOG_FILE) + ".summary.json"
+
+
+def _empty_summary() -> Dict[str, Any]:
+    return {'offset': 0, 'days': {}, 'timers': {}}
+
+
+def _add_to_summary(summary: Dict[str, Any], record: Dict[str, Any]) -> None:
+    """Fold one record into the per-day totals and the per-timer work session counts."""
+    day = summary['days'].setdefault(record['ts'][:10], {'work_sessions': 0, 'work_seconds': 0,
+                                                          'break_seconds': 0})
+    if record['phase'] == WORK:
+        day['work_sessions'] += 1
+        day['work_seconds'] += record['seconds']
+        summary['timers'][record['timer']] = summary['timers'].get(record['timer'], 0) + 1
+    elif record['phase'] == BREAK:
+        day['break_seconds'] += record['seconds']
+
+
+def write_json_atomic(path: str, data: Any, fsync: bool = False) -> None:
+    """Replace a JSON file atomically; with fsync, the new contents also survive a power cut."""
+    directory = os.path.dirname(path) or '.'
+    fd, temp_path = tempfile.mkstemp(prefix=os.path.basename(path) + '.', suffix='.tmp', dir=directory)
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(json.dumps(data, separators=(',', ':')))
+            if fsync:
+                f.flush()
+                os.fsync(f.fileno())
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+def load_summary(path: Optional[str] = None) -> Dict[str, Any]:
+    """Get per-day totals for the log, reading only records added since the last call.
+
+    The summary remembers how many bytes of the log it covers, so a report
+    costs one small JSON read plus the new tail of the log rather than a
+    scan of the whole history. A log that shrank (was replaced or
+    truncated) is summarised again from the start.
+    """
+    path = path or LOG_FILE
+    summary_path = get_summary_path(path)
+    try:
+        with open(summary_path, 'r', encoding='utf-8') as f:
+            summary = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        summary = _empty_summary()
+
+    try:
+        size = os.path.getsize(path)
+    except FileNotFoundError:
+        return _empty_summary()
+    if size < summary['offset']:
+        summary = _empty_summary()
+    if size == summary['offset']:
+        return summary
+
+    with open(path, 'rb') as f:
+        f.seek(summary['offset'])
+        tail = f.read()
+    # A partly written last line is left for the next call
+    complete = tail[:tail.rfind(b"\n") + 1]
+    for line in complete.splitlines():
+        if not line.strip():
+            continue
+        try:
+            _add_to_summary(summary, json.loads(line))
+        except (json.JSONDecodeError, KeyError, TypeError):
+            print(f"Warning: Skipping unreadable record in {path} after byte {summary['offset']}")
+    summary['offset'] += len(complete)
+
+    write_json_atomic(summary_path, summary)
+    return summary
+
+
+def _streaks(active_days: List[date], today: date) -> Dict[str, int]:
+    """Get the current and longest runs of consecutive days with a work session."""
+    longest = current = run = 0
+    previous: Optional[date] = None
+    for day in active_days:
+        run = run + 1 if previous is not None and day - previous == timedelta(days=1) else 1
+        longest = max(longest, run)
+        previous = day
+    # The current streak survives until a whole day passes without work
+    if previous is not None and today - previous <= timedelta(days=1):
+        current = run
+    return {'current_streak_days': current, 'longest_streak_days': longest}
+
+
+def build_report(path: Optional[str] = None, days: int = 7, weeks: int = 4,
+                 today: Optional[date] = None) -> Dict[str, Any]:
+    """Summarise the log: totals for recent days and ISO weeks, plus streaks."""
+    summary = load_summary(path)
+    today = today or date.today()
+    by_day = summary['days']
+
+    daily = []
+    for offset in range(days - 1, -1, -1):
+        day = (today - timedelta(days=offset)).isoformat()
+        totals = by_day.get(day, {'work_sessions': 0, 'work_seconds': 0, 'break_seconds': 0})
+        daily.append(dict(totals, date=day))
+
+    weekly: Dict[str, Dict[str, int]] = {}
+    first_week = today - timedelta(days=today.weekday(), weeks=weeks - 1)
+    for offset in range(weeks):
+        week_start = first_week + timedelta(weeks=offset)
+        year, week, _ = week_start.isocalendar()
+        weekly[f"{year}-W{week:02d}"] = {'work_sessions': 0, 'work_seconds': 0, 'break_seconds': 0}
+    for day, totals in by_day.items():
+        year, week, _ = date.fromisoformat(day).isocalendar()
+        bucket = weekly.get(f"{year}-W{week:02d}")
+        if bucket is not None:
+            for key in bucket:
+                bucket[key] += totals[key]
+
+    active_days = sorted(date.fromisoformat(day) for day, totals in by_day.items() if totals['work_sessions'])
+    return {
+        'daily': daily,
+        'weekly': [dict(totals, week=week) for week, totals in weekly.items()],
+        'total_work_sessions': sum(totals['work_sessions'] for totals in by_day.values()),
+        'total_work_seconds': sum(totals['work_seconds'] for totals in by_day.values()),
+        **_streaks(active_days, today),
+    }
+
+
+def format_report(report: Dict[str, Any]) -> str:
+    """Render a report as plain text."""
+    def totals_line(label: str, totals: Dict[str, int]) -> str:
+        return (f"  {label:<10}  {totals['work_sessions']:3d} sessions  {totals['work_seconds'] // 60:5d} min work"
+                f"  {totals['break_seconds'] // 60:4d} min break")
+
+    lines = ["Daily totals:"]
+    lines.extend(totals_line(day['date'], day) for day in report['daily'])
+    lines.append("Weekly totals:")
+    lines.extend(totals_line(week['week'], week) for week in report['weekly'])
+    lines.append(f"All time: {report['total_work_sessions']} sessions, {report['total_work_seconds'] // 3600} h work")
+    lines.append(f"Streak: {report['current_streak_days']} days (longest {report['longest_streak_days']})")
+    return "\n".join(lines)
+
+
+def import_legacy_log(legacy_path: Optional[str] = None, log: Optional[SessionLog] = None) -> int:
+    """Append the records of an old free-text pomodoro_log.txt to the structured log."""
+    legacy_path = legacy_path or LEGACY_LOG_FILE
+    target = log or SessionLog()
+    count = 0
+    try:
+        with open(legacy_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                match = _LEGACY_LINE.match(line.strip())
+                if match is None:
+                    continue
+                timestamp, timer, phase, minutes = match.groups()
+                ended_at = datetime.strptime(timestamp, "%Y-%m-%d %H:%M:%S").astimezone()
+                target.append(make_record(phase, int(minutes) * 60, timer or "pomodoro", ended_at))
+                count += 1
+    finally:
+        if log is None:
+            target.close()
+        else:
+            target.flush()
+    return count
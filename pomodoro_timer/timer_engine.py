@@ -0,0 +1,247 @@
+import asyncio
+import math
+import time
+from typing import Callable, Dict, List, Optional
+
+WORK = "Work"
+BREAK = "Break"
+PHASES = (WORK, BREAK)
+
+# asyncio may run a callback up to one clock tick before its deadline
+_EPSILON = 1e-3
+
+TickCallback = Callable[["PomodoroTimer", int], None]
+PhaseEndCallback = Callable[["PomodoroTimer", str], None]
+ChangeCallback = Callable[["PomodoroTimer"], None]
+
+
+class PomodoroTimer:
+    """State of one named timer: a fixed-size record, whatever the number of timers.
+
+    While running, time left is derived from deadline (event-loop, i.e.
+    monotonic, time); while stopped or paused it is frozen in remaining.
+    """
+    __slots__ = ('name', 'work_seconds', 'break_seconds', 'cycles', 'phase', 'deadline', 'remaining',
+                 'paused', 'sessions_completed', 'watched', 'shown', 'handle')
+
+    def __init__(self, name: str, work_seconds: int, break_seconds: int, cycles: Optional[int] = None):
+        self.name = name
+        self.work_seconds = work_seconds
+        self.break_seconds = break_seconds
+        self.cycles = cycles  # None: repeat until stopped
+        self.phase = WORK
+        self.deadline: Optional[float] = None  # None when not running
+        self.remaining: float = work_seconds
+        self.paused = False
+        self.sessions_completed = 0
+        self.watched = False  # whether to call on_tick when the displayed second changes
+        self.shown: Optional[int] = None
+        self.handle: Optional[asyncio.TimerHandle] = None
+
+    @property
+    def running(self) -> bool:
+        return self.deadline is not None
+
+    def phase_seconds(self, phase: str) -> int:
+        """Get the full length of a phase."""
+        return self.work_seconds if phase == WORK else self.break_seconds
+
+
+class TimerEngine:
+    """Run many Pomodoro timers concurrently on one asyncio event loop.
+
+    Each running timer has exactly one pending wake-up in the loop's own
+    deadline heap: at the end of its phase, or, if it is watched, when its
+    displayed whole second next changes. Time left is always computed from
+    the deadline, so late wake-ups never accumulate into drift, and each
+    phase's deadline follows on from the previous one rather than from
+    whenever the callback happened to run.
+    """
+
+    def __init__(self, on_tick: Optional[TickCallback] = None, on_phase_end: Optional[PhaseEndCallback] = None,
+                 loop: Optional[asyncio.AbstractEventLoop] = None, on_change: Optional[ChangeCallback] = None):
+        self.on_tick = on_tick
+        self.on_phase_end = on_phase_end
+        self.on_change = on_change  # called whenever a timer's deadline or phase changes, not every second
+        self.timers: Dict[str, PomodoroTimer] = {}
+        self._loop = loop
+        self._idle: Optional[asyncio.Event] = None
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        if self._loop is None:
+            self._loop = asyncio.get_running_loop()
+        return self._loop
+
+    def now(self) -> float:
+        """Current engine time (monotonic seconds)."""
+        return self.loop.time()
+
+    def add(self, name: str, work_seconds: int = 25 * 60, break_seconds: int = 5 * 60,
+            cycles: Optional[int] = None, watch: bool = False) -> PomodoroTimer:
+        """Register a stopped timer; raises ValueError if the name is taken."""
+        if name in self.timers:
+            raise ValueError(f"Timer '{name}' already exists")
+        if work_seconds <= 0 or break_seconds < 0:
+            raise ValueError("Work must be positive and break non-negative")
+        timer = PomodoroTimer(name, work_seconds, break_seconds, cycles)
+        timer.watched = watch
+        self.timers[name] = timer
+        return timer
+
+    def get(self, name: str) -> PomodoroTimer:
+        """Look up a timer; raises KeyError for an unknown name."""
+        try:
+            return self.timers[name]
+        except KeyError:
+            raise KeyError(f"No timer named '{name}'") from None
+
+    def start(self, name: str, phase: str = WORK, remaining: Optional[float] = None) -> PomodoroTimer:
+        """Start (or restart) a timer at the beginning of phase, or with remaining seconds of it left.
+
+        A negative remaining means the phase ended that long ago: the missed
+        phase ends are run straight away, each chained from the one before.
+        """
+        timer = self.get(name)
+        self._cancel(timer)
+        timer.phase = phase
+        timer.remaining = timer.phase_seconds(phase) if remaining is None else remaining
+        timer.paused = False
+        self._run(timer)
+        self._changed(timer)
+        return timer
+
+    def pause(self, name: str) -> PomodoroTimer:
+        """Freeze a running timer's time left."""
+        timer = self.get(name)
+        if timer.running:
+            timer.remaining = max(0.0, timer.deadline - self.now())
+            self._cancel(timer)
+            timer.paused = True
+            self._changed(timer)
+        return timer
+
+    def resume(self, name: str) -> PomodoroTimer:
+        """Continue a paused timer from where it was paused."""
+        timer = self.get(name)
+        if not timer.running:
+            timer.paused = False
+            self._run(timer)
+            self._changed(timer)
+        return timer
+
+    def stop(self, name: str) -> PomodoroTimer:
+        """Stop a timer and remove it from the engine."""
+        timer = self.get(name)
+        self._cancel(timer)
+        del self.timers[name]
+        self._update_idle()
+        self._changed(timer)
+        return timer
+
+    def watch(self, name: str, watched: bool = True) -> None:
+        """Turn per-second on_tick calls for a timer on or off."""
+        timer = self.get(name)
+        if timer.watched == watched:
+            return
+        timer.watched = watched
+        timer.shown = None
+        if timer.running:
+            # Keep the deadline; only the next wake-up moves
+            timer.handle.cancel()
+            self._wake(timer)
+
+    def time_left(self, timer: PomodoroTimer) -> float:
+        """Seconds left in the timer's current phase."""
+        if timer.running:
+            return max(0.0, timer.deadline - self.now())
+        return timer.remaining
+
+    def seconds_left(self, timer: PomodoroTimer) -> int:
+        """Whole seconds left, as displayed (rounded up)."""
+        return max(0, math.ceil(self.time_left(timer) - _EPSILON))
+
+    def wall_deadline(self, timer: PomodoroTimer) -> float:
+        """The running timer's deadline as a Unix timestamp, which outlives the process."""
+        return time.time() + (timer.deadline - self.now())
+
+    def running_timers(self) -> List[PomodoroTimer]:
+        """Get the timers that are currently counting down."""
+        return [timer for timer in self.timers.values() if timer.running]
+
+    async def wait_idle(self) -> None:
+        """Wait until no timer is running or paused (forever, for timers without a cycle limit)."""
+        if self._idle is None:
+            self._idle = asyncio.Event()
+        self._update_idle()
+        await self._idle.wait()
+
+    def _update_idle(self) -> None:
+        if self._idle is not None:
+            if any(timer.running or timer.paused for timer in self.timers.values()):
+                self._idle.clear()
+            else:
+                self._idle.set()
+
+    def _changed(self, timer: PomodoroTimer) -> None:
+        if self.on_change is not None:
+            self.on_change(timer)
+
+    def _cancel(self, timer: PomodoroTimer) -> None:
+        if timer.handle is not None:
+            timer.handle.cancel()
+            timer.handle = None
+        timer.deadline = None
+
+    def _run(self, timer: PomodoroTimer) -> None:
+        timer.deadline = self.now() + timer.remaining
+        timer.shown = None
+        if self._idle is not None:
+            self._idle.clear()
+        self._wake(timer)
+
+    def _schedule(self, timer: PomodoroTimer) -> None:
+        """Queue the timer's next wake-up: the next display change if watched, else its deadline."""
+        when = timer.deadline
+        if timer.watched and self.on_tick is not None:
+            # The display shows ceil(time left); it next changes when that drops by one
+            when = timer.deadline - max(0, self.seconds_left(timer) - 1)
+        timer.handle = self.loop.call_at(when, self._wake, timer)
+
+    def _wake(self, timer: PomodoroTimer) -> None:
+        timer.handle = None
+        if timer.deadline - self.now() <= _EPSILON:
+            self._end_phase(timer)
+            if not timer.running:
+                return
+
+        if timer.watched and self.on_tick is not None:
+            seconds = self.seconds_left(timer)
+            if seconds != timer.shown:
+                timer.shown = seconds
+                self.on_tick(timer, seconds)
+        self._schedule(timer)
+
+    def _end_phase(self, timer: PomodoroTimer) -> None:
+        finished = timer.phase
+        if finished == WORK:
+            timer.sessions_completed += 1
+        if self.on_phase_end is not None:
+            self.on_phase_end(timer, finished)
+            if self.timers.get(timer.name) is not timer or not timer.running:
+                return  # The callback stopped or paused it
+
+        if finished == BREAK and timer.cycles is not None and timer.sessions_completed >= timer.cycles:
+            self._cancel(timer)
+            timer.phase = WORK
+            timer.remaining = timer.work_seconds
+            self._update_idle()
+            self._changed(timer)
+            return
+
+        timer.phase = BREAK if finished == WORK else WORK
+        # Chain from the old deadline, not from now, so lateness doesn't accumulate
+        timer.deadline += timer.phase_seconds(timer.phase)
+        timer.remaining = timer.phase_seconds(timer.phase)
+        timer.shown = None
+        self._changed(timer)
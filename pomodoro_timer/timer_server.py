@@ -0,0 +1,330 @@
+import asyncio
+import base64
+import hashlib
+import json
+import struct
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Set, Tuple
+from urllib.parse import unquote
+
+from session_log import SessionLog, make_record
+from timer_engine import PomodoroTimer, TimerEngine
+from timer_state import TimerState, handle_pause_signals
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+LOG_FLUSH_SECONDS = 5.0
+# Timer checkpoints hold deadlines, so a save only needs to catch starts, pauses and phase changes
+STATE_SAVE_SECONDS = 1.0
+
+# A client whose unsent pushes exceed this is too slow to keep up and is dropped
+MAX_CLIENT_BUFFER = 1 << 20
+MAX_BODY = 1 << 16
+
+_WEBSOCKET_GUID = b"258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+_OPCODE_TEXT, _OPCODE_CLOSE, _OPCODE_PING, _OPCODE_PONG = 0x1, 0x8, 0x9, 0xA
+
+_STATUS_TEXT = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed"}
+
+
+class HTTPError(Exception):
+    """An error answered with an HTTP status and a JSON {"error": ...} body."""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+def timer_record(engine: TimerEngine, timer: PomodoroTimer) -> Dict[str, Any]:
+    """Get the compact JSON form of a timer."""
+    return {'name': timer.name, 'phase': timer.phase, 'left': engine.seconds_left(timer),
+            'running': timer.running, 'paused': timer.paused, 'sessions': timer.sessions_completed}
+
+
+def _timer_names(value: Any) -> List[str]:
+    """Get the timer names from a subscribe/unsubscribe value: one name or a list of them."""
+    if isinstance(value, str):
+        return [value]
+    if isinstance(value, list):
+        return [name for name in value if isinstance(name, str)]
+    return []
+
+
+def _frame(payload: bytes, opcode: int = _OPCODE_TEXT) -> bytes:
+    """Encode one unmasked (server to client) WebSocket frame."""
+    length = len(payload)
+    if length < 126:
+        header = struct.pack("!BB", 0x80 | opcode, length)
+    elif length < 1 << 16:
+        header = struct.pack("!BBH", 0x80 | opcode, 126, length)
+    else:
+        header = struct.pack("!BBQ", 0x80 | opcode, 127, length)
+    return header + payload
+
+
+async def _read_frame(reader: asyncio.StreamReader) -> Tuple[int, bytes]:
+    """Read one (masked, client to server) WebSocket frame as (opcode, payload)."""
+    first, second = await reader.readexactly(2)
+    length = second & 0x7F
+    if length == 126:
+        (length,) = struct.unpack("!H", await reader.readexactly(2))
+    elif length == 127:
+        (length,) = struct.unpack("!Q", await reader.readexactly(8))
+    if length > MAX_BODY:
+        raise ValueError("WebSocket frame too large")
+    mask = await reader.readexactly(4) if second & 0x80 else b"\0\0\0\0"
+    payload = bytearray(await reader.readexactly(length))
+    for i in range(length):
+        payload[i] ^= mask[i % 4]
+    return first & 0x0F, bytes(payload)
+
+
+class TimerServer:
+    """Serve many users' timers from one event loop over a local HTTP and WebSocket API.
+
+    HTTP (JSON bodies and responses):
+        GET  /timers                      all timers
+        GET  /timers/<name>               one timer
+        POST /timers/<name>/start         {"work": s, "break": s, "cycles": n}, all optional
+        POST /timers/<name>/pause | resume | stop
+
+    WebSocket at /ws: send {"subscribe": [names]} or {"unsubscribe": [names]};
+    the server pushes {"e": "tick", "t": name, "s": seconds left} each time a
+    subscribed timer's displayed second changes and {"e": "end", "t": name,
+    "p": phase, "n": sessions} when one of its phases ends. Timers nobody
+    subscribes to are only woken at their phase deadlines.
+
+    With state_path, timers are checkpointed there, and the saved records
+    passed to serve() are resumed before the first request.
+    """
+
+    def __init__(self, log: Optional[SessionLog] = None, work_seconds: int = 25 * 60, break_seconds: int = 5 * 60,
+                 state_path: Optional[str] = None):
+        self.engine = TimerEngine(on_tick=self._on_tick, on_phase_end=self._on_phase_end)
+        self.log = log
+        self.work_seconds = work_seconds
+        self.break_seconds = break_seconds
+        self.state_path = state_path
+        self.subscribers: Dict[str, Set[asyncio.StreamWriter]] = {}
+
+    async def serve(self, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT,
+                    saved: Optional[List[Dict[str, Any]]] = None) -> None:
+        """Run the server until cancelled."""
+        state = None
+        if self.state_path:
+            state = TimerState(self.engine, self.state_path, STATE_SAVE_SECONDS)
+            if saved:
+                print(f"Resumed {len(state.restore(saved))} timers")
+        handle_pause_signals(self.engine)
+        server = await asyncio.start_server(self._handle_connection, host, port)
+        flusher = asyncio.ensure_future(self._flush_log_periodically())
+        print(f"Pomodoro server listening on http://{host}:{port}")
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            flusher.cancel()
+            if state is not None:
+                state.save(suspend=True)
+
+    async def _flush_log_periodically(self) -> None:
+        while self.log is not None:
+            await asyncio.sleep(LOG_FLUSH_SECONDS)
+            self.log.flush()
+
+    # Timer actions
+
+    def start(self, name: str, options: Dict[str, Any]) -> PomodoroTimer:
+        try:
+            work_seconds = int(options.get('work', self.work_seconds))
+            break_seconds = int(options.get('break', self.break_seconds))
+            cycles = options.get('cycles')
+            cycles = None if cycles is None else int(cycles)
+        except (TypeError, ValueError):
+            raise HTTPError(400, "work, break and cycles must be integers") from None
+
+        timer = self.engine.timers.get(name)
+        if timer is None:
+            try:
+                timer = self.engine.add(name, work_seconds, break_seconds, cycles, watch=name in self.subscribers)
+            except ValueError as e:
+                raise HTTPError(400, str(e)) from None
+        else:
+            timer.work_seconds, timer.break_seconds, timer.cycles = work_seconds, break_seconds, cycles
+        return self.engine.start(name)
+
+    def _timer_action(self, name: str, action: str, options: Dict[str, Any]) -> PomodoroTimer:
+        if action == "start":
+            return self.start(name, options)
+        if name not in self.engine.timers:
+            raise HTTPError(404, f"No timer named '{name}'")
+        if action == "pause":
+            return self.engine.pause(name)
+        if action == "resume":
+            return self.engine.resume(name)
+        if action == "stop":
+            return self.engine.stop(name)
+        raise HTTPError(404, f"Unknown action '{action}'")
+
+    # Pushes
+
+    def _push(self, name: str, message: Dict[str, Any]) -> None:
+        clients = self.subscribers.get(name)
+        if not clients:
+            return
+        frame = _frame(json.dumps(message, separators=(',', ':')).encode('utf-8'))
+        for writer in list(clients):
+            if writer.transport.get_write_buffer_size() > MAX_CLIENT_BUFFER:
+                writer.close()
+                continue
+            writer.write(frame)
+
+    def _on_tick(self, timer: PomodoroTimer, seconds: int) -> None:
+        self._push(timer.name, {'e': 'tick', 't': timer.name, 's': seconds})
+
+    def _on_phase_end(self, timer: PomodoroTimer, phase: str) -> None:
+        if self.log is not None:
+            ended_at = datetime.fromtimestamp(self.engine.wall_deadline(timer)).astimezone()
+            self.log.append(make_record(phase, timer.phase_seconds(phase), timer.name, ended_at))
+        self._push(timer.name, {'e': 'end', 't': timer.name, 'p': phase, 'n': timer.sessions_completed})
+
+    def _subscribe(self, writer: asyncio.StreamWriter, names: List[str], subscribe: bool) -> None:
+        for name in names:
+            clients = self.subscribers.setdefault(name, set())
+            if subscribe:
+                clients.add(writer)
+            else:
+                clients.discard(writer)
+            if not clients:
+                del self.subscribers[name]
+            if name in self.engine.timers:
+                self.engine.watch(name, name in self.subscribers)
+
+    # Connections
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                request = await self._read_request(reader)
+                if request is None:
+                    break
+                method, path, headers, body = request
+                if path == "/ws" and headers.get('upgrade', '').lower() == "websocket":
+                    await self._handle_websocket(reader, writer, headers)
+                    break
+                status, payload = self._handle_http(method, path, body)
+                data = json.dumps(payload, separators=(',', ':')).encode('utf-8')
+                writer.write(f"HTTP/1.1 {status} {_STATUS_TEXT[status]}\r\nContent-Type: application/json\r\n"
+                             f"Content-Length: {len(data)}\r\n\r\n".encode('ascii') + data)
+                await writer.drain()
+                if headers.get('connection', '').lower() == "close":
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def _read_request(self, reader: asyncio.StreamReader
+                            ) -> Optional[Tuple[str, str, Dict[str, str], bytes]]:
+        """Read one HTTP/1.1 request, or None at end of stream."""
+        request_line = await reader.readline()
+        if not request_line.strip():
+            return None
+        method, path, _ = request_line.decode('latin-1').split(" ", 2)
+
+        headers: Dict[str, str] = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            key, _, value = line.decode('latin-1').partition(":")
+            headers[key.strip().lower()] = value.strip()
+
+        length = int(headers.get('content-length', 0))
+        if length > MAX_BODY:
+            raise ValueError("Request body too large")
+        body = await reader.readexactly(length) if length else b""
+        return method.upper(), path, headers, body
+
+    def _handle_http(self, method: str, path: str, body: bytes) -> Tuple[int, Any]:
+        parts = [unquote(part) for part in path.split("?", 1)[0].strip("/").split("/")]
+        try:
+            if parts[0] != "timers" or len(parts) > 3:
+                raise HTTPError(404, "Not found")
+            if len(parts) == 1:
+                if method != "GET":
+                    raise HTTPError(405, "Use GET")
+                return 200, [timer_record(self.engine, timer) for timer in self.engine.timers.values()]
+            if len(parts) == 2:
+                if method != "GET":
+                    raise HTTPError(405, "Use GET")
+                timer = self.engine.timers.get(parts[1])
+                if timer is None:
+                    raise HTTPError(404, f"No timer named '{parts[1]}'")
+                return 200, timer_record(self.engine, timer)
+
+            if method != "POST":
+                raise HTTPError(405, "Use POST")
+            try:
+                options = json.loads(body) if body.strip() else {}
+            except json.JSONDecodeError:
+                raise HTTPError(400, "Body must be JSON") from None
+            if not isinstance(options, dict):
+                raise HTTPError(400, "Body must be a JSON object")
+            return 200, timer_record(self.engine, self._timer_action(parts[1], parts[2], options))
+        except HTTPError as e:
+            return e.status, {'error': str(e)}
+
+    async def _handle_websocket(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter,
+                                headers: Dict[str, str]) -> None:
+        key = headers.get('sec-websocket-key', '').encode('ascii')
+        accept = base64.b64encode(hashlib.sha1(key + _WEBSOCKET_GUID).digest()).decode('ascii')
+        writer.write(b"HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+                     + f"Sec-WebSocket-Accept: {accept}\r\n\r\n".encode('ascii'))
+        subscribed: Set[str] = set()
+        try:
+            while True:
+                opcode, payload = await _read_frame(reader)
+                if opcode == _OPCODE_CLOSE:
+                    writer.write(_frame(payload[:2], _OPCODE_CLOSE))
+                    break
+                if opcode == _OPCODE_PING:
+                    writer.write(_frame(payload, _OPCODE_PONG))
+                    continue
+                if opcode != _OPCODE_TEXT:
+                    continue
+                try:
+                    message = json.loads(payload)
+                except json.JSONDecodeError:
+                    continue
+                if not isinstance(message, dict):
+                    continue
+                names = _timer_names(message.get('subscribe'))
+                watched = {name for name in names if name in self.subscribers}
+                self._subscribe(writer, names, True)
+                subscribed.update(names)
+                # Send the current state straight away rather than waiting for the next tick; a timer
+                # that has just started being watched already ticked to every subscriber
+                for name in names:
+                    timer = self.engine.timers.get(name)
+                    if timer is not None and (name in watched or not timer.running):
+                        writer.write(_frame(json.dumps({'e': 'tick', 't': name, 's': self.engine.seconds_left(timer)},
+                                                       separators=(',', ':')).encode('utf-8')))
+
+                names = _timer_names(message.get('unsubscribe'))
+                self._subscribe(writer, names, False)
+                subscribed.difference_update(names)
+        finally:
+            self._subscribe(writer, list(subscribed), False)
+
+
+def run_server(host: str = DEFAULT_HOST, port: int = DEFAULT_PORT, log_path: Optional[str] = None,
+               fsync: str = "batch", work_seconds: int = 25 * 60, break_seconds: int = 5 * 60,
+               state_path: Optional[str] = None, saved: Optional[List[Dict[str, Any]]] = None) -> None:
+    """Run the timer server in the foreground until interrupted."""
+    with SessionLog(log_path, fsync, buffer_size=256, flush_interval=LOG_FLUSH_SECONDS) as log:
+        server = TimerServer(log, work_seconds, break_seconds, state_path)
+        try:
+            asyncio.run(server.serve(host, port, saved))
+        except KeyboardInterrupt:
+            print("\nPomodoro server stopped.")
@@ -0,0 +1,202 @@
+import asyncio
+import json
+import os
+import signal
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from session_log import write_json_atomic
+from timer_engine import PHASES, PomodoroTimer, TimerEngine
+
+STATE_FILE = os.environ.get("POMODORO_STATE_FILE",
+                            os.path.join(os.path.dirname(os.path.abspath(__file__)), "pomodoro_state.json"))
+
+# Sent to a running timer process by the pause and resume commands, where the platform has them
+PAUSE_SIGNAL = getattr(signal, 'SIGUSR1', None)
+RESUME_SIGNAL = getattr(signal, 'SIGUSR2', None)
+
+# A phase that ended at most this long before the restart is counted as run; one that ended
+# longer ago was interrupted, so it starts over rather than logging sessions nobody ran
+RESTORE_GRACE_SECONDS = 60
+
+
+def timer_state(engine: TimerEngine, timer: PomodoroTimer, suspend: bool = False) -> Optional[Dict[str, Any]]:
+    """Get the checkpoint record of a timer, or None for one that has finished.
+
+    A running timer is saved by its wall-clock deadline, so the record stays
+    right however long it sits on disk. With suspend, it is saved by its
+    time left instead, to carry on from there whenever it is next loaded.
+    """
+    record = {'name': timer.name, 'work': timer.work_seconds, 'break': timer.break_seconds,
+              'cycles': timer.cycles, 'phase': timer.phase, 'sessions': timer.sessions_completed,
+              'paused': timer.paused, 'deadline': None, 'remaining': timer.remaining}
+    if timer.running:
+        if suspend:
+            record['remaining'] = engine.time_left(timer)
+        else:
+            record['deadline'] = engine.wall_deadline(timer)
+    elif not timer.paused:
+        return None
+    return record
+
+
+def load_state(path: Optional[str] = None) -> Dict[str, Any]:
+    """Read a checkpoint: {'pid': owner process or None, 'pid_started': its start time or None, 'timers': [records]}."""
+    empty = {'pid': None, 'pid_started': None, 'timers': []}
+    try:
+        with open(path or STATE_FILE, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+    except FileNotFoundError:
+        return empty
+    except json.JSONDecodeError:
+        print(f"Warning: Ignoring unreadable timer state in {path or STATE_FILE}")
+        return empty
+    return {'pid': state.get('pid'), 'pid_started': state.get('pid_started'), 'timers': state.get('timers', [])}
+
+
+def process_start_time(pid: int) -> Optional[int]:
+    """Get when a process started, in clock ticks since boot (Linux only; None elsewhere or if it's gone)."""
+    try:
+        with open(f"/proc/{pid}/stat", 'r') as f:
+            # Fields after the parenthesised command name; starttime is the 22nd field overall
+            return int(f.read().rsplit(')', 1)[1].split()[19])
+    except (OSError, IndexError, ValueError):
+        return None
+
+
+def process_alive(pid: Optional[int], started: Optional[int] = None) -> bool:
+    """Check whether a process other than this one is running as pid (POSIX only; False elsewhere).
+
+    With started (from process_start_time()), a process that has since
+    reused the pid doesn't count.
+    """
+    if not pid or pid == os.getpid() or os.name != 'posix':
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    if started is not None:
+        current = process_start_time(pid)
+        if current is not None and current != started:
+            return False
+    return True
+
+
+def apply_offline(path: Optional[str], action: str) -> int:
+    """Pause or resume the timers in a checkpoint no process is running; returns how many changed."""
+    path = path or STATE_FILE
+    state = load_state(path)
+    now = time.time()
+    changed = 0
+    for record in state['timers']:
+        if action == "pause" and not record['paused']:
+            if record['deadline'] is not None:
+                record['remaining'] = max(0.0, record['deadline'] - now)
+                record['deadline'] = None
+            record['paused'] = True
+            changed += 1
+        elif action == "resume" and record['paused']:
+            # Left without a deadline, it carries on from its time left when next loaded
+            record['paused'] = False
+            changed += 1
+    if changed:
+        write_json_atomic(path, {'pid': None, 'pid_started': None, 'timers': state['timers']}, fsync=True)
+    return changed
+
+
+def handle_pause_signals(engine: TimerEngine, on_signal: Optional[Callable[[str], None]] = None) -> None:
+    """Pause every running timer on PAUSE_SIGNAL and resume every paused one on RESUME_SIGNAL.
+
+    Must be called with the engine's loop running; does nothing where the
+    platform lacks the signals or the loop can't handle them.
+    """
+    def apply(action: str) -> None:
+        if on_signal is not None:
+            on_signal(action)
+        for timer in list(engine.timers.values()):
+            if action == "pause" and timer.running:
+                engine.pause(timer.name)
+            elif action == "resume" and timer.paused:
+                engine.resume(timer.name)
+
+    if PAUSE_SIGNAL is None or RESUME_SIGNAL is None:
+        return
+    try:
+        engine.loop.add_signal_handler(PAUSE_SIGNAL, apply, "pause")
+        engine.loop.add_signal_handler(RESUME_SIGNAL, apply, "resume")
+    except (NotImplementedError, RuntimeError):
+        pass
+
+
+class TimerState:
+    """Crash-safe checkpoint of an engine's timers.
+
+    Timers are saved only when a deadline or phase changes (start, pause,
+    resume, stop, phase end), never per second, since a record holds the
+    wall-clock deadline rather than the time left. Changes close together
+    are saved together: at most one write per min_interval seconds, with
+    each write replacing the file atomically. Restoring is one small JSON
+    read and one scheduled wake-up per timer.
+    """
+
+    def __init__(self, engine: TimerEngine, path: Optional[str] = None, min_interval: float = 0.0):
+        self.engine = engine
+        self.path = path or STATE_FILE
+        self.min_interval = min_interval
+        self._started = process_start_time(os.getpid())
+        self._last_save = float('-inf')
+        self._pending: Optional[asyncio.TimerHandle] = None
+        engine.on_change = self.changed
+
+    def changed(self, timer: Optional[PomodoroTimer] = None) -> None:
+        """Queue a save; the engine calls this whenever a timer changes."""
+        if self._pending is not None:
+            return
+        loop = self.engine.loop
+        delay = max(0.0, self._last_save + self.min_interval - loop.time())
+        self._pending = loop.call_later(delay, self.save)
+
+    def save(self, suspend: bool = False) -> None:
+        """Write every running or paused timer now; with suspend, running ones keep their time left."""
+        if self._pending is not None:
+            self._pending.cancel()
+            self._pending = None
+        self._last_save = self.engine.now()
+        records = [record for record in (timer_state(self.engine, timer, suspend)
+                                         for timer in self.engine.timers.values()) if record is not None]
+        if not records:
+            if os.path.exists(self.path):
+                os.remove(self.path)
+            return
+        owner = {'pid': None, 'pid_started': None} if suspend else {'pid': os.getpid(), 'pid_started': self._started}
+        write_json_atomic(self.path, {**owner, 'timers': records}, fsync=True)
+
+    def restore(self, records: List[Dict[str, Any]]) -> List[PomodoroTimer]:
+        """Recreate checkpointed timers in the engine, each resuming exactly where it was.
+
+        A timer whose deadline passed while no process was running ends that
+        phase now if it was due less than RESTORE_GRACE_SECONDS ago, and
+        otherwise restarts it; phases after it are never caught up on.
+        """
+        now = time.time()
+        restored = []
+        for record in records:
+            if record.get('phase') not in PHASES or record.get('name') in self.engine.timers:
+                continue
+            timer = self.engine.add(record['name'], record['work'], record['break'], record['cycles'])
+            timer.sessions_completed = record['sessions']
+            if record['deadline'] is not None:
+                overdue = now - record['deadline']
+                if overdue <= RESTORE_GRACE_SECONDS:
+                    self.engine.start(timer.name, record['phase'], max(0.0, record['deadline'] - now))
+                else:
+                    self.engine.start(timer.name, record['phase'])
+            elif record['paused']:
+                timer.phase, timer.remaining, timer.paused = record['phase'], record['remaining'], True
+            else:
+                self.engine.start(timer.name, record['phase'], record['remaining'])
+            restored.append(timer)
+        return restored
@@ -1,23 +1,32 @@
 import streamlit as st
+from streamlit.errors import StreamlitAPIException
 import time
-from datetime import datetime
-import base64
+from functools import partial
 import os
 import random
-from typing import List, Dict, Optional, Tuple
+from typing import List, Tuple
 
-from data_loader import ensure_image, get_exercises, get_random_workout, load_all_exercises
+from data_loader import (Exercise, count_exercises, get_equipment_types, get_focus_areas, make_plan_id,
+                         parse_plan_id, plan_exercise_ids, resolve_workout, set_stat_hook)
+from image_utils import THUMBNAIL_WIDTH, get_thumbnail
+import instrumentation
+from timer_component import countdown_timer
+from workout_export import EXPORT_FORMATS, export_workout
 
 # Configuration
 PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
 IMAGE_DIR = os.path.join(PROJECT_ROOT, "images")
 EXERCISES_FILE = os.path.join(PROJECT_ROOT, "streamlit_workout_app", "exercises.json")
 PLACEHOLDER_IMAGE = os.path.join(IMAGE_DIR, "placeholder.png")
+WORKOUT_TARGET_SECONDS = 10 * 60
+
+# Count data_loader's catalog and image stats in the rerun timings
+set_stat_hook(instrumentation.count_stat)
 
 
 def ensure_directories_exist():
     """Create necessary directories if they don't exist."""
-    if not os.path.exists(IMAGE_DIR):
+    if not instrumentation.path_exists(IMAGE_DIR):
         os.makedirs(IMAGE_DIR)
         st.info(f"Created {IMAGE_DIR} directory for exercise images.")
 
@@ -30,8 +39,8 @@ st.set_page_config(
     initial_sidebar_state="collapsed"
 )
 
-# Custom CSS
-st.markdown("""
+# Custom CSS, injected at the start of every rerun
+CUSTOM_CSS = """
 <style>
     .main-header {
         text-align: center;
@@ -163,13 +172,16 @@ st.markdown("""
         border: 1px solid #9e9e9e;
     }
 </style>
-""", unsafe_allow_html=True)
+"""
 
 
 def init_session_state():
     """Initialize session state variables."""
     defaults = {
-        'workout': [],
+        # Only ids and the plan ID (catalog version + seed) live in the session;
+        # exercises are resolved against the shared catalog snapshot
+        'workout_ids': (),
+        'plan_id': None,
         'current_exercise': 0,
         'workout_started': False,
         'workout_completed': False,
@@ -177,7 +189,9 @@ def init_session_state():
         'start_time': None,
         'pause_time': 0,
         'is_paused': False,
-        'timer_container': None
+        'timer_container': None,
+        'workout_equipment': 'all',
+        'settings': {'show_details': True, 'show_images': True, 'auto_advance': True}
     }
 
     for key, default_value in defaults.items():
@@ -192,36 +206,43 @@ def format_time(seconds: int) -> str:
     return f"{mins}:{secs:02d}"
 
 
-def analyze_exercises(exercises: List[Dict]) -> Tuple[List[str], List[str]]:
-    """Analyze exercises to determine available equipment and focus areas."""
-    equipment_set = set()
-    focus_area_set = set()
+def analyze_exercises() -> Tuple[List[str], List[str]]:
+    """Get available equipment and focus areas from the storage backend's indexes."""
+    return get_equipment_types(), get_focus_areas()
+
+
+def set_workout(plan_id: str, workout_ids: Tuple[int, ...]):
+    """Make a plan the session's workout."""
+    st.session_state.workout_ids = workout_ids
+    st.session_state.plan_id = plan_id
 
-    for exercise in exercises:
-        equipment = exercise.get('equipment', '').lower()
-        focus_area = exercise.get('focus_area', '').lower()
 
-        if equipment:
-            equipment_set.add(equipment)
-        if focus_area:
-            focus_area_set.add(focus_area)
+def get_workout() -> List[Exercise]:
+    """Resolve the session's workout against the shared catalog snapshot."""
+    if not st.session_state.workout_ids:
+        return []
+
+    try:
+        return resolve_workout(st.session_state.plan_id, st.session_state.workout_ids)
+    except ValueError:
+        set_workout(None, ())
+        reset_workout()
+        st.warning("The exercise catalog has changed since this workout was generated. Please generate a new one.")
+        return []
+
 
-    return sorted(equipment_set), sorted(focus_area_set)
+def get_current_exercise_duration() -> int:
+    """Get the full duration of the active exercise in seconds."""
+    workout = get_workout()
+    return workout[st.session_state.current_exercise].duration if workout else 0
 
 
 def get_current_exercise_time() -> int:
     """Get the current time remaining for the active exercise."""
-    if not st.session_state.workout or not st.session_state.workout_started:
+    if not st.session_state.workout_ids or not st.session_state.workout_started:
         return 0
 
-    current_exercise = st.session_state.workout[st.session_state.current_exercise]
-    # Handle both integer and string duration formats
-    duration = current_exercise.get('duration', 30)
-    if isinstance(duration, str):
-        # Extract number from string like "45 seconds"
-        total_duration = int(duration.split()[0])
-    else:
-        total_duration = duration
+    total_duration = get_current_exercise_duration()
 
     if st.session_state.start_time is None or st.session_state.is_paused:
         return total_duration
@@ -234,7 +255,7 @@ def get_current_exercise_time() -> int:
 
 def start_exercise():
     """Start the current exercise timer."""
-    if st.session_state.workout:
+    if st.session_state.workout_ids:
         st.session_state.workout_started = True
         st.session_state.start_time = time.time()
         st.session_state.pause_time = 0
@@ -258,7 +279,7 @@ def resume_exercise():
 
 def next_exercise():
     """Move to the next exercise."""
-    if st.session_state.current_exercise < len(st.session_state.workout) - 1:
+    if st.session_state.current_exercise < len(st.session_state.workout_ids) - 1:
         # Mark current exercise as completed
         if st.session_state.current_exercise not in st.session_state.exercise_completed:
             st.session_state.exercise_completed.append(st.session_state.current_exercise)
@@ -298,82 +319,352 @@ def reset_workout():
     st.session_state.exercise_completed = []
 
 
-def create_download_link(workout: List[Dict]) -> str:
-    """Create a download link for the workout plan."""
+def timed_export(workout: Tuple[Exercise, ...], export_format: str) -> bytes:
+    """Build an export when its download is requested, as an instrumented phase."""
+    with instrumentation.phase("export_workout"):
+        return export_workout(workout, export_format)
+
+
+def render_export_buttons(workout: List[Exercise]):
+    """Render download buttons that only build the export when clicked."""
+    workout = tuple(workout)
+    with st.popover("📥 Download Workout Plan"):
+        for export_format, spec in EXPORT_FORMATS.items():
+            st.download_button(
+                spec.label,
+                data=partial(timed_export, workout, export_format),
+                file_name=f"workout_plan.{spec.extension}",
+                mime=spec.mime,
+                on_click="ignore",
+                key=f"export_{export_format}"
+            )
+
+
+def display_timer():
+    """Display the timer; the countdown itself runs in the browser."""
+    if st.session_state.workout_started and not st.session_state.workout_completed:
+        current_time = get_current_exercise_time()
+        running = st.session_state.start_time is not None and not st.session_state.is_paused
+
+        # Check if exercise should auto-advance (e.g. the browser was closed while it ran)
+        if current_time <= 0 and running:
+            next_exercise()
+            st.rerun()
+
+        remaining = current_time
+        if running:
+            total_duration = get_current_exercise_duration()
+            elapsed = time.time() - st.session_state.start_time - st.session_state.pause_time
+            remaining = max(0.0, total_duration - elapsed)
+
+        # Identifies this run of this exercise, so a stale completion event is ignored
+        token = f"{st.session_state.current_exercise}:{st.session_state.start_time}"
+        event = countdown_timer(remaining, running, token, key="workout_timer")
+
+        # The browser reports back once, when the countdown reaches zero
+        if running and event and event.get('event') == 'completed' and event.get('token') == token:
+            next_exercise()
+            st.rerun()
+
+
+@st.fragment
+def render_controls(available_equipment: List[str], available_focus_areas: List[str]):
+    """Render workout generation controls and settings.
+
+    Changing a filter only reruns this fragment; generating a workout or
+    changing a display setting reruns the whole page.
+    """
+    col1, col2, col3 = st.columns(3)
+
+    with col1:
+        equipment_options = ['all'] + available_equipment
+        equipment_labels = ['All Equipment'] + [eq.replace('_', ' ').title() for eq in available_equipment]
+        equipment = st.selectbox(
+            "🏋️ Equipment",
+            equipment_options,
+            format_func=lambda x: equipment_labels[equipment_options.index(x)]
+        )
+
+    with col2:
+        focus_options = ['all'] + available_focus_areas
+        focus_labels = ['All Areas'] + [fa.replace('_', ' ').title() for fa in available_focus_areas]
+        focus_area = st.selectbox(
+            "🎯 Focus Area",
+            focus_options,
+            format_func=lambda x: focus_labels[focus_options.index(x)]
+        )
+
+    with col3:
+        st.write("")  # Spacing
+        if st.button("🔄 Generate Workout", type="primary"):
+            plan_id = make_plan_id(random.getrandbits(32), equipment, focus_area, WORKOUT_TARGET_SECONDS)
+            workout_ids = plan_exercise_ids(plan_id)
+            if workout_ids:
+                set_workout(plan_id, workout_ids)
+                st.session_state.workout_equipment = equipment
+                # The plan ID in the URL makes the workout shareable and survives a page reload
+                st.query_params["plan"] = plan_id
+                reset_workout()
+                st.success(f"Generated workout with {len(workout_ids)} exercises!")
+                st.rerun()
+
+    # Settings
+    with st.expander("⚙️ Settings"):
+        show_details = st.checkbox("📋 Show Detailed Instructions", value=True)
+        show_images = st.checkbox("🖼️ Show Exercise Images", value=True)
+        auto_advance = st.checkbox("⏭️ Auto-advance to next exercise", value=True)
+
+    # Settings are read by the card list, which only redraws on a full rerun
+    settings = {'show_details': show_details, 'show_images': show_images, 'auto_advance': auto_advance}
+    if st.session_state.settings != settings:
+        st.session_state.settings = settings
+        st.rerun()
+
+
+def render_workout_summary():
+    """Render the workout summary metrics and export link."""
+    workout = get_workout()
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric("💪 Exercises", len(workout))
+    with col2:
+        total_time = sum(exercise.duration for exercise in workout)
+        st.metric("⏱️ Total Time", format_time(total_time))
+    with col3:
+        equipment = st.session_state.workout_equipment
+        equipment_display = equipment.replace('_', ' ').title() if equipment != 'all' else 'Mixed'
+        st.metric("🎯 Equipment", equipment_display)
+    with col4:
+        render_export_buttons(workout)
+
+    if st.session_state.plan_id:
+        st.caption(f"Plan ID: `{st.session_state.plan_id}`")
+
+
+def rerun_timer():
+    """Rerun only the timer fragment, or the whole page when it ran as part of a full rerun."""
     try:
-        workout_text = "Your 10-Minute Workout Plan\n" + "=" * 50 + "\n\n"
-        workout_text += f"Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n"
+        st.rerun(scope="fragment")
+    except StreamlitAPIException:
+        st.rerun()
 
-        for i, exercise in enumerate(workout, 1):
-            workout_text += f"{i}. {exercise['name']}\n"
 
-            # Handle duration format
-            duration = exercise.get('duration', 30)
-            if isinstance(duration, str):
-                duration_text = duration
-            else:
-                duration_text = f"{duration} seconds"
+@st.fragment
+def render_timer():
+    """Render the timer and its controls.
 
-            workout_text += f"Duration: {duration_text}\n"
-            workout_text += f"Equipment: {exercise.get('equipment', 'bodyweight').title()}\n"
-            workout_text += f"Focus Area: {exercise.get('focus_area', 'full_body').replace('_', ' ').title()}\n"
-            workout_text += f"Muscles: {', '.join(exercise.get('muscles_worked', []))}\n"
-            workout_text += f"Description: {exercise.get('description', '')}\n\n"
+    Pause, resume and reset only rerun this fragment. Moving to another
+    exercise reruns the whole page so the card list picks up the change.
+    """
+    st.markdown("### 🏃‍♀️ Workout Timer")
 
-            workout_text += "Instructions:\n"
-            for j, instruction in enumerate(exercise.get('instructions', []), 1):
-                workout_text += f"  {j}. {instruction}\n"
+    # Display timer
+    display_timer()
 
-            workout_text += "\nTips:\n"
-            for tip in exercise.get('tips', []):
-                workout_text += f"  • {tip}\n"
+    # Exercise info
+    workout = get_workout()
+    if not workout:
+        return
 
-            workout_text += "\n" + "-" * 50 + "\n\n"
+    current_exercise = workout[st.session_state.current_exercise]
+    st.markdown(
+        f"**Exercise {st.session_state.current_exercise + 1} of {len(st.session_state.workout_ids)}: {current_exercise.name}**")
 
-        b64 = base64.b64encode(workout_text.encode('utf-8')).decode()
-        href = f'<a href="data:text/plain;base64,{b64}" download="workout_{datetime.now().strftime("%Y%m%d_%H%M%S")}.txt">📥 Download Workout Plan</a>'
-        return href
-    except Exception as e:
-        st.error(f"Error creating download link: {e}")
-        return ""
+    # Progress bar
+    progress = (st.session_state.current_exercise + 1) / len(st.session_state.workout_ids)
+    st.progress(progress)
 
+    # Timer controls
+    col1, col2, col3, col4, col5 = st.columns(5)
 
-def display_timer():
-    """Display and update the timer."""
-    if st.session_state.workout_started and not st.session_state.workout_completed:
-        current_time = get_current_exercise_time()
+    with col1:
+        if st.button("⏮️ Previous", disabled=st.session_state.current_exercise == 0):
+            prev_exercise()
+            st.rerun()
 
-        # Check if exercise should auto-advance
-        if current_time <= 0 and st.session_state.start_time is not None and not st.session_state.is_paused:
+    with col2:
+        if st.session_state.is_paused or st.session_state.start_time is None:
+            if st.button("▶️ Start/Resume"):
+                resume_exercise()
+                rerun_timer()
+        else:
+            if st.button("⏸️ Pause"):
+                pause_exercise()
+                rerun_timer()
+
+    with col3:
+        if st.button("🔄 Reset Exercise"):
+            st.session_state.start_time = None
+            st.session_state.pause_time = 0
+            st.session_state.is_paused = False
+            rerun_timer()
+
+    with col4:
+        if st.button("⏭️ Next",
+                     disabled=st.session_state.current_exercise >= len(st.session_state.workout_ids) - 1):
             next_exercise()
             st.rerun()
 
-        # Display timer
-        timer_class = "timer-display timer-low" if current_time <= 5 else "timer-display"
+    with col5:
+        if st.button("⏹️ Stop"):
+            reset_workout()
+            st.rerun()
 
-        # Use a placeholder to update the timer
-        if 'timer_placeholder' not in st.session_state:
-            st.session_state.timer_placeholder = st.empty()
 
-        st.session_state.timer_placeholder.markdown(
-            f'<div class="{timer_class}">{format_time(current_time)}</div>',
-            unsafe_allow_html=True
-        )
+def render_exercise_cards():
+    """Render the exercise cards.
+
+    The cards have no widgets of their own, so they are only redrawn by
+    full reruns (the current exercise or the completed set changing);
+    the timer fragment's reruns leave them alone.
+    """
+    show_details = st.session_state.settings['show_details']
+    show_images = st.session_state.settings['show_images']
+
+    st.markdown("### 📋 Exercise Details")
+
+    for i, exercise in enumerate(get_workout()):
+        # Determine card status
+        if i in st.session_state.exercise_completed:
+            status = "completed"
+            status_badge = '<span class="status-badge status-completed">✅ Completed</span>'
+        elif st.session_state.workout_started and i == st.session_state.current_exercise:
+            status = "active"
+            status_badge = '<span class="status-badge status-active">🏃‍♀️ Active</span>'
+        else:
+            status = "upcoming"
+            status_badge = '<span class="status-badge status-upcoming">⏳ Upcoming</span>'
+
+        card_class = "exercise-card current-exercise" if status == "active" else "exercise-card"
+
+        with st.container():
+            st.markdown(f'<div class="{card_class}">', unsafe_allow_html=True)
+
+            col1, col2 = st.columns([3, 1])
+            with col1:
+                st.markdown(f"**{i + 1}. {exercise.name}**")
+                st.markdown(status_badge, unsafe_allow_html=True)
+                st.markdown(f"⏱️ {exercise.duration_text}")
+
+                # Display muscle tags
+                muscles_html = "".join(
+                    [f'<span class="muscle-tag">{muscle}</span>' for muscle in exercise.muscles_worked])
+                st.markdown(muscles_html, unsafe_allow_html=True)
+
+                st.markdown(f"*{exercise.description or 'No description available'}*")
 
-        # Only rerun if timer is actually running
-        if st.session_state.start_time is not None and not st.session_state.is_paused and current_time > 0:
-            time.sleep(1)
+                if show_details:
+                    st.markdown("**How to Perform:**")
+                    for j, instruction in enumerate(exercise.instructions, 1):
+                        st.markdown(f"{j}. {instruction}")
+
+                    st.markdown("**💡 Tips:**")
+                    for tip in exercise.tips:
+                        st.markdown(f"• {tip}")
+
+            with col2:
+                if show_images:
+                    # 2x derivative keeps the 200px card sharp on high-DPI screens
+                    image_path = get_thumbnail(exercise, THUMBNAIL_WIDTH, scale=2)
+                    if image_path and instrumentation.path_exists(image_path):
+                        st.image(image_path, width=THUMBNAIL_WIDTH)
+                    else:
+                        st.markdown("🏋️‍♂️")  # Fallback emoji if no image
+
+            st.markdown('</div>', unsafe_allow_html=True)
+
+
+def render_tips():
+    """Render the quick tips section."""
+    st.markdown("---")
+    st.markdown("### 💡 Quick Tips")
+
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.markdown('<div class="tip-box">', unsafe_allow_html=True)
+        st.markdown("**🌱 Beginner?** Start with bodyweight exercises and focus on form over speed.")
+        st.markdown('</div>', unsafe_allow_html=True)
+
+    with col2:
+        st.markdown('<div class="tip-box">', unsafe_allow_html=True)
+        st.markdown("**🔥 Advanced?** Try adding dumbbells or increase duration for more challenge.")
+        st.markdown('</div>', unsafe_allow_html=True)
+
+    with col3:
+        st.markdown('<div class="tip-box">', unsafe_allow_html=True)
+        st.markdown(
+            "**⏰ Time-based:** Perform each exercise for the suggested duration with 10-15 second rest between exercises.")
+        st.markdown('</div>', unsafe_allow_html=True)
+
+
+def load_shared_plan():
+    """Load the workout for a ?plan= URL parameter, if it isn't the one already shown."""
+    plan_id = st.query_params.get("plan")
+    if not plan_id or plan_id == st.session_state.plan_id:
+        return
+
+    try:
+        workout_ids = plan_exercise_ids(plan_id)
+    except ValueError as e:
+        st.warning(f"Couldn't load the shared workout: {e}")
+        del st.query_params["plan"]
+        return
+
+    set_workout(plan_id, workout_ids)
+    st.session_state.workout_equipment = parse_plan_id(plan_id).equipment
+    reset_workout()
+
+
+def render_diagnostics():
+    """Render the hidden ?diagnostics=1 page (WORKOUT_DIAGNOSTICS=1 only): rerun timings and the Prometheus export."""
+    st.title("🩺 Diagnostics")
+
+    enabled = st.toggle("Collect rerun timings", value=instrumentation.is_enabled(),
+                        help="Applies to every session of this server process until it restarts.")
+    if enabled != instrumentation.is_enabled():
+        instrumentation.set_enabled(enabled)
+
+    snapshot = instrumentation.snapshot()
+    rows = []
+    for name, summary in snapshot.items():
+        if not summary['samples']:
+            continue
+        # Phases are in seconds, file counts are per rerun
+        unit, scale = ("count", 1) if name in ('file_opens', 'file_stats') else ("ms", 1000)
+        rows.append({'metric': name, 'unit': unit, 'samples': summary['samples'],
+                     **{stat: round(summary[stat] * scale, 2) for stat in ('mean', 'p50', 'p90', 'p99', 'max')}})
+    if rows:
+        st.caption(f"Over the last {instrumentation.WINDOW} samples of each metric in this process.")
+        st.dataframe(rows, hide_index=True)
+    else:
+        st.info("No reruns have been measured yet. Switch collection on and use the app in another tab.")
+
+    metrics = instrumentation.prometheus_text()
+    col1, col2 = st.columns(2)
+    with col1:
+        st.download_button("📥 Download Prometheus metrics", data=metrics, file_name="workout_metrics.prom",
+                           mime="text/plain")
+    with col2:
+        if st.button("🗑️ Reset"):
+            instrumentation.reset()
             st.rerun()
+    with st.expander("Prometheus text"):
+        st.code(metrics, language="text")
 
 
+@instrumentation.rerun()
 def main():
     """Main application function."""
     try:
+        with instrumentation.phase("css"):
+            st.markdown(CUSTOM_CSS, unsafe_allow_html=True)
         ensure_directories_exist()
         init_session_state()
-        exercises = load_all_exercises()
+        load_shared_plan()
+        with instrumentation.phase("count_exercises"):
+            exercise_count = count_exercises()
 
-        if not exercises:
+        if not exercise_count:
             st.error("No exercises could be loaded. Please check your setup.")
             return
 
@@ -383,75 +674,24 @@ def main():
                     unsafe_allow_html=True)
 
         # Analyze available options
-        available_equipment, available_focus_areas = analyze_exercises(exercises)
+        with instrumentation.phase("analyze_exercises"):
+            available_equipment, available_focus_areas = analyze_exercises()
 
         # Show available data summary
-        st.markdown(f"**Available:** {len(exercises)} exercises | "
+        st.markdown(f"**Available:** {exercise_count} exercises | "
                     f"Equipment: {', '.join(available_equipment)} | "
                     f"Focus Areas: {', '.join(available_focus_areas)}")
 
         # Workout generation controls
-        col1, col2, col3 = st.columns(3)
-
-        with col1:
-            equipment_options = ['all'] + available_equipment
-            equipment_labels = ['All Equipment'] + [eq.replace('_', ' ').title() for eq in available_equipment]
-            equipment = st.selectbox(
-                "🏋️ Equipment",
-                equipment_options,
-                format_func=lambda x: equipment_labels[equipment_options.index(x)]
-            )
-
-        with col2:
-            focus_options = ['all'] + available_focus_areas
-            focus_labels = ['All Areas'] + [fa.replace('_', ' ').title() for fa in available_focus_areas]
-            focus_area = st.selectbox(
-                "🎯 Focus Area",
-                focus_options,
-                format_func=lambda x: focus_labels[focus_options.index(x)]
-            )
-
-        with col3:
-            st.write("")  # Spacing
-            if st.button("🔄 Generate Workout", type="primary"):
-                new_workout = get_random_workout(equipment, focus_area)
-                if new_workout:
-                    st.session_state.workout = new_workout
-                    reset_workout()
-                    st.success(f"Generated workout with {len(new_workout)} exercises!")
-                    st.rerun()
-
-        # Settings
-        with st.expander("⚙️ Settings"):
-            show_details = st.checkbox("📋 Show Detailed Instructions", value=True)
-            show_images = st.checkbox("🖼️ Show Exercise Images", value=True)
-            auto_advance = st.checkbox("⏭️ Auto-advance to next exercise", value=True)
+        with instrumentation.phase("controls"):
+            render_controls(available_equipment, available_focus_areas)
 
         # Workout display
-        if st.session_state.workout:
+        if get_workout():
             st.markdown("---")
 
             # Workout summary
-            col1, col2, col3, col4 = st.columns(4)
-            with col1:
-                st.metric("💪 Exercises", len(st.session_state.workout))
-            with col2:
-                # Handle both duration formats for total time calculation
-                total_time = 0
-                for ex in st.session_state.workout:
-                    duration = ex.get('duration', 30)
-                    if isinstance(duration, str):
-                        total_time += int(duration.split()[0])
-                    else:
-                        total_time += duration
-                st.metric("⏱️ Total Time", format_time(total_time))
-            with col3:
-                equipment_display = equipment.replace('_', ' ').title() if equipment != 'all' else 'Mixed'
-                st.metric("🎯 Equipment", equipment_display)
-            with col4:
-                download_link = create_download_link(st.session_state.workout)
-                if download_link:
-                    st.markdown(download_link, unsafe_allow_html=True)
+            render_workout_summary()
 
             # Workout completed message
             if st.session_state.workout_completed:
@@ -459,7 +699,7 @@ def main():
                 <div class="workout-completed">
                     <h2>🎉 Workout Complete!</h2>
                     <p>Great job finishing your 10-minute workout!</p>
-                    <p>You've completed all {len(st.session_state.workout)} exercises. Keep up the great work!</p>
+                    <p>You've completed all {len(st.session_state.workout_ids)} exercises. Keep up the great work!</p>
                 </div>
                 """, unsafe_allow_html=True)
 
@@ -469,55 +709,7 @@ def main():
 
             # Timer and controls section
             elif st.session_state.workout_started:
-                st.markdown("### 🏃‍♀️ Workout Timer")
-
-                # Display timer
-                display_timer()
-
-                # Exercise info
-                current_exercise = st.session_state.workout[st.session_state.current_exercise]
-                st.markdown(
-                    f"**Exercise {st.session_state.current_exercise + 1} of {len(st.session_state.workout)}: {current_exercise['name']}**")
-
-                # Progress bar
-                progress = (st.session_state.current_exercise + 1) / len(st.session_state.workout)
-                st.progress(progress)
-
-                # Timer controls
-                col1, col2, col3, col4, col5 = st.columns(5)
-
-                with col1:
-                    if st.button("⏮️ Previous", disabled=st.session_state.current_exercise == 0):
-                        prev_exercise()
-                        st.rerun()
-
-                with col2:
-                    if st.session_state.is_paused or st.session_state.start_time is None:
-                        if st.button("▶️ Start/Resume"):
-                            resume_exercise()
-                            st.rerun()
-                    else:
-                        if st.button("⏸️ Pause"):
-                            pause_exercise()
-                            st.rerun()
-
-                with col3:
-                    if st.button("🔄 Reset Exercise"):
-                        st.session_state.start_time = None
-                        st.session_state.pause_time = 0
-                        st.session_state.is_paused = False
-                        st.rerun()
-
-                with col4:
-                    if st.button("⏭️ Next",
-                                 disabled=st.session_state.current_exercise >= len(st.session_state.workout) - 1):
-                        next_exercise()
-                        st.rerun()
-
-                with col5:
-                    if st.button("⏹️ Stop"):
-                        reset_workout()
-                        st.rerun()
+                render_timer()
 
             # Start workout button (when workout not started)
             else:
@@ -529,88 +721,14 @@ def main():
                         st.rerun()
 
             # Exercise cards
-            st.markdown("### 📋 Exercise Details")
-
-            for i, exercise in enumerate(st.session_state.workout):
-                # Determine card status
-                if i in st.session_state.exercise_completed:
-                    status = "completed"
-                    status_badge = '<span class="status-badge status-completed">✅ Completed</span>'
-                elif st.session_state.workout_started and i == st.session_state.current_exercise:
-                    status = "active"
-                    status_badge = '<span class="status-badge status-active">🏃‍♀️ Active</span>'
-                else:
-                    status = "upcoming"
-                    status_badge = '<span class="status-badge status-upcoming">⏳ Upcoming</span>'
-
-                card_class = "exercise-card current-exercise" if status == "active" else "exercise-card"
-
-                with st.container():
-                    st.markdown(f'<div class="{card_class}">', unsafe_allow_html=True)
-
-                    col1, col2 = st.columns([3, 1])
-                    with col1:
-                        st.markdown(f"**{i + 1}. {exercise['name']}**")
-                        st.markdown(status_badge, unsafe_allow_html=True)
-
-                        # Handle duration display
-                        duration = exercise.get('duration', 30)
-                        if isinstance(duration, str):
-                            duration_text = duration
-                        else:
-                            duration_text = f"{duration} seconds"
-                        st.markdown(f"⏱️ {duration_text}")
-
-                        # Display muscle tags
-                        muscles_html = "".join(
-                            [f'<span class="muscle-tag">{muscle}</span>' for muscle in
-                             exercise.get('muscles_worked', [])])
-                        st.markdown(muscles_html, unsafe_allow_html=True)
-
-                        st.markdown(f"*{exercise.get('description', 'No description available')}*")
-
-                        if show_details:
-                            st.markdown("**How to Perform:**")
-                            for j, instruction in enumerate(exercise.get('instructions', []), 1):
-                                st.markdown(f"{j}. {instruction}")
-
-                            st.markdown("**💡 Tips:**")
-                            for tip in exercise.get('tips', []):
-                                st.markdown(f"• {tip}")
-
-                    with col2:
-                        if show_images:
-                            image_path = ensure_image(exercise)
-                            if image_path and os.path.exists(image_path):
-                                st.image(image_path, width=200)
-                            else:
-                                st.markdown("🏋️‍♂️")  # Fallback emoji if no image
-
-                    st.markdown('</div>', unsafe_allow_html=True)
+            with instrumentation.phase("cards"):
+                render_exercise_cards()
 
         else:
             st.info("Click 'Generate Workout' to create your personalized 10-minute workout!")
 
         # Quick tips
-        st.markdown("---")
-        st.markdown("### 💡 Quick Tips")
-
-        col1, col2, col3 = st.columns(3)
-        with col1:
-            st.markdown('<div class="tip-box">', unsafe_allow_html=True)
-            st.markdown("**🌱 Beginner?** Start with bodyweight exercises and focus on form over speed.")
-            st.markdown('</div>', unsafe_allow_html=True)
-
-        with col2:
-            st.markdown('<div class="tip-box">', unsafe_allow_html=True)
-            st.markdown("**🔥 Advanced?** Try adding dumbbells or increase duration for more challenge.")
-            st.markdown('</div>', unsafe_allow_html=True)
-
-        with col3:
-            st.markdown('<div class="tip-box">', unsafe_allow_html=True)
-            st.markdown(
-                "**⏰ Time-based:** Perform each exercise for the suggested duration with 10-15 second rest between exercises.")
-            st.markdown('</div>', unsafe_allow_html=True)
+        render_tips()
 
     except Exception as e:
         st.error(f"An error occurred: {str(e)}")
@@ -618,4 +736,7 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    if instrumentation.DIAGNOSTICS_PAGE and st.query_params.get("diagnostics"):
+        render_diagnostics()
+    else:
+        main()
\ No newline at end of file
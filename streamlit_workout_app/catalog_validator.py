@@ -0,0 +1,262 @@
+import argparse
+import functools
+import json
+import multiprocessing
+import sys
+from collections import deque
+from itertools import islice
+from typing import Any, Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+from data_loader import (EXERCISES_FILE, PLACEHOLDER_IMAGE, get_image_index, normalize_exercise_name, parse_duration,
+                         resolve_image)
+from json_analyzer import EXPECTED_EQUIPMENT, EXPECTED_FOCUS, iter_catalog
+
+ERROR = "error"  # the record is rejected
+WARNING = "warning"  # the record is usable, but something is off
+
+
+class FieldSpec(NamedTuple):
+    """The schema of one exercise field."""
+    kind: type
+    required: bool = True
+    non_empty: bool = False
+    items: Optional[type] = None  # type of each item of a list
+    allowed: Optional[Tuple[str, ...]] = None
+
+
+EXERCISE_SCHEMA: Dict[str, FieldSpec] = {
+    'name': FieldSpec(str, non_empty=True),
+    'description': FieldSpec(str),
+    'instructions': FieldSpec(list, non_empty=True, items=str),
+    'tips': FieldSpec(list, required=False, items=str),
+    'muscles_worked': FieldSpec(list, non_empty=True, items=str),
+    'equipment': FieldSpec(str, allowed=EXPECTED_EQUIPMENT),
+    'focus_area': FieldSpec(str, allowed=EXPECTED_FOCUS),
+    'image': FieldSpec(str, required=False, non_empty=True),
+}
+
+
+class Rule(NamedTuple):
+    id: str
+    severity: str
+    description: str
+
+
+def schema_rules(schema: Optional[Dict[str, FieldSpec]] = None) -> Dict[str, Rule]:
+    """List every rule a schema checks, plus the record-level ones, by rule id."""
+    rules = [Rule("record.type", ERROR, "the entry is not a JSON object")]
+    for field, spec in (schema or EXERCISE_SCHEMA).items():
+        kind = "a list" if spec.kind is list else "a string"
+        if spec.required:
+            rules.append(Rule(f"{field}.required", ERROR, f"{field} is missing"))
+        rules.append(Rule(f"{field}.type", ERROR, f"{field} is not {kind}"))
+        if spec.non_empty:
+            rules.append(Rule(f"{field}.empty", ERROR, f"{field} is empty"))
+        if spec.items is not None:
+            rules.append(Rule(f"{field}.items", ERROR, f"{field} has items that are not strings"))
+        if spec.allowed is not None:
+            rules.append(Rule(f"{field}.enum", ERROR, f"{field} is not one of {', '.join(spec.allowed)}"))
+    rules += [
+        Rule("duration.format", ERROR, 'duration is not a positive whole number of seconds (45 or "45 seconds")'),
+        Rule("duration.missing", WARNING, "duration is missing, so the default is used"),
+        Rule("name.duplicate", ERROR, "an exercise accepted earlier in the catalog has the same name, ignoring case and punctuation"),
+        Rule("image.missing", WARNING, "no image was found, so the placeholder is shown"),
+    ]
+    return {rule.id: rule for rule in rules}
+
+
+def _field_check(field: str, spec: FieldSpec) -> Callable[[Dict[str, Any], List[str]], None]:
+    """Build the check of one field, with everything it needs bound up front."""
+    kind, required, non_empty, items, allowed = spec
+    allowed_set = frozenset(allowed) if allowed is not None else None
+    required_rule, type_rule = f"{field}.required", f"{field}.type"
+    empty_rule, items_rule, enum_rule = f"{field}.empty", f"{field}.items", f"{field}.enum"
+
+    def check(exercise: Dict[str, Any], failed: List[str]) -> None:
+        if field not in exercise:
+            if required:
+                failed.append(required_rule)
+            return
+        value = exercise[field]
+        if not isinstance(value, kind):
+            failed.append(type_rule)
+            return
+        if non_empty and not value:
+            failed.append(empty_rule)
+        if items is not None and not all(isinstance(item, items) for item in value):
+            failed.append(items_rule)
+        if allowed_set is not None and value not in allowed_set:
+            failed.append(enum_rule)
+
+    return check
+
+
+def compile_validator(schema: Optional[Dict[str, FieldSpec]] = None,
+                      check_images: bool = True) -> Callable[[Any], List[str]]:
+    """Compile a schema into one function giving the ids of the rules an exercise fails.
+
+    Each field check is built once with its rule ids and allowed values
+    already bound, so validating a record is a flat run over those checks.
+    Duplicate names span records and are found by validate_catalog().
+    With check_images, IMAGE_DIR is indexed once here, so images added
+    afterwards aren't seen by this validator.
+    """
+    checks = tuple(_field_check(field, spec) for field, spec in (schema or EXERCISE_SCHEMA).items())
+    image_index = get_image_index() if check_images else None
+
+    def validate(exercise: Any) -> List[str]:
+        if not isinstance(exercise, dict):
+            return ["record.type"]
+        failed: List[str] = []
+        for check in checks:
+            check(exercise, failed)
+        if 'duration' not in exercise:
+            failed.append("duration.missing")
+        elif parse_duration(exercise['duration']) is None:
+            failed.append("duration.format")
+        if (image_index is not None and isinstance(exercise.get('name'), str)
+                and isinstance(exercise.get('image', ""), str)
+                and resolve_image(image_index, exercise) == PLACEHOLDER_IMAGE):
+            failed.append("image.missing")
+        return failed
+
+    return validate
+
+
+@functools.lru_cache(maxsize=None)
+def _default_validator(check_images: bool) -> Callable[[Any], List[str]]:
+    """Get the validator for EXERCISE_SCHEMA, compiled once per process."""
+    return compile_validator(EXERCISE_SCHEMA, check_images)
+
+
+# (name key or None, the exercise's name for the report, failed rule ids) for each record of a chunk
+ChunkResult = List[Tuple[Optional[str], Any, List[str]]]
+
+
+def _validate_chunk(work: Tuple[List[Any], bool]) -> ChunkResult:
+    """Validate one chunk of records; runs in a worker process when there are several."""
+    records, check_images = work
+    validate = _default_validator(check_images)
+    results = []
+    for exercise in records:
+        name = exercise.get('name') if isinstance(exercise, dict) else None
+        key = normalize_exercise_name(name) if isinstance(name, str) and name else None
+        results.append((key, name, validate(exercise)))
+    return results
+
+
+def _chunks(items: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    iterator = iter(items)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _ordered_results(pool: Any, chunks: Iterable[Any], window: int) -> Iterator[ChunkResult]:
+    """Validate chunks on a pool in catalog order, with at most window chunks read ahead.
+
+    Unlike Pool.imap, this doesn't read the whole input into the task queue
+    when the workers fall behind the file.
+    """
+    pending: deque = deque()
+    for chunk in chunks:
+        pending.append(pool.apply_async(_validate_chunk, (chunk,)))
+        if len(pending) >= window:
+            yield pending.popleft().get()
+    while pending:
+        yield pending.popleft().get()
+
+
+def validate_catalog(path: Optional[str] = None, workers: int = 1, chunk_size: int = 5000,
+                     check_images: bool = True) -> Dict[str, Any]:
+    """Validate every exercise of a catalog file and report what failed which rule.
+
+    The file is streamed in chunks of chunk_size records; with workers > 1,
+    chunks are validated across a process pool and their results merged in
+    catalog order, so the first of several same-named exercises is the one
+    kept. The report counts every rule and lists each record with an issue
+    by its position in the catalog; records failing an error rule are the
+    rejected ones.
+    """
+    path = path or EXERCISES_FILE
+    rules = schema_rules()
+    counts = dict.fromkeys(rules, 0)
+    seen_names = set()
+    issues = []
+    records = rejected = 0
+
+    with open(path, 'r', encoding='utf-8') as f:
+        work = ((chunk, check_images) for chunk in _chunks(iter_catalog(f), chunk_size))
+        pool = multiprocessing.Pool(workers) if workers > 1 else None
+        try:
+            results = _ordered_results(pool, work, 2 * workers) if pool is not None else map(_validate_chunk, work)
+            for chunk_results in results:
+                for key, name, failed in chunk_results:
+                    is_rejected = any(rules[rule_id].severity == ERROR for rule_id in failed)
+                    # A rejected record doesn't claim its name, so a valid one later on is kept
+                    if key is not None and not is_rejected:
+                        if key in seen_names:
+                            failed.append("name.duplicate")
+                            is_rejected = True
+                        else:
+                            seen_names.add(key)
+                    if failed:
+                        rejected += is_rejected
+                        for rule_id in failed:
+                            counts[rule_id] += 1
+                        issues.append({'index': records, 'name': name, 'rejected': is_rejected, 'rules': failed})
+                    records += 1
+        finally:
+            if pool is not None:
+                pool.terminate()
+
+    return {
+        'catalog': path,
+        'records': records,
+        'accepted': records - rejected,
+        'rejected': rejected,
+        'rules': {rule_id: {'severity': rule.severity, 'description': rule.description, 'count': counts[rule_id]}
+                  for rule_id, rule in rules.items()},
+        'issues': issues,
+    }
+
+
+def format_summary(report: Dict[str, Any]) -> str:
+    """Summarise a report as plain text: totals and the rules that fired."""
+    lines = [f"{report['records']} records: {report['accepted']} accepted, {report['rejected']} rejected"]
+    for rule_id, rule in report['rules'].items():
+        if rule['count']:
+            lines.append(f"  {rule['severity']:<7}  {rule_id:<22} {rule['count']:>8}  {rule['description']}")
+    return "\n".join(lines)
+
+
+def main():
+    """Validate a catalog from the command line; exits with 1 if any record is rejected."""
+    parser = argparse.ArgumentParser(description="Validate an exercise catalog against the full schema.")
+    parser.add_argument("path", nargs='?', default=EXERCISES_FILE, help="Catalog JSON file.")
+    parser.add_argument("--workers", type=int, default=1, help="Worker processes.")
+    parser.add_argument("--chunk-size", type=int, default=5000, help="Records per work unit.")
+    parser.add_argument("--no-images", action="store_true", help="Skip the image availability check.")
+    parser.add_argument("--output", default="-", help="Where to write the JSON report.")
+    args = parser.parse_args()
+
+    try:
+        report = validate_catalog(args.path, args.workers, args.chunk_size, not args.no_images)
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(2)
+
+    if args.output == "-":
+        json.dump(report, sys.stdout, ensure_ascii=False, indent=2)
+        print()
+    else:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    print(format_summary(report), file=sys.stderr)
+    sys.exit(1 if report['rejected'] else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,29 @@
+import argparse
+import bisect
+import difflib
+import functools
+import hashlib
 import json
+import multiprocessing
 import os
+import sys
 import random
-from typing import List, Dict, Any
+import re
+import sqlite3
+import tempfile
+import threading
+import urllib.parse
+from collections import OrderedDict
+from collections.abc import Mapping
+from contextlib import contextmanager
+from typing import (List, Dict, Any, Callable, Iterable, Iterator, NamedTuple, Optional, Sequence, Set,
+                    TextIO, Tuple, Union)
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
 
 # Correctly locate the project root to access top-level directories
 PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
@@ -9,22 +31,258 @@ EXERCISES_FILE = os.path.join(PROJECT_ROOT, "streamlit_workout_app", "exercises.
 IMAGE_DIR = os.path.join(PROJECT_ROOT, "images")
 PLACEHOLDER_IMAGE = os.path.join(IMAGE_DIR, "placeholder.png")
 
+# Storage backend: "json" (EXERCISES_FILE, the default) or "sqlite" (SQLITE_FILE)
+STORAGE_BACKENDS = ("json", "sqlite")
+STORAGE_BACKEND = os.environ.get("WORKOUT_STORAGE_BACKEND", "json")
+SQLITE_FILE = os.environ.get("WORKOUT_SQLITE_FILE",
+                             os.path.join(PROJECT_ROOT, "streamlit_workout_app", "exercises.db"))
+
+# New exercises are appended to "<catalog>.journal" (JSON Lines) and folded
+# into the catalog file once this many entries have accumulated
+JOURNAL_COMPACT_THRESHOLD = 50
+
+
+# A facet filter: "all"/None for no filter, one value, or several values OR'ed together
+FacetFilter = Union[None, str, Iterable[str]]
+
+DEFAULT_DURATION = 30
+
+# compose_workout() fills the time exactly while distinct durations x budget seconds stays under
+# COMPOSE_EXACT_CELLS; beyond that it draws at least COMPOSE_MIN_EXERCISES (when short enough ones
+# exist) and spends at most COMPOSE_REPAIR_ROUNDS add/swap steps closing the gap to the target
+COMPOSE_EXACT_CELLS = 20000
+COMPOSE_MIN_EXERCISES = 4
+COMPOSE_REPAIR_ROUNDS = 64
+
+
+def parse_duration(duration: Any) -> Optional[int]:
+    """Parse a duration given as 45, 45.0, "45" or "45 seconds" into seconds, or None if it isn't one."""
+    if isinstance(duration, str):
+        try:
+            duration = int(duration.split()[0])
+        except (IndexError, ValueError):
+            return None
+    elif isinstance(duration, float) and duration.is_integer():
+        duration = int(duration)
+    if isinstance(duration, bool) or not isinstance(duration, int) or duration <= 0:
+        return None
+    return duration
+
+
+@functools.lru_cache(maxsize=None)
+def _display_label(value: str) -> str:
+    """Get the display form of a facet value, shared by every exercise carrying it."""
+    return sys.intern(value.replace('_', ' ').title())
+
+
+class Exercise(Mapping):
+    """An exercise normalized once at load time; immutable and shared between sessions.
+
+    duration is whole seconds, facet values and muscles are interned, and
+    the strings the app displays are precomputed. Records still read like
+    the JSON dicts they came from (exercise['name'], exercise.get('tips')),
+    so dict(exercise) gives the catalog form back.
+    """
+    __slots__ = ('name', 'description', 'instructions', 'tips', 'muscles_worked', 'equipment', 'focus_area',
+                 'duration', 'image', 'extra', 'duration_text', 'equipment_label', 'focus_label', 'muscles_text')
+
+    _FIELDS = ('name', 'description', 'instructions', 'tips', 'muscles_worked', 'equipment', 'focus_area',
+               'duration', 'image')
+
+    def __init__(self, name: str, description: str, instructions: Tuple[str, ...], tips: Tuple[str, ...],
+                 muscles_worked: Tuple[str, ...], equipment: str, focus_area: str, duration: int,
+                 image: Optional[str] = None, extra: Optional[Dict[str, Any]] = None):
+        values = {
+            'name': name,
+            'description': description,
+            'instructions': tuple(instructions),
+            'tips': tuple(tips),
+            'muscles_worked': tuple(sys.intern(muscle) for muscle in muscles_worked),
+            'equipment': sys.intern(equipment),
+            'focus_area': sys.intern(focus_area),
+            'duration': duration,
+            'image': image,
+            'extra': extra or None,
+            'duration_text': f"{duration} seconds",
+            'equipment_label': _display_label(equipment),
+            'focus_label': _display_label(focus_area),
+        }
+        values['muscles_text'] = ", ".join(values['muscles_worked'])
+        for field, value in values.items():
+            object.__setattr__(self, field, value)
+
+    @classmethod
+    def from_dict(cls, exercise: Dict[str, Any]) -> "Exercise":
+        """Normalize a validated exercise dict; a bad or missing duration becomes DEFAULT_DURATION."""
+        if isinstance(exercise, cls):
+            return exercise
+        tips = exercise.get('tips', [])
+        return cls(
+            name=exercise['name'],
+            description=str(exercise.get('description', '')),
+            instructions=tuple(str(instruction) for instruction in exercise.get('instructions', [])),
+            tips=tuple(str(tip) for tip in tips) if isinstance(tips, list) else (),
+            muscles_worked=tuple(muscle for muscle in exercise.get('muscles_worked', []) if isinstance(muscle, str)),
+            equipment=str(exercise.get('equipment', '')),
+            focus_area=str(exercise.get('focus_area', '')),
+            duration=parse_duration(exercise.get('duration', DEFAULT_DURATION)) or DEFAULT_DURATION,
+            image=exercise.get('image') or None,
+            extra={key: value for key, value in exercise.items() if key not in cls._FIELDS},
+        )
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        raise AttributeError("Exercise records are immutable")
+
+    def __delattr__(self, name: str) -> None:
+        raise AttributeError("Exercise records are immutable")
+
+    def __reduce__(self):
+        return (self.__class__, tuple(getattr(self, field) for field in self._FIELDS) + (self.extra,))
+
+    def __getitem__(self, key: str) -> Any:
+        if key in self._FIELDS:
+            value = getattr(self, key)
+            if value is not None:
+                return list(value) if isinstance(value, tuple) else value
+        elif self.extra and key in self.extra:
+            return self.extra[key]
+        raise KeyError(key)
+
+    def __iter__(self) -> Iterator[str]:
+        for field in self._FIELDS:
+            if getattr(self, field) is not None:
+                yield field
+        if self.extra:
+            yield from self.extra
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def __repr__(self) -> str:
+        return f"Exercise({self.name!r})"
+
+
+def normalize_exercise(exercise: Dict[str, Any], source: str = "catalog") -> Exercise:
+    """Turn a validated exercise dict into a record, reporting a bad duration once, here."""
+    if 'duration' in exercise and parse_duration(exercise['duration']) is None:
+        print(f"Warning: Invalid duration {exercise['duration']!r} for {exercise['name']} in {source}; "
+              f"using {DEFAULT_DURATION} seconds")
+    return Exercise.from_dict(exercise)
+
+
+class CatalogIndex(NamedTuple):
+    """Facet posting lists for one catalog version.
+
+    Postings map each facet value to the ascending exercise ids (positions
+    in the snapshot's exercise tuple) carrying that value. Names are indexed
+    case-folded for exact lookup and normalized for punctuation-insensitive
+    and prefix lookup.
+
+    The postings, name lookups and durations are append-only and shared by
+    every index extended from the same build (see extend_catalog_index()),
+    so an index only sees the ids below its own size.
+    """
+    size: int
+    equipment: Dict[str, List[int]]
+    focus_area: Dict[str, List[int]]
+    muscles: Dict[str, List[int]]
+    equipment_types: Tuple[str, ...]
+    focus_areas: Tuple[str, ...]
+    muscle_names: Tuple[str, ...]
+    names: Dict[str, int]
+    normalized_names: Dict[str, List[int]]
+    sorted_names: List[str]  # sorted normalized names, for prefix lookup
+    durations: List[int]  # duration in seconds, by exercise id
+
+
+# (mtime_ns, size) of the catalog file and of its journal, None for a missing file
+CatalogSignature = Tuple[Optional[Tuple[int, int]], Optional[Tuple[int, int]]]
+
+
+class CatalogSnapshot(NamedTuple):
+    """Immutable view of the exercise catalog (file plus journal) at one version."""
+    path: str
+    signature: CatalogSignature
+    exercises: Sequence[Exercise]  # a tuple, or for SQLite the rows fetched by id (see _SqliteRecords)
+    index: CatalogIndex
+    journal_entries: int
+    # Exercises read from the catalog file itself; None if it couldn't be read and the fallback is in use
+    file_exercises: Optional[int]
+    content_digest: Any  # running sha256 over the exercises, see catalog_version()
+    # Catalog versions whose exercises this snapshot starts with (this one included) -> their exercise count
+    versions: Dict[str, int]
+
+
+# Catalog versions remembered per snapshot, one per exercise appended, so plans made before them stay resolvable
+MAX_TRACKED_VERSIONS = 1024
+
+# Process-wide catalog cache shared by every Streamlit session
+_catalog_cache: Dict[str, CatalogSnapshot] = {}
+_catalog_lock = threading.Lock()
+_catalog_stats = {'hits': 0, 'misses': 0, 'reloads': 0}
+
+
+# Called before each file stat a rerun makes here (catalog and image lookups); app.py counts them with it
+_stat_hook: Optional[Callable[[], None]] = None
+
+
+def set_stat_hook(hook: Optional[Callable[[], None]]) -> None:
+    """Have hook called before every catalog or image file stat, or stop with None."""
+    global _stat_hook
+    _stat_hook = hook
+
+
+def _stat(path: str) -> os.stat_result:
+    if _stat_hook is not None:
+        _stat_hook()
+    return os.stat(path)
+
+
+def _path_exists(path: str) -> bool:
+    if _stat_hook is not None:
+        _stat_hook()
+    return os.path.exists(path)
+
+
+def _file_signature(path: str) -> Optional[Tuple[int, int]]:
+    """Return (mtime_ns, size) for a file, or None if it cannot be stat'ed."""
+    try:
+        stat = _stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def get_journal_path(path: Optional[str] = None) -> str:
+    """Get the path of the append-only journal for a catalog file."""
+    return (path or EXERCISES_FILE) + ".journal"
+
 
-def load_all_exercises() -> List[Dict[str, Any]]:
-    """Load all exercises from the JSON file with error handling."""
+def _catalog_signature(path: str) -> CatalogSignature:
+    """Return the combined signature of a catalog file and its journal."""
+    return _file_signature(path), _file_signature(get_journal_path(path))
+
+
+def _fallback_records() -> List[Exercise]:
+    """Get the fallback exercises as records."""
+    return [Exercise.from_dict(exercise) for exercise in get_fallback_exercises()]
+
+
+def _read_exercises_file(path: str) -> Optional[List[Exercise]]:
+    """Parse and validate the exercises file at path, or None if it can't be read."""
     try:
-        if not os.path.exists(EXERCISES_FILE):
-            print(f"Warning: {EXERCISES_FILE} not found. Using fallback exercises.")
-            return get_fallback_exercises()
+        if not os.path.exists(path):
+            print(f"Warning: {path} not found. Using fallback exercises.")
+            return None
 
-        with open(EXERCISES_FILE, 'r', encoding='utf-8') as f:
+        with open(path, 'r', encoding='utf-8') as f:
             exercises = json.load(f)
 
         # Validate exercise data structure
         validated_exercises = []
         for exercise in exercises:
             if validate_exercise(exercise):
-                validated_exercises.append(exercise)
+                validated_exercises.append(normalize_exercise(exercise, path))
             else:
                 print(f"Warning: Invalid exercise data for {exercise.get('name', 'unknown')}")
 
@@ -32,10 +290,379 @@ def load_all_exercises() -> List[Dict[str, Any]]:
 
     except json.JSONDecodeError as e:
         print(f"Error parsing JSON file: {e}")
-        return get_fallback_exercises()
+        return None
     except Exception as e:
         print(f"Error loading exercises: {e}")
-        return get_fallback_exercises()
+        return None
+
+
+def _read_journal_entries(path: str) -> List[Dict[str, Any]]:
+    """Read valid exercises from a catalog's journal as written, skipping torn or bad lines."""
+    journal_path = get_journal_path(path)
+    entries = []
+    try:
+        with open(journal_path, 'r', encoding='utf-8') as f:
+            for line_number, line in enumerate(f, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    exercise = json.loads(line)
+                except json.JSONDecodeError:
+                    # Most likely a write interrupted by a crash
+                    print(f"Warning: Skipping unreadable line {line_number} in {journal_path}")
+                    continue
+                if isinstance(exercise, dict) and validate_exercise(exercise):
+                    entries.append(exercise)
+                else:
+                    print(f"Warning: Invalid journal entry on line {line_number} in {journal_path}")
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        print(f"Error reading journal {journal_path}: {e}")
+    return entries
+
+
+def _read_journal(path: str) -> List[Exercise]:
+    """Read valid exercises from a catalog's journal as records."""
+    journal_path = get_journal_path(path)
+    return [normalize_exercise(exercise, journal_path) for exercise in _read_journal_entries(path)]
+
+
+def _split_new_exercises(index: CatalogIndex, exercises: Iterable[Dict[str, Any]]
+                         ) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """Split exercises into (new, duplicates) by normalized name, within the batch too."""
+    new_exercises = []
+    duplicates = []
+    seen = set()
+    for exercise in exercises:
+        key = normalize_exercise_name(exercise['name'])
+        if key in seen or find_exercise_ids_by_name(index, key, normalized=True):
+            duplicates.append(exercise)
+        else:
+            seen.add(key)
+            new_exercises.append(exercise)
+    return new_exercises, duplicates
+
+
+def _update_digest(digest: Any, exercise: Dict[str, Any]) -> None:
+    """Add one exercise, in canonical JSON form, to a sha256 digest."""
+    digest.update(json.dumps(exercise, sort_keys=True, ensure_ascii=False, default=dict).encode('utf-8'))
+    digest.update(b"\n")
+
+
+def _extend_digest(digest: Any, exercises: Iterable[Dict[str, Any]]) -> Any:
+    """Return a copy of a sha256 digest updated with exercises in canonical JSON form."""
+    digest = digest.copy()
+    for exercise in exercises:
+        _update_digest(digest, exercise)
+    return digest
+
+
+def _append_versions(digest: Any, versions: Dict[str, int], exercises: Iterable[Dict[str, Any]], count: int
+                     ) -> Tuple[Any, Dict[str, int]]:
+    """Extend a copy of digest (over count exercises) with exercises, noting the version after each one.
+
+    Returns the new digest and a copy of versions with those versions, and
+    the final one, added; only the newest MAX_TRACKED_VERSIONS are kept.
+    """
+    digest = digest.copy()
+    versions = dict(versions)
+    for exercise in exercises:
+        _update_digest(digest, exercise)
+        count += 1
+        versions[digest.hexdigest()[:12]] = count
+    versions[digest.hexdigest()[:12]] = count
+    while len(versions) > MAX_TRACKED_VERSIONS:
+        del versions[next(iter(versions))]
+    return digest, versions
+
+
+def _digest_exercises(exercises: Sequence[Exercise]) -> Tuple[Any, Dict[str, int]]:
+    """Digest a catalog, with the versions of its last MAX_TRACKED_VERSIONS prefixes.
+
+    Appends never move existing exercises, so ids from a plan made when the
+    catalog was one of those prefixes still point at the same records; a
+    rewrite that moves them changes the prefix digests. The versions depend
+    only on the content, so a plan resolves alike in every process.
+    """
+    start = max(0, len(exercises) - MAX_TRACKED_VERSIONS)
+    return _append_versions(_extend_digest(hashlib.sha256(), exercises[:start]), {}, exercises[start:], start)
+
+
+def _load_snapshot(path: str, signature: CatalogSignature) -> CatalogSnapshot:
+    """Parse a catalog file and replay its journal on top."""
+    file_exercises = _read_exercises_file(path)
+    exercises = tuple(_fallback_records() if file_exercises is None else file_exercises)
+    index = build_catalog_index(exercises)
+
+    # Entries already in the file were compacted just before a crash; skip them
+    journal = _read_journal(path)
+    replayed, _ = _split_new_exercises(index, journal)
+
+    exercises += tuple(replayed)
+    return CatalogSnapshot(path, signature, exercises, extend_catalog_index(index, replayed), len(journal),
+                           None if file_exercises is None else len(file_exercises),
+                           *_digest_exercises(exercises))
+
+
+def get_catalog_snapshot(path: Optional[str] = None) -> CatalogSnapshot:
+    """Return the cached catalog snapshot, reloading only if the file changed."""
+    path = path or EXERCISES_FILE
+    return _cached_snapshot(path, _catalog_signature(path), _load_snapshot)
+
+
+def _cached_snapshot(path: str, signature: CatalogSignature,
+                     load: Callable[[str, CatalogSignature], CatalogSnapshot]
+                     ) -> CatalogSnapshot:
+    """Return the cached snapshot for path if its signature still matches, else load and cache it."""
+    with _catalog_lock:
+        cached = _catalog_cache.get(path)
+        if cached is not None and cached.signature == signature:
+            _catalog_stats['hits'] += 1
+            return cached
+
+        if cached is None:
+            _catalog_stats['misses'] += 1
+        else:
+            _catalog_stats['reloads'] += 1
+
+        # Parse under the lock so concurrent sessions don't all re-read the same change
+        snapshot = load(path, signature)
+        _catalog_cache[path] = snapshot
+        return snapshot
+
+
+def get_catalog_cache_stats() -> Dict[str, int]:
+    """Get hit/miss/reload counters for the catalog cache."""
+    with _catalog_lock:
+        stats = dict(_catalog_stats)
+        stats['cached_files'] = len(_catalog_cache)
+    return stats
+
+
+def clear_catalog_cache(path: Optional[str] = None) -> None:
+    """Drop cached catalog snapshots (all of them, or just the one for path)."""
+    with _catalog_lock:
+        if path is None:
+            _catalog_cache.clear()
+        else:
+            _catalog_cache.pop(path, None)
+
+
+def get_catalog_index(path: Optional[str] = None) -> CatalogIndex:
+    """Get the facet index for the current catalog version."""
+    return get_catalog_snapshot(path).index
+
+
+def exercise_duration_seconds(exercise: Dict[str, Any], default: int = DEFAULT_DURATION) -> int:
+    """Get an exercise's duration in seconds, from a record or a dict with 45 or "45 seconds"."""
+    if isinstance(exercise, Exercise):
+        return exercise.duration
+    return parse_duration(exercise.get('duration', default)) or default
+
+
+def normalize_exercise_name(name: str) -> str:
+    """Normalize a name for matching: case-folded, punctuation and hyphens as single spaces."""
+    return re.sub(r'[\W_]+', ' ', name.casefold()).strip()
+
+
+def _visible(ids: List[int], size: int) -> List[int]:
+    """Get the ids of a shared posting that belong to an index of size exercises (don't modify the result)."""
+    if not ids or ids[-1] < size:
+        return ids
+    return ids[:bisect.bisect_left(ids, size)]
+
+
+def _copy_index(index: CatalogIndex) -> CatalogIndex:
+    """Copy an index's structures, without the ids later indexes appended to them."""
+    size = index.size
+
+    def postings(shared: Dict[str, List[int]]) -> Dict[str, List[int]]:
+        return {key: list(_visible(ids, size)) for key, ids in shared.items() if ids[0] < size}
+
+    normalized_names = postings(index.normalized_names)
+    return index._replace(
+        equipment=postings(index.equipment),
+        focus_area=postings(index.focus_area),
+        muscles=postings(index.muscles),
+        names={name: exercise_id for name, exercise_id in index.names.items() if exercise_id < size},
+        normalized_names=normalized_names,
+        sorted_names=[key for key in index.sorted_names if key in normalized_names],
+        durations=index.durations[:size],
+    )
+
+
+def _add_posting(postings: Dict[str, List[int]], key: str, exercise_id: int) -> bool:
+    """Append exercise_id to the posting for key; True if key is new."""
+    ids = postings.get(key)
+    if ids is None:
+        postings[key] = [exercise_id]
+        return True
+    if ids[-1] != exercise_id:  # a muscle listed twice
+        ids.append(exercise_id)
+    return False
+
+
+def extend_catalog_index(index: CatalogIndex, exercises: Iterable[Exercise]) -> CatalogIndex:
+    """Return a new index with exercises appended after the ones already indexed.
+
+    The new exercises are appended to index's structures in place, so this
+    costs time in proportion to them, not to the catalog. index itself is
+    unchanged, as it only sees ids below its size. Extending an index that
+    was already extended copies its structures first.
+    """
+    if len(index.durations) != index.size:
+        index = _copy_index(index)
+    equipment, focus_area, muscles = index.equipment, index.focus_area, index.muscles
+    names, normalized_names, durations = index.names, index.normalized_names, index.durations
+    new_facets = False
+    new_keys = []
+    size = index.size
+
+    for exercise in exercises:
+        exercise_id = size
+        size += 1
+
+        if exercise.equipment:
+            new_facets |= _add_posting(equipment, exercise.equipment, exercise_id)
+
+        if exercise.focus_area:
+            new_facets |= _add_posting(focus_area, exercise.focus_area, exercise_id)
+
+        for muscle in exercise.muscles_worked:
+            new_facets |= _add_posting(muscles, muscle, exercise_id)
+
+        name = exercise.name
+        if name:
+            names.setdefault(name.casefold(), exercise_id)
+            key = normalize_exercise_name(name)
+            if _add_posting(normalized_names, key, exercise_id):
+                new_keys.append(key)
+
+        # Appended last: an index is only extended from the newest one when its size matches this length
+        durations.append(exercise.duration)
+
+    sorted_names = index.sorted_names
+    if len(new_keys) <= 16:
+        for key in new_keys:
+            bisect.insort(sorted_names, key)
+    else:
+        # Sorting a sorted run plus the new keys costs little more than sorting the new keys
+        sorted_names.extend(new_keys)
+        sorted_names.sort()
+
+    if new_facets:
+        index = index._replace(equipment_types=tuple(sorted(equipment)), focus_areas=tuple(sorted(focus_area)),
+                               muscle_names=tuple(sorted(muscles)))
+    return index._replace(size=size)
+
+
+def build_catalog_index(exercises: Iterable[Exercise]) -> CatalogIndex:
+    """Build facet postings and name lookups in a single pass."""
+    return extend_catalog_index(CatalogIndex(0, {}, {}, {}, (), (), (), {}, {}, [], []), exercises)
+
+
+def find_exercise_ids_by_name(index: CatalogIndex, name: str, normalized: bool = False) -> List[int]:
+    """Resolve a name to exercise ids, exactly (case-insensitive) or normalized."""
+    if not normalized:
+        exercise_id = index.names.get(name.casefold())
+        return [] if exercise_id is None or exercise_id >= index.size else [exercise_id]
+    return list(_visible(index.normalized_names.get(normalize_exercise_name(name), []), index.size))
+
+
+def find_exercise_ids_by_prefix(index: CatalogIndex, prefix: str, limit: int = 10) -> List[int]:
+    """Get ids of exercises whose normalized name starts with the normalized prefix."""
+    prefix = normalize_exercise_name(prefix)
+    ids: List[int] = []
+    position = bisect.bisect_left(index.sorted_names, prefix)
+    while position < len(index.sorted_names) and len(ids) < limit:
+        key = index.sorted_names[position]
+        if not key.startswith(prefix):
+            break
+        ids.extend(_visible(index.normalized_names[key], index.size))
+        position += 1
+    return ids[:limit]
+
+
+def _facet_ids(postings: Dict[str, List[int]], values: FacetFilter, size: int) -> Optional[Set[int]]:
+    """Union the postings for the requested facet values, or None for no filter.
+
+    Only ids below size are included, as seen by an index of that size.
+    """
+    if values is None or values == "all":
+        return None
+    if isinstance(values, str):
+        values = [values]
+
+    ids: Set[int] = set()
+    for value in values:
+        ids.update(_visible(postings.get(value, []), size))
+    return ids
+
+
+def query_exercise_ids(index: CatalogIndex, equipment: FacetFilter = "all", focus_area: FacetFilter = "all",
+                       muscles: FacetFilter = None, match_all_muscles: bool = False) -> List[int]:
+    """Resolve a multi-facet query to sorted exercise ids.
+
+    Values within one facet are OR'ed; facets are AND'ed together. With
+    match_all_muscles every listed muscle must be worked by the exercise.
+    """
+    candidates = []
+    for postings, values in ((index.equipment, equipment), (index.focus_area, focus_area)):
+        ids = _facet_ids(postings, values, index.size)
+        if ids is not None:
+            candidates.append(ids)
+
+    if match_all_muscles and muscles is not None and muscles != "all":
+        muscle_list = [muscles] if isinstance(muscles, str) else list(muscles)
+        candidates.extend(_facet_ids(index.muscles, muscle, index.size) for muscle in muscle_list)
+    else:
+        ids = _facet_ids(index.muscles, muscles, index.size)
+        if ids is not None:
+            candidates.append(ids)
+
+    if not candidates:
+        return list(range(index.size))
+
+    # Intersect smallest posting first so the working set only shrinks
+    candidates.sort(key=len)
+    result = set(candidates[0])
+    for ids in candidates[1:]:
+        if not result:
+            break
+        result &= ids
+
+    return sorted(result)
+
+
+def query_exercises(equipment: FacetFilter = "all", focus_area: FacetFilter = "all", muscles: FacetFilter = None,
+                    match_all_muscles: bool = False) -> List[Exercise]:
+    """Get exercises matching a multi-facet equipment / focus area / muscle query."""
+    if STORAGE_BACKEND == "sqlite":
+        return _sqlite_query_exercises(equipment, focus_area, muscles, match_all_muscles)
+
+    snapshot = get_catalog_snapshot()
+    ids = query_exercise_ids(snapshot.index, equipment, focus_area, muscles, match_all_muscles)
+    return [snapshot.exercises[exercise_id] for exercise_id in ids]
+
+
+def count_exercises() -> int:
+    """Get the number of exercises in the catalog without reading them."""
+    if STORAGE_BACKEND == "sqlite":
+        return _sqlite_connection().execute("SELECT COUNT(*) FROM exercises").fetchone()[0]
+    return get_catalog_snapshot().index.size
+
+
+def load_all_exercises() -> List[Exercise]:
+    """Load all exercises, served from the shared catalog cache.
+
+    The returned list is a fresh copy of immutable Exercise records that
+    are shared between callers.
+    """
+    if STORAGE_BACKEND == "sqlite":
+        return _sqlite_query_exercises()
+    return list(get_catalog_snapshot().exercises)
 
 
 def validate_exercise(exercise: Dict[str, Any]) -> bool:
@@ -119,104 +746,617 @@ def get_fallback_exercises() -> List[Dict[str, Any]]:
     ]
 
 
-def get_exercises(equipment: str = "all", focus_area: str = "all") -> List[Dict[str, Any]]:
+def get_exercises(equipment: str = "all", focus_area: str = "all") -> List[Exercise]:
     """Get filtered exercises based on equipment and focus area."""
-    all_exercises = load_all_exercises()
+    return query_exercises(equipment, focus_area)
 
-    filtered_exercises = []
-    for exercise in all_exercises:
-        equipment_match = (equipment == "all" or exercise.get("equipment") == equipment)
-        focus_match = (focus_area == "all" or exercise.get("focus_area") == focus_area)
 
-        if equipment_match and focus_match:
-            filtered_exercises.append(exercise)
+def _pick_workout_ids(eligible_ids: List[int], rng: Optional[random.Random] = None) -> List[int]:
+    """Pick 4-6 exercise ids from the eligible ones."""
+    # Ensure we have at least some exercises
+    if len(eligible_ids) < 4:
+        return eligible_ids
 
-    return filtered_exercises
+    # Return 4-6 exercises for optimal 10-minute workout
+    workout_size = min(6, len(eligible_ids))
+    workout_size = max(4, workout_size)  # Ensure at least 4 exercises
 
+    return (rng or random).sample(eligible_ids, workout_size)
 
-def get_random_workout(equipment: str = "all", focus_area: str = "all") -> List[Dict[str, Any]]:
-    """Generate a random workout with 4-6 exercises."""
-    eligible_exercises = get_exercises(equipment, focus_area)
 
-    if not eligible_exercises:
-        # If no exercises match criteria, return all exercises
-        eligible_exercises = load_all_exercises()
+def get_random_workout(equipment: str = "all", focus_area: str = "all",
+                       seed: Optional[int] = None) -> List[Exercise]:
+    """Generate a random workout with 4-6 exercises.
 
-    # Ensure we have at least some exercises
-    if len(eligible_exercises) < 4:
-        return eligible_exercises
+    With a seed the same catalog version always yields the same workout.
+    """
+    rng = random.Random(seed) if seed is not None else None
+    if STORAGE_BACKEND == "sqlite":
+        return _sqlite_random_workout(equipment, focus_area, rng)
 
-    # Return 4-6 exercises for optimal 10-minute workout
-    workout_size = min(6, len(eligible_exercises))
-    workout_size = max(4, workout_size)  # Ensure at least 4 exercises
+    snapshot = get_catalog_snapshot()
+    return [snapshot.exercises[exercise_id]
+            for exercise_id in _random_workout_ids(snapshot.index, equipment, focus_area, rng)]
 
-    return random.sample(eligible_exercises, workout_size)
 
+def _random_workout_ids(index: CatalogIndex, equipment: FacetFilter, focus_area: FacetFilter,
+                        rng: Optional[random.Random] = None) -> List[int]:
+    """Pick the exercise ids of a random workout from the index."""
+    eligible_ids = query_exercise_ids(index, equipment, focus_area)
+
+    if not eligible_ids:
+        # If no exercises match criteria, return all exercises
+        eligible_ids = list(range(index.size))
+
+    return _pick_workout_ids(eligible_ids, rng)
+
+
+def _active_snapshot() -> CatalogSnapshot:
+    """Get the shared catalog snapshot of the active backend."""
+    if STORAGE_BACKEND == "sqlite":
+        return _sqlite_snapshot()
+    return get_catalog_snapshot()
+
+
+def _load_catalog() -> Tuple[Tuple[Exercise, ...], CatalogIndex]:
+    """Get every exercise plus its index from the active backend, for in-memory planning."""
+    snapshot = _active_snapshot()
+    return snapshot.exercises, snapshot.index
+
+
+def _take_exercise(by_duration: Dict[int, List[int]], duration: int, rng: Any) -> int:
+    """Remove and return a random unused exercise id of the given duration."""
+    ids = by_duration[duration]
+    position = rng.randrange(len(ids))
+    ids[position], ids[-1] = ids[-1], ids[position]
+    return ids.pop()
+
+
+def _longest_fitting(durations: List[int], by_duration: Dict[int, List[int]], limit: int) -> Optional[int]:
+    """Get the longest duration of at most limit seconds that still has an unused exercise."""
+    position = bisect.bisect_right(durations, limit)
+    while position:
+        position -= 1
+        if by_duration[durations[position]]:
+            return durations[position]
+    return None
+
+
+def _exact_fill(by_duration: Dict[int, List[int]], durations: List[int], budget: int, rest_seconds: int,
+                max_exercises: int, rng: Any) -> List[int]:
+    """Fill budget exactly as far as possible, with one reachability pass per distinct duration.
+
+    Each budget cell records the duration of the exercise that first
+    reached it, so the workout is read back once from the best cell.
+    """
+    order = list(durations)
+    rng.shuffle(order)  # vary which combination wins among equally good ones
+    last_added = [0] * (budget + 1)  # 0: unreachable; the start cell is never read back
+    exercises_used = [0] * (budget + 1)
+    reachable = [False] * (budget + 1)
+    reachable[0] = True
+    for duration in order:
+        cost, available = duration + rest_seconds, len(by_duration[duration])
+        copies = [0] * (budget + 1)  # copies of this duration on the way to each newly reached cell
+        for total in range(cost, budget + 1):
+            previous = total - cost
+            if (not reachable[total] and reachable[previous] and copies[previous] < available
+                    and exercises_used[previous] < max_exercises):
+                reachable[total] = True
+                last_added[total] = duration
+                copies[total] = copies[previous] + 1
+                exercises_used[total] = exercises_used[previous] + 1
+
+    total = max(cell for cell in range(budget + 1) if reachable[cell])
+    chosen = []
+    while total:
+        chosen.append(_take_exercise(by_duration, last_added[total], rng))
+        total -= last_added[total] + rest_seconds
+    return chosen
+
+
+def _greedy_fill(by_duration: Dict[int, List[int]], durations: List[int], budget: int, rest_seconds: int,
+                 max_exercises: int, rng: Any) -> List[int]:
+    """Fill budget by drawing exercises at random, then closing the gap with adds and swaps.
+
+    Draws leave room for COMPOSE_MIN_EXERCISES when the catalog has short
+    enough exercises, so the count is typical of the catalog rather than a
+    couple of long ones. The gap is then closed by adding the longest
+    exercise that still fits or swapping a chosen one for the longest
+    unused one that fits in its place, each a binary search over durations.
+    """
+    chosen: List[Tuple[int, int]] = []  # (duration, exercise id)
+
+    while len(chosen) < max_exercises:
+        still_needed = max(1, min(COMPOSE_MIN_EXERCISES, max_exercises) - len(chosen))
+        longest = bisect.bisect_right(durations, budget // still_needed - rest_seconds)
+        unused = sum(len(by_duration[duration]) for duration in durations[:longest])
+        if not unused:
+            break
+        # Every unused exercise that fits is equally likely
+        pick = rng.randrange(unused)
+        for duration in durations[:longest]:
+            if pick < len(by_duration[duration]):
+                break
+            pick -= len(by_duration[duration])
+        chosen.append((duration, _take_exercise(by_duration, duration, rng)))
+        budget -= duration + rest_seconds
+
+    for _ in range(COMPOSE_REPAIR_ROUNDS):
+        if not budget:
+            break
+        if len(chosen) < max_exercises:
+            duration = _longest_fitting(durations, by_duration, budget - rest_seconds)
+            if duration is not None:
+                chosen.append((duration, _take_exercise(by_duration, duration, rng)))
+                budget -= duration + rest_seconds
+                continue
+
+        # Swap out the chosen exercise whose replacement gains the most time
+        best: Optional[Tuple[int, int]] = None
+        for position, (duration, _) in enumerate(chosen):
+            replacement = _longest_fitting(durations, by_duration, duration + budget)
+            if replacement is not None and replacement > duration and (
+                    best is None or replacement - duration > best[1] - chosen[best[0]][0]):
+                best = (position, replacement)
+        if best is None:
+            break
+        position, replacement = best
+        old_duration, old_id = chosen[position]
+        chosen[position] = (replacement, _take_exercise(by_duration, replacement, rng))
+        by_duration[old_duration].append(old_id)
+        budget -= replacement - old_duration
+
+    return [exercise_id for _, exercise_id in chosen]
+
+
+def _fill_duration_budget(by_duration: Dict[int, List[int]], budget: int, rest_seconds: int,
+                          max_exercises: int, rng: Any = random) -> List[int]:
+    """Pick exercises from by_duration (duration -> unused ids) to use as much of budget as possible.
+
+    Each exercise costs its duration plus one rest. With few distinct
+    durations (as in exercises.json) an exact reachability pass is cheap
+    whatever the catalog size; with many, the greedy fill costs the same few
+    milliseconds and such catalogs have a duration for almost every gap.
+    """
+    durations = sorted(duration for duration in by_duration if duration + rest_seconds > 0)
+    if len(durations) * budget <= COMPOSE_EXACT_CELLS:
+        return _exact_fill(by_duration, durations, budget, rest_seconds, max_exercises, rng)
+    return _greedy_fill(by_duration, durations, budget, rest_seconds, max_exercises, rng)
+
+
+def compose_workout(target_seconds: int = 600, rest_seconds: int = 10, equipment: FacetFilter = "all",
+                    focus_area: FacetFilter = "all", muscles: Optional[Iterable[str]] = None,
+                    max_exercises: Optional[int] = None, seed: Optional[int] = None) -> List[Exercise]:
+    """Compose a workout that fills target_seconds as closely as possible without going over.
+
+    Total time counts each exercise plus rest_seconds between exercises, as
+    calculate_workout_duration() does. Each muscle in muscles is covered
+    first if some eligible exercise works it and still fits; the rest of the
+    time is then filled as by _fill_duration_budget(). With a seed the same
+    catalog version always yields the same workout.
+    """
+    exercises, index = _load_catalog()
+    rng = random.Random(seed) if seed is not None else random
+    return [exercises[exercise_id] for exercise_id in _compose_workout_ids(
+        exercises, index, target_seconds, rest_seconds, equipment, focus_area, muscles, max_exercises, rng)]
+
+
+def _compose_workout_ids(exercises: Sequence[Exercise], index: CatalogIndex, target_seconds: int,
+                         rest_seconds: int, equipment: FacetFilter, focus_area: FacetFilter,
+                         muscles: Optional[Iterable[str]], max_exercises: Optional[int], rng: Any) -> List[int]:
+    """Pick the exercise ids for compose_workout()."""
+    eligible_ids = query_exercise_ids(index, equipment, focus_area)
+    if not eligible_ids:
+        # If no exercises match criteria, use all exercises
+        eligible_ids = list(range(index.size))
+
+    # n exercises only need n - 1 rests
+    budget = target_seconds + rest_seconds
+    limit = len(eligible_ids) if max_exercises is None else max_exercises
+    durations = index.durations
+    chosen: List[int] = []
+    chosen_ids: Set[int] = set()
+
+    # Cover requested muscles first
+    if muscles:
+        eligible_set = set(eligible_ids)
+        covered: Set[str] = set()
+        goals = list(muscles)
+        rng.shuffle(goals)
+        for muscle in goals:
+            if muscle in covered or len(chosen) >= limit:
+                continue
+            candidates = [exercise_id for exercise_id in index.muscles.get(muscle, ())
+                          if exercise_id in eligible_set and exercise_id not in chosen_ids
+                          and durations[exercise_id] + rest_seconds <= budget]
+            if not candidates:
+                continue
+            exercise_id = rng.choice(candidates)
+            chosen.append(exercise_id)
+            chosen_ids.add(exercise_id)
+            budget -= durations[exercise_id] + rest_seconds
+            covered.update(exercises[exercise_id].muscles_worked)
+
+    # Fill the remaining time
+    by_duration: Dict[int, List[int]] = {}
+    for exercise_id in eligible_ids:
+        if exercise_id not in chosen_ids:
+            by_duration.setdefault(durations[exercise_id], []).append(exercise_id)
+
+    chosen.extend(_fill_duration_budget(by_duration, budget, rest_seconds, limit - len(chosen), rng))
+
+    rng.shuffle(chosen)
+    return chosen
+
+
+def _snapshot_version(snapshot: CatalogSnapshot) -> str:
+    """Get the catalog version of a snapshot."""
+    return snapshot.content_digest.hexdigest()[:12]
+
+
+def catalog_version() -> str:
+    """Get a short hash of the catalog content; plan IDs are only valid for the same version."""
+    return _snapshot_version(_active_snapshot())
+
+
+def _to_base36(number: int) -> str:
+    """Encode a non-negative integer in base 36."""
+    digits = "0123456789abcdefghijklmnopqrstuvwxyz"
+    encoded = ""
+    while True:
+        number, remainder = divmod(number, 36)
+        encoded = digits[remainder] + encoded
+        if not number:
+            return encoded
+
+
+# Plan IDs arrive in URLs, so anything outside these bounds is rejected rather than generated
+MAX_PLAN_SEED = 2 ** 64 - 1
+MAX_PLAN_TARGET_SECONDS = 2 * 60 * 60
+MAX_PLAN_REST_SECONDS = 5 * 60
+MAX_PLAN_EXERCISES = 100
+
+
+def _check_plan_bounds(seed: int, target_seconds: Optional[int], rest_seconds: int) -> None:
+    """Raise ValueError for plan parameters make_plan_id() doesn't accept."""
+    if not 0 <= seed <= MAX_PLAN_SEED:
+        raise ValueError(f"plan seeds must be between 0 and {MAX_PLAN_SEED}")
+    if target_seconds is not None:
+        if not 1 <= target_seconds <= MAX_PLAN_TARGET_SECONDS:
+            raise ValueError(f"plan targets must be between 1 and {MAX_PLAN_TARGET_SECONDS} seconds")
+        if not 0 <= rest_seconds <= MAX_PLAN_REST_SECONDS:
+            raise ValueError(f"plan rests must be between 0 and {MAX_PLAN_REST_SECONDS} seconds")
+
+
+class WorkoutPlan(NamedTuple):
+    """The inputs that reproduce a workout; see make_plan_id()."""
+    catalog_version: str
+    seed: int
+    equipment: str = "all"
+    focus_area: str = "all"
+    target_seconds: Optional[int] = None  # None: a random 4-6 exercise workout
+    rest_seconds: int = 10
+
+
+def make_plan_id(seed: int, equipment: str = "all", focus_area: str = "all",
+                 target_seconds: Optional[int] = None, rest_seconds: int = 10) -> str:
+    """Build a plan ID: "<catalog version>:<seed>:<generator>:<equipment>:<focus area>".
+
+    The seed is in base 36 and the generator is "r" for get_random_workout()
+    or "c<target>-<rest>" for compose_workout(), with at most
+    MAX_PLAN_EXERCISES exercises. Raises ValueError for a seed, target or
+    rest outside the MAX_PLAN_* bounds.
+    """
+    _check_plan_bounds(seed, target_seconds, rest_seconds)
+    generator = "r" if target_seconds is None else f"c{target_seconds}-{rest_seconds}"
+    return ":".join([catalog_version(), _to_base36(seed), generator,
+                     urllib.parse.quote(equipment, safe=''), urllib.parse.quote(focus_area, safe='')])
+
+
+def parse_plan_id(plan_id: str) -> WorkoutPlan:
+    """Split a plan ID into its parts, raising ValueError if it is malformed."""
+    parts = plan_id.split(":")
+    if len(parts) != 5:
+        raise ValueError(f"Malformed plan ID '{plan_id}'")
+    version, seed, generator, equipment, focus_area = parts
+
+    try:
+        plan = WorkoutPlan(version, int(seed, 36), urllib.parse.unquote(equipment), urllib.parse.unquote(focus_area))
+        if generator.startswith("c"):
+            target_seconds, rest_seconds = generator[1:].split("-")
+            plan = plan._replace(target_seconds=int(target_seconds), rest_seconds=int(rest_seconds))
+        elif generator != "r":
+            raise ValueError(f"unknown generator '{generator}'")
+        _check_plan_bounds(plan.seed, plan.target_seconds, plan.rest_seconds)
+    except ValueError as e:
+        raise ValueError(f"Malformed plan ID '{plan_id}': {e}") from None
+    return plan
+
+
+def generate_workout_plan(seed: Optional[int] = None, equipment: str = "all", focus_area: str = "all",
+                          target_seconds: Optional[int] = None,
+                          rest_seconds: int = 10) -> Tuple[str, List[Dict[str, Any]]]:
+    """Generate a workout together with the plan ID that reproduces it.
+
+    Without target_seconds the workout is a random 4-6 exercise one, as from
+    get_random_workout(); with it, it is composed as by compose_workout().
+    """
+    if seed is None:
+        seed = random.getrandbits(32)
+    plan_id = make_plan_id(seed, equipment, focus_area, target_seconds, rest_seconds)
+    return plan_id, workout_from_plan_id(plan_id)
+
+
+def _plan_catalog_size(snapshot: CatalogSnapshot, plan: WorkoutPlan) -> int:
+    """Get how many exercises the catalog had at the plan's version; raises ValueError if it's not current."""
+    count = snapshot.versions.get(plan.catalog_version)
+    if count is None:
+        raise ValueError(f"Plan was made for catalog version {plan.catalog_version}, "
+                         f"current is {_snapshot_version(snapshot)}")
+    return count
+
+
+@functools.lru_cache(maxsize=4096)
+def _plan_exercise_ids(plan: WorkoutPlan) -> Tuple[int, ...]:
+    """Regenerate the exercise ids for a plan against the catalog as it was at the plan's version.
+
+    Exercises appended since then are hidden from the index, so the result
+    depends only on the plan and can be memoized on it; plan_exercise_ids()
+    checks the version is still current before every lookup.
+    """
+    snapshot = _active_snapshot()
+    count = _plan_catalog_size(snapshot, plan)
+    exercises, index = snapshot.exercises, snapshot.index._replace(size=count)
+    rng = random.Random(plan.seed)
+    if plan.target_seconds is None:
+        return tuple(_random_workout_ids(index, plan.equipment, plan.focus_area, rng))
+    return tuple(_compose_workout_ids(exercises, index, plan.target_seconds, plan.rest_seconds,
+                                      plan.equipment, plan.focus_area, None, MAX_PLAN_EXERCISES, rng))
+
+
+def plan_exercise_ids(plan_id: str) -> Tuple[int, ...]:
+    """Get the exercise ids (positions in the catalog snapshot) of a plan's workout.
+
+    Plans stay valid while exercises are only appended to the catalog.
+    Raises ValueError if the ID is malformed or the catalog has been
+    rewritten since the plan was made.
+    """
+    plan = parse_plan_id(plan_id)
+    _plan_catalog_size(_active_snapshot(), plan)
+    return _plan_exercise_ids(plan)
+
+
+def resolve_workout(plan_id: str, exercise_ids: Sequence[int]) -> List[Exercise]:
+    """Resolve exercise ids from plan_exercise_ids() against the shared catalog snapshot.
+
+    This lets callers keep just the ids and the plan ID instead of the
+    exercises themselves. Exercises appended since the plan was made (as by
+    save_custom_exercises()) leave its ids valid; raises ValueError once the
+    catalog has been rewritten so that they may point elsewhere.
+    """
+    snapshot = _active_snapshot()
+    plan = parse_plan_id(plan_id)
+    count = snapshot.versions.get(plan.catalog_version)
+    if count is None or any(not 0 <= exercise_id < count for exercise_id in exercise_ids):
+        raise ValueError(f"Plan ID '{plan_id}' was made for catalog version {plan.catalog_version}, "
+                         f"current is {_snapshot_version(snapshot)}")
+    return [snapshot.exercises[exercise_id] for exercise_id in exercise_ids]
+
+
+def workout_from_plan_id(plan_id: str) -> List[Exercise]:
+    """Regenerate the workout for a plan ID.
+
+    Raises ValueError if the ID is malformed or was made for a different
+    catalog version.
+    """
+    return resolve_workout(plan_id, plan_exercise_ids(plan_id))
+
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.gif', '.webp')
+
+# Generated images are saved as "<Exercise_name>_10minGen.png" (sometimes "-10 minGen")
+_IMAGE_SUFFIX = re.compile(r'[\s_-]*10\s*min\s*gen$', re.IGNORECASE)
+
+
+# Lowest difflib ratio at which an image's key counts as a match for a name
+IMAGE_MATCH_CUTOFF = 0.8
+# Exercise names whose resolved image is remembered; every distinct name costs a fuzzy match
+IMAGE_MATCH_CACHE_SIZE = 4096
+
+
+class ImageIndex(NamedTuple):
+    """Filenames in IMAGE_DIR, scanned once per directory mtime."""
+    mtime_ns: Optional[int]
+    files: Dict[str, str]  # filename -> path
+    keys: Dict[str, str]  # fuzzy key -> path
+    key_masks: Tuple[Tuple[str, int, int], ...]  # (fuzzy key, _char_mask() of it, its length) for each key
+    candidates: Dict[Tuple[int, int], List[str]]  # (_char_mask(), length) of a name's key -> _possible_image_keys()
+
+
+_image_index: Optional[ImageIndex] = None
+# exercise name -> resolved path for the current index, least recently used first
+_image_matches: "OrderedDict[str, str]" = OrderedDict()
+_image_lock = threading.Lock()
+
+
+def image_match_key(text: str) -> str:
+    """Reduce an exercise name or image filename to a key for fuzzy matching.
+
+    Drops the extension and generator suffix, ignores case and punctuation,
+    and strips plural "s" so "Dumbbell Squats" and "Dummbell_squat_10minGen.png"
+    end up close to each other.
+    """
+    stem, extension = os.path.splitext(text)
+    if extension.lower() in IMAGE_EXTENSIONS:
+        text = stem
+    words = normalize_exercise_name(_IMAGE_SUFFIX.sub('', text)).split()
+    return ' '.join(word[:-1] if len(word) > 3 and word.endswith('s') and not word.endswith('ss') else word
+                    for word in words)
 
-def ensure_image(exercise: Dict[str, Any]) -> str:
-    """Ensure image exists for exercise, return path or placeholder."""
-    # Create images directory if it doesn't exist
-    if not os.path.exists(IMAGE_DIR):
-        os.makedirs(IMAGE_DIR)
 
-    # Try to find an image for this exercise
-    exercise_name = exercise.get('name', '').lower().replace(' ', '_')
-    possible_extensions = ['.png', '.jpg', '.jpeg', '.gif']
+def _scan_image_dir(mtime_ns: Optional[int]) -> ImageIndex:
+    """List IMAGE_DIR once and index every image by filename and fuzzy key."""
+    files: Dict[str, str] = {}
+    keys: Dict[str, str] = {}
+    try:
+        filenames = sorted(os.listdir(IMAGE_DIR))
+    except OSError:
+        filenames = []
+
+    for filename in filenames:
+        if os.path.splitext(filename)[1].lower() not in IMAGE_EXTENSIONS:
+            continue
+        path = os.path.join(IMAGE_DIR, filename)
+        files[filename] = path
+        if path != PLACEHOLDER_IMAGE:
+            keys.setdefault(image_match_key(filename), path)
+    return ImageIndex(mtime_ns, files, keys, tuple((key, _char_mask(key), len(key)) for key in keys), {})
+
+
+def get_image_index() -> ImageIndex:
+    """Get the image index, rescanning only when IMAGE_DIR's mtime changes."""
+    global _image_index
+    try:
+        mtime_ns: Optional[int] = _stat(IMAGE_DIR).st_mtime_ns
+    except FileNotFoundError:
+        # Create images directory if it doesn't exist
+        os.makedirs(IMAGE_DIR, exist_ok=True)
+        mtime_ns = _stat(IMAGE_DIR).st_mtime_ns
+    except OSError:
+        mtime_ns = None
+
+    index = _image_index
+    if index is not None and index.mtime_ns == mtime_ns:
+        return index
+
+    with _image_lock:
+        if _image_index is None or _image_index.mtime_ns != mtime_ns:
+            _image_index = _scan_image_dir(mtime_ns)
+            _image_matches.clear()
+        return _image_index
+
+
+# One bit per character a fuzzy key is mostly made of; any other character sets the last bit
+_CHAR_BITS = {char: 1 << bit for bit, char in enumerate(" 0123456789abcdefghijklmnopqrstuvwxyz")}
+_OTHER_CHAR_BIT = 1 << len(_CHAR_BITS)
+
+
+def _char_mask(key: str) -> int:
+    """Get a bit mask of the characters in key."""
+    return sum({_CHAR_BITS.get(char, _OTHER_CHAR_BIT) for char in key})  # distinct bits, so the sum is their OR
+
+
+def _possible_image_keys(index: ImageIndex, key: str) -> List[str]:
+    """Get the image keys that could still reach IMAGE_MATCH_CUTOFF against key.
+
+    difflib's ratio is 2 * matched / total characters, and each character
+    of one key that the other lacks leaves at least one position unmatched,
+    so most keys are ruled out by comparing character masks instead of
+    running a SequenceMatcher. The bound only depends on a key's mask and
+    length, which many names share, so the survivors are kept per index.
+    """
+    mask = _char_mask(key)
+    length = len(key)
+    possible = index.candidates.get((mask, length))
+    if possible is None:
+        share = IMAGE_MATCH_CUTOFF / 2  # of both keys' characters, that each must be able to match
+        possible = [other for other, other_mask, other_length in index.key_masks
+                    if length - bin(mask & ~other_mask).count("1") >= share * (length + other_length)
+                    and other_length - bin(other_mask & ~mask).count("1") >= share * (length + other_length)]
+        if len(index.candidates) >= IMAGE_MATCH_CACHE_SIZE:
+            index.candidates.clear()
+        index.candidates[(mask, length)] = possible
+    return possible
+
+
+def _match_image(index: ImageIndex, exercise_name: str) -> str:
+    """Find the best image for a name: exact fuzzy key first, then the closest key."""
+    key = image_match_key(exercise_name)
+    path = index.keys.get(key)
+    if path is None:
+        candidates = _possible_image_keys(index, key)
+        close = difflib.get_close_matches(key, candidates, n=1, cutoff=IMAGE_MATCH_CUTOFF) if candidates else []
+        path = index.keys[close[0]] if close else PLACEHOLDER_IMAGE
+    return path
+
+
+def _explicit_image(index: ImageIndex, exercise: Dict[str, Any]) -> Optional[str]:
+    """Get the path of the exercise's "image" field, if it names an existing file."""
+    explicit_image = exercise.get('image')
+    if explicit_image:
+        path = index.files.get(explicit_image)
+        if path is not None:
+            return path
+        path = explicit_image if os.path.isabs(explicit_image) else os.path.join(IMAGE_DIR, explicit_image)
+        if _path_exists(path):
+            return path
+    return None
+
+
+def resolve_image(index: ImageIndex, exercise: Dict[str, Any]) -> str:
+    """Resolve an exercise's image against a given index, as ensure_image() would.
+
+    Nothing is stat'ed or cached beyond the index itself, which suits
+    a pass over many distinct names, such as validating a bulk import.
+    """
+    return _explicit_image(index, exercise) or _match_image(index, exercise.get('name', ''))
 
-    for ext in possible_extensions:
-        image_path = os.path.join(IMAGE_DIR, f"{exercise_name}{ext}")
-        if os.path.exists(image_path):
-            return image_path
+
+def ensure_image(exercise: Dict[str, Any]) -> str:
+    """Ensure image exists for exercise, return path or placeholder.
+
+    An explicit "image" field (a filename in IMAGE_DIR or a path) wins;
+    otherwise the name is matched against the indexed image filenames.
+    """
+    index = get_image_index()
+    path = _explicit_image(index, exercise)
+    if path is not None:
+        return path
+
+    exercise_name = exercise.get('name', '')
+    with _image_lock:
+        path = _image_matches.get(exercise_name)
+        if path is not None:
+            _image_matches.move_to_end(exercise_name)
+    if path is None:
+        path = _match_image(index, exercise_name)
+        with _image_lock:
+            if _image_index is index:
+                _image_matches[exercise_name] = path
+                while len(_image_matches) > IMAGE_MATCH_CACHE_SIZE:
+                    _image_matches.popitem(last=False)
 
     # Return placeholder if no specific image found
-    return PLACEHOLDER_IMAGE
+    return path
 
 
 def get_equipment_types() -> List[str]:
     """Get all unique equipment types from loaded exercises."""
-    all_exercises = load_all_exercises()
-    equipment_types = set()
-
-    for exercise in all_exercises:
-        equipment = exercise.get('equipment', '')
-        if equipment:
-            equipment_types.add(equipment)
-
-    return sorted(list(equipment_types))
+    if STORAGE_BACKEND == "sqlite":
+        return _sqlite_distinct("equipment")
+    return list(get_catalog_index().equipment_types)
 
 
 def get_focus_areas() -> List[str]:
     """Get all unique focus areas from loaded exercises."""
-    all_exercises = load_all_exercises()
-    focus_areas = set()
-
-    for exercise in all_exercises:
-        focus_area = exercise.get('focus_area', '')
-        if focus_area:
-            focus_areas.add(focus_area)
-
-    return sorted(list(focus_areas))
+    if STORAGE_BACKEND == "sqlite":
+        return _sqlite_distinct("focus_area")
+    return list(get_catalog_index().focus_areas)
 
 
 def get_muscles_worked() -> List[str]:
     """Get all unique muscles from loaded exercises."""
-    all_exercises = load_all_exercises()
-    muscles = set()
-
-    for exercise in all_exercises:
-        exercise_muscles = exercise.get('muscles_worked', [])
-        if isinstance(exercise_muscles, list):
-            muscles.update(exercise_muscles)
-
-    return sorted(list(muscles))
+    if STORAGE_BACKEND == "sqlite":
+        return _sqlite_distinct("muscle")
+    return list(get_catalog_index().muscle_names)
 
 
 def calculate_workout_duration(exercises: List[Dict[str, Any]]) -> int:
     """Calculate total workout duration in seconds."""
     total_duration = 0
     for exercise in exercises:
-        duration = exercise.get('duration', 30)  # Default to 30 seconds
-        total_duration += duration
+        total_duration += exercise_duration_seconds(exercise)  # Default to 30 seconds
 
     # Add rest time between exercises (10 seconds between each)
     if len(exercises) > 1:
@@ -226,47 +1366,206 @@ def calculate_workout_duration(exercises: List[Dict[str, Any]]) -> int:
     return total_duration
 
 
-def get_exercise_by_name(exercise_name: str) -> Dict[str, Any]:
-    """Get a specific exercise by name."""
-    all_exercises = load_all_exercises()
+def get_exercise_by_name(exercise_name: str, normalized: bool = False) -> Dict[str, Any]:
+    """Get a specific exercise by name.
 
-    for exercise in all_exercises:
-        if exercise.get('name', '').lower() == exercise_name.lower():
-            return exercise
+    With normalized=True, punctuation, hyphens and case are ignored, so
+    "push up" finds "Push-Up".
+    """
+    if STORAGE_BACKEND == "sqlite":
+        return _sqlite_exercise_by_name(exercise_name, normalized)
 
-    return {}
+    snapshot = get_catalog_snapshot()
+    ids = find_exercise_ids_by_name(snapshot.index, exercise_name, normalized)
+    return snapshot.exercises[ids[0]] if ids else {}
 
 
-def save_custom_exercise(exercise: Dict[str, Any]) -> bool:
-    """Save a custom exercise to the JSON file."""
+def search_exercises_by_prefix(prefix: str, limit: int = 10) -> List[Exercise]:
+    """Get exercises whose name starts with prefix, ignoring case and punctuation."""
+    if STORAGE_BACKEND == "sqlite":
+        return _sqlite_search_by_prefix(prefix, limit)
+
+    snapshot = get_catalog_snapshot()
+    return [snapshot.exercises[exercise_id] for exercise_id in find_exercise_ids_by_prefix(snapshot.index, prefix, limit)]
+
+
+@contextmanager
+def _catalog_file_lock(path: str) -> Iterator[None]:
+    """Hold an exclusive inter-process lock on a catalog while writing it."""
+    with open(path + ".lock", 'a+') as lock_file:
+        if fcntl is not None:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+        else:
+            lock_file.seek(0)
+            msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+            else:
+                lock_file.seek(0)
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def _atomic_write_json(path: str, data: Any) -> None:
+    """Write JSON to a temp file next to path, then rename it into place."""
+    directory = os.path.dirname(path) or '.'
+    fd, temp_path = tempfile.mkstemp(prefix=os.path.basename(path) + '.', suffix='.tmp', dir=directory)
     try:
-        # Validate the exercise first
-        if not validate_exercise(exercise):
-            print("Error: Invalid exercise data")
-            return False
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2, ensure_ascii=False, default=dict)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+def _append_to_journal(path: str, exercises: List[Dict[str, Any]]) -> None:
+    """Append exercises to the catalog journal as JSON Lines in a single durable write."""
+    lines = "".join(json.dumps(exercise, ensure_ascii=False, default=dict) + "\n" for exercise in exercises)
+    with open(get_journal_path(path), 'a+b') as f:
+        # Don't glue new entries onto a line torn by an earlier crash
+        if f.seek(0, os.SEEK_END) > 0:
+            f.seek(-1, os.SEEK_END)
+            if f.read(1) != b"\n":
+                lines = "\n" + lines
+        f.write(lines.encode('utf-8'))
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def _cache_snapshot(snapshot: CatalogSnapshot) -> CatalogSnapshot:
+    """Store a snapshot we produced ourselves so the next read is a cache hit."""
+    with _catalog_lock:
+        _catalog_cache[snapshot.path] = snapshot
+    return snapshot
+
+
+def _compact_journal_locked(snapshot: CatalogSnapshot) -> CatalogSnapshot:
+    """Fold journal entries into the catalog file. Caller holds the file lock.
+
+    The file's records and the replayed journal lines are written back as
+    they were stored, not as parsed, so fields the app doesn't know about
+    survive. A catalog file that couldn't be read is never overwritten: the
+    snapshot then holds the fallback exercises, not the file's.
+    """
+    path = snapshot.path
+    if snapshot.file_exercises is None:
+        print(f"Warning: Not compacting {get_journal_path(path)}: {path} could not be read")
+        return snapshot
+    if _catalog_signature(path) != snapshot.signature:
+        return snapshot  # Changed under us (by hand?); the next load reads it afresh
+
+    with open(path, 'r', encoding='utf-8') as f:
+        records = json.load(f)
+
+    # Keep the journal lines the load replayed: not in the file, nor earlier in the journal
+    seen = set()
+    for exercise in _read_journal_entries(path):
+        key = normalize_exercise_name(exercise['name'])
+        ids = find_exercise_ids_by_name(snapshot.index, key, normalized=True)
+        if key not in seen and not any(exercise_id < snapshot.file_exercises for exercise_id in ids):
+            seen.add(key)
+            records.append(exercise)
+    if len(seen) != len(snapshot.exercises) - snapshot.file_exercises:
+        print(f"Warning: Not compacting {get_journal_path(path)}: it no longer matches the loaded catalog")
+        return snapshot
+
+    _atomic_write_json(path, records)
+    try:
+        os.remove(get_journal_path(path))
+    except FileNotFoundError:
+        pass
+    return _cache_snapshot(snapshot._replace(signature=_catalog_signature(path), journal_entries=0,
+                                             file_exercises=len(snapshot.exercises)))
 
-        # Load existing exercises
-        all_exercises = load_all_exercises()
 
-        # Check if exercise already exists
-        existing_names = [ex.get('name', '').lower() for ex in all_exercises]
-        if exercise.get('name', '').lower() in existing_names:
-            print(f"Error: Exercise '{exercise['name']}' already exists")
-            return False
+def compact_exercise_journal(path: Optional[str] = None) -> bool:
+    """Rewrite the catalog file with all journaled exercises and clear the journal."""
+    path = path or EXERCISES_FILE
+    try:
+        with _catalog_file_lock(path):
+            snapshot = get_catalog_snapshot(path)
+            if snapshot.journal_entries:
+                snapshot = _compact_journal_locked(snapshot)
+        return snapshot.journal_entries == 0
+    except Exception as e:
+        print(f"Error compacting exercise journal: {e}")
+        return False
 
-        # Add new exercise
-        all_exercises.append(exercise)
 
-        # Save back to file
-        with open(EXERCISES_FILE, 'w', encoding='utf-8') as f:
-            json.dump(all_exercises, f, indent=2, ensure_ascii=False)
+def save_custom_exercises(exercises: Iterable[Dict[str, Any]]) -> int:
+    """Save a batch of custom exercises, returning how many were added.
 
-        print(f"Successfully added exercise: {exercise['name']}")
-        return True
+    New exercises are appended to the journal under a file lock and the
+    catalog file is only rewritten (atomically) when the journal is compacted.
+    Invalid exercises and duplicate names are skipped.
+    """
+    try:
+        valid_exercises = []
+        for exercise in exercises:
+            if validate_exercise(exercise):
+                valid_exercises.append(normalize_exercise(exercise, "new exercise"))
+            else:
+                print(f"Error: Invalid exercise data for {exercise.get('name', 'unknown')}")
+
+        if not valid_exercises:
+            return 0
+
+        if STORAGE_BACKEND == "sqlite":
+            new_exercises, duplicates = _sqlite_insert_exercises(_sqlite_connection(), valid_exercises)
+            for exercise in duplicates:
+                print(f"Error: Exercise '{exercise['name']}' already exists")
+            for exercise in new_exercises:
+                print(f"Successfully added exercise: {exercise['name']}")
+            return len(new_exercises)
+
+        with _catalog_file_lock(EXERCISES_FILE):
+            # Re-read under the lock so writes from other processes are seen
+            snapshot = get_catalog_snapshot(EXERCISES_FILE)
+            new_exercises, duplicates = _split_new_exercises(snapshot.index, valid_exercises)
+            for exercise in duplicates:
+                print(f"Error: Exercise '{exercise['name']}' already exists")
+
+            if new_exercises:
+                _append_to_journal(EXERCISES_FILE, new_exercises)
+                exercises = snapshot.exercises + tuple(new_exercises)
+                snapshot = _cache_snapshot(CatalogSnapshot(
+                    snapshot.path,
+                    _catalog_signature(snapshot.path),
+                    exercises,
+                    extend_catalog_index(snapshot.index, new_exercises),
+                    snapshot.journal_entries + len(new_exercises),
+                    snapshot.file_exercises,
+                    *_append_versions(snapshot.content_digest, snapshot.versions, new_exercises,
+                                      len(snapshot.exercises)),
+                ))
+                if snapshot.journal_entries >= JOURNAL_COMPACT_THRESHOLD:
+                    try:
+                        _compact_journal_locked(snapshot)
+                    except Exception as e:
+                        # The exercises are already safe in the journal
+                        print(f"Error compacting exercise journal: {e}")
+
+        for exercise in new_exercises:
+            print(f"Successfully added exercise: {exercise['name']}")
+        return len(new_exercises)
 
     except Exception as e:
-        print(f"Error saving exercise: {e}")
+        print(f"Error saving exercises: {e}")
+        return 0
+
+
+def save_custom_exercise(exercise: Dict[str, Any]) -> bool:
+    """Save a custom exercise to the catalog."""
+    if not validate_exercise(exercise):
+        print("Error: Invalid exercise data")
         return False
+    return save_custom_exercises([exercise]) == 1
 
 
 def get_workout_stats(exercises: List[Dict[str, Any]]) -> Dict[str, Any]:
@@ -302,4 +1601,395 @@ def get_workout_stats(exercises: List[Dict[str, Any]]) -> Dict[str, Any]:
         'muscles_worked': sorted(list(all_muscles)),
         'equipment_needed': sorted(list(equipment_needed)),
         'focus_areas': sorted(list(focus_areas))
-    }
\ No newline at end of file
+    }
+
+
+class WorkoutRequest(NamedTuple):
+    """One plan to generate in bulk."""
+    user: str
+    equipment: str = "all"
+    focus_area: str = "all"
+    seed: Optional[int] = None
+
+
+def read_workout_requests(lines: Iterable[str]) -> Iterator[WorkoutRequest]:
+    """Parse JSON Lines of {"user", "equipment", "focus_area", "seed"} into requests."""
+    for line_number, line in enumerate(lines, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            data = json.loads(line)
+            yield WorkoutRequest(str(data['user']), data.get('equipment', "all"), data.get('focus_area', "all"),
+                                 data.get('seed'))
+        except (json.JSONDecodeError, KeyError, TypeError) as e:
+            print(f"Warning: Skipping invalid request on line {line_number}: {e}")
+
+
+def _generate_plan_lines(requests: Iterable[WorkoutRequest]) -> str:
+    """Generate one JSON line per request, computing each filter's eligible pool once.
+
+    Exercise names and the filter fields are JSON-encoded once per chunk and
+    each line is assembled from those pieces rather than json.dumps'ed.
+    """
+    exercises, index = _load_catalog()
+    encode = json.JSONEncoder(ensure_ascii=False).encode
+    encoded_names: Dict[int, str] = {}
+    pools: Dict[Tuple[str, str], Tuple[List[int], str]] = {}
+    rng = random.Random()
+    lines = []
+
+    for request in requests:
+        key = (request.equipment, request.focus_area)
+        pool = pools.get(key)
+        if pool is None:
+            # If no exercises match criteria, use all exercises
+            eligible_ids = query_exercise_ids(index, *key) or list(range(index.size))
+            pool = pools[key] = (eligible_ids, f', "equipment": {encode(key[0])}, "focus_area": {encode(key[1])}')
+        eligible_ids, filter_fields = pool
+
+        if request.seed is not None:
+            rng.seed(request.seed)
+            exercise_ids = _pick_workout_ids(eligible_ids, rng)
+        else:
+            exercise_ids = _pick_workout_ids(eligible_ids)
+
+        names = []
+        for exercise_id in exercise_ids:
+            name = encoded_names.get(exercise_id)
+            if name is None:
+                name = encoded_names[exercise_id] = encode(exercises[exercise_id]['name'])
+            names.append(name)
+
+        lines.append(f'{{"user": {encode(request.user)}{filter_fields}, "seed": {encode(request.seed)}, '
+                     f'"exercises": [{", ".join(names)}]}}\n')
+    return "".join(lines)
+
+
+def _chunked(items: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    """Yield lists of up to size items."""
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def generate_workouts_bulk(requests: Iterable[WorkoutRequest], out: TextIO, workers: int = 1,
+                           chunk_size: int = 10000) -> int:
+    """Generate a random workout per request and stream them to out as JSON Lines.
+
+    Requests are processed in chunks; within a chunk the eligible pool for
+    each (equipment, focus_area) pair is computed once and shared. With
+    workers > 1, chunks are spread over a process pool and written back in
+    input order. Plans list exercise names; a seeded request always gets
+    the same plan for the same catalog. Returns the number of plans written.
+    """
+    count = 0
+    chunks = _chunked(requests, chunk_size)
+    if workers <= 1:
+        for chunk in chunks:
+            out.write(_generate_plan_lines(chunk))
+            count += len(chunk)
+        return count
+
+    def counted(source: Iterator[List[WorkoutRequest]]) -> Iterator[List[WorkoutRequest]]:
+        nonlocal count
+        for chunk in source:
+            count += len(chunk)
+            yield chunk
+
+    with multiprocessing.Pool(workers) as pool:
+        for lines in pool.imap(_generate_plan_lines, counted(chunks)):
+            out.write(lines)
+    return count
+
+
+SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS exercises (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    name_folded TEXT NOT NULL,
+    name_key TEXT NOT NULL UNIQUE,
+    equipment TEXT NOT NULL,
+    focus_area TEXT NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_exercises_equipment_focus ON exercises (equipment, focus_area);
+CREATE INDEX IF NOT EXISTS idx_exercises_focus ON exercises (focus_area);
+CREATE INDEX IF NOT EXISTS idx_exercises_name_folded ON exercises (name_folded);
+CREATE TABLE IF NOT EXISTS exercise_muscles (
+    muscle TEXT NOT NULL,
+    exercise_id INTEGER NOT NULL REFERENCES exercises (id) ON DELETE CASCADE,
+    PRIMARY KEY (muscle, exercise_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_exercise_muscles_exercise ON exercise_muscles (exercise_id);
+"""
+
+# One connection per thread and database file; sqlite3 connections can't be shared across threads
+_sqlite_local = threading.local()
+
+
+def set_storage_backend(backend: str, sqlite_file: Optional[str] = None) -> None:
+    """Switch the storage backend used by the public helpers."""
+    global STORAGE_BACKEND, SQLITE_FILE
+    if backend not in STORAGE_BACKENDS:
+        raise ValueError(f"Unknown storage backend '{backend}', expected one of {STORAGE_BACKENDS}")
+    STORAGE_BACKEND = backend
+    if sqlite_file:
+        SQLITE_FILE = sqlite_file
+
+
+def _sqlite_connection(db_path: Optional[str] = None) -> sqlite3.Connection:
+    """Get this thread's connection to the exercise database, creating the schema if needed."""
+    db_path = db_path or SQLITE_FILE
+    connections = getattr(_sqlite_local, 'connections', None)
+    if connections is None:
+        connections = _sqlite_local.connections = {}
+
+    connection = connections.get(db_path)
+    if connection is None:
+        connection = sqlite3.connect(db_path, timeout=30)
+        # WAL lets worker processes read while another one writes
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA foreign_keys=ON")
+        connection.executescript(SQLITE_SCHEMA)
+        connections[db_path] = connection
+    return connection
+
+
+def _sqlite_where(equipment: FacetFilter = "all", focus_area: FacetFilter = "all", muscles: FacetFilter = None,
+                  match_all_muscles: bool = False) -> Tuple[str, List[str]]:
+    """Translate a facet query into a WHERE clause and its parameters."""
+    clauses = []
+    params: List[str] = []
+
+    def values_of(values: FacetFilter) -> Optional[List[str]]:
+        if values is None or values == "all":
+            return None
+        return [values] if isinstance(values, str) else list(values)
+
+    for column, values in (("equipment", values_of(equipment)), ("focus_area", values_of(focus_area))):
+        if values is not None:
+            clauses.append(f"{column} IN ({', '.join('?' * len(values))})")
+            params.extend(values)
+
+    muscle_list = values_of(muscles)
+    if muscle_list is not None:
+        groups = [[muscle] for muscle in muscle_list] if match_all_muscles else [muscle_list]
+        for group in groups:
+            clauses.append(f"id IN (SELECT exercise_id FROM exercise_muscles "
+                           f"WHERE muscle IN ({', '.join('?' * len(group))}))")
+            params.extend(group)
+
+    return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+
+# Rows each SQLite snapshot keeps decoded, for the workouts sessions are showing
+SQLITE_RECORD_CACHE_SIZE = 1024
+
+
+class _SqliteRecords(Sequence):
+    """The exercises of a SQLite snapshot, by position, fetched from the database on demand.
+
+    Rows are only ever appended, so a position keeps meaning the same row
+    for as long as the snapshot is current.
+    """
+
+    def __init__(self, db_path: str, row_ids: List[int]):
+        self._db_path = db_path
+        self._row_ids = row_ids
+        self._cache: "OrderedDict[int, Exercise]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._row_ids)
+
+    def __getitem__(self, position):
+        if isinstance(position, slice):
+            return [self[i] for i in range(*position.indices(len(self)))]
+        row_id = self._row_ids[position]
+        with self._lock:
+            exercise = self._cache.get(row_id)
+            if exercise is not None:
+                self._cache.move_to_end(row_id)
+                return exercise
+
+        row = _sqlite_connection(self._db_path).execute("SELECT data FROM exercises WHERE id = ?",
+                                                        (row_id,)).fetchone()
+        if row is None:
+            raise LookupError(f"Exercise row {row_id} is no longer in {self._db_path}")
+        exercise = Exercise.from_dict(json.loads(row[0]))
+        with self._lock:
+            self._cache[row_id] = exercise
+            while len(self._cache) > SQLITE_RECORD_CACHE_SIZE:
+                self._cache.popitem(last=False)
+        return exercise
+
+
+def _load_sqlite_snapshot(path: str, signature: CatalogSignature) -> CatalogSnapshot:
+    """Index the SQLite catalog for in-memory planning without holding its records.
+
+    Each row is decoded once, on its way into the index and the content
+    digest; the snapshot then fetches only the records callers ask for.
+    """
+    connection = _sqlite_connection(path)
+    # The rows whose prefixes get a version (see _digest_exercises()) are kept until the digest is done
+    start = connection.execute("SELECT COUNT(*) FROM exercises").fetchone()[0] - MAX_TRACKED_VERSIONS
+    row_ids: List[int] = []
+    digest = hashlib.sha256()
+    tail: List[Exercise] = []
+
+    def records() -> Iterator[Exercise]:
+        for row_id, data in connection.execute("SELECT id, data FROM exercises ORDER BY id"):
+            exercise = Exercise.from_dict(json.loads(data))
+            if len(row_ids) < start:
+                _update_digest(digest, exercise)
+            else:
+                tail.append(exercise)
+            row_ids.append(row_id)
+            yield exercise
+
+    index = build_catalog_index(records())
+    return CatalogSnapshot(path, signature, _SqliteRecords(path, row_ids), index, 0, len(row_ids),
+                           *_append_versions(digest, {}, tail, len(row_ids) - len(tail)))
+
+
+def _sqlite_snapshot() -> CatalogSnapshot:
+    """Get the SQLite catalog as a shared snapshot, re-read only after the database or its WAL changes."""
+    _sqlite_connection()  # Opening the database creates its WAL, so stat only afterwards
+    signature = (_file_signature(SQLITE_FILE), _file_signature(SQLITE_FILE + "-wal"))
+    return _cached_snapshot(SQLITE_FILE, signature, _load_sqlite_snapshot)
+
+
+def _sqlite_query_exercises(equipment: FacetFilter = "all", focus_area: FacetFilter = "all",
+                            muscles: FacetFilter = None, match_all_muscles: bool = False) -> List[Exercise]:
+    """Run a facet query against the SQLite store."""
+    where, params = _sqlite_where(equipment, focus_area, muscles, match_all_muscles)
+    rows = _sqlite_connection().execute(f"SELECT data FROM exercises{where} ORDER BY id", params)
+    return [Exercise.from_dict(json.loads(data)) for (data,) in rows]
+
+
+def _sqlite_random_workout(equipment: str = "all", focus_area: str = "all",
+                           rng: Optional[random.Random] = None) -> List[Exercise]:
+    """Sample a workout by id from the index, then fetch only the chosen rows."""
+    connection = _sqlite_connection()
+    where, params = _sqlite_where(equipment, focus_area)
+    eligible_ids = [row[0] for row in connection.execute(f"SELECT id FROM exercises{where} ORDER BY id", params)]
+
+    if not eligible_ids:
+        # If no exercises match criteria, return all exercises
+        eligible_ids = [row[0] for row in connection.execute("SELECT id FROM exercises ORDER BY id")]
+
+    chosen_ids = _pick_workout_ids(eligible_ids, rng)
+    if not chosen_ids:
+        return []
+
+    rows = connection.execute(
+        f"SELECT id, data FROM exercises WHERE id IN ({', '.join('?' * len(chosen_ids))})", chosen_ids)
+    by_id = {exercise_id: Exercise.from_dict(json.loads(data)) for exercise_id, data in rows}
+    return [by_id[exercise_id] for exercise_id in chosen_ids]
+
+
+def _sqlite_distinct(facet: str) -> List[str]:
+    """Get the sorted distinct values of a facet column."""
+    if facet == "muscle":
+        query = "SELECT DISTINCT muscle FROM exercise_muscles ORDER BY muscle"
+    else:
+        query = f"SELECT DISTINCT {facet} FROM exercises WHERE {facet} != '' ORDER BY {facet}"
+    return [row[0] for row in _sqlite_connection().execute(query)]
+
+
+def _sqlite_exercise_by_name(exercise_name: str, normalized: bool = False) -> Dict[str, Any]:
+    """Look up one exercise by case-folded or normalized name."""
+    if normalized:
+        query, key = "SELECT data FROM exercises WHERE name_key = ?", normalize_exercise_name(exercise_name)
+    else:
+        query, key = "SELECT data FROM exercises WHERE name_folded = ? ORDER BY id LIMIT 1", exercise_name.casefold()
+    row = _sqlite_connection().execute(query, (key,)).fetchone()
+    return Exercise.from_dict(json.loads(row[0])) if row else {}
+
+
+def _sqlite_search_by_prefix(prefix: str, limit: int = 10) -> List[Exercise]:
+    """Range-scan the unique name_key index for normalized names starting with prefix."""
+    prefix = normalize_exercise_name(prefix)
+    rows = _sqlite_connection().execute(
+        "SELECT data FROM exercises WHERE name_key >= ? AND name_key < ? ORDER BY name_key LIMIT ?",
+        (prefix, prefix + "\U0010ffff", limit))
+    return [Exercise.from_dict(json.loads(data)) for (data,) in rows]
+
+
+def _sqlite_insert_exercises(connection: sqlite3.Connection, exercises: Iterable[Dict[str, Any]]
+                             ) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """Insert exercises in one transaction, returning (added, duplicates)."""
+    added = []
+    duplicates = []
+    with connection:
+        for exercise in exercises:
+            cursor = connection.execute(
+                "INSERT OR IGNORE INTO exercises (name, name_folded, name_key, equipment, focus_area, data) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (exercise['name'], exercise['name'].casefold(), normalize_exercise_name(exercise['name']),
+                 exercise.get('equipment', ''), exercise.get('focus_area', ''),
+                 json.dumps(exercise, ensure_ascii=False, default=dict)))
+            if cursor.rowcount == 0:
+                duplicates.append(exercise)
+                continue
+
+            muscles = {muscle for muscle in exercise.get('muscles_worked', []) if isinstance(muscle, str)}
+            connection.executemany("INSERT INTO exercise_muscles (muscle, exercise_id) VALUES (?, ?)",
+                                   [(muscle, cursor.lastrowid) for muscle in sorted(muscles)])
+            added.append(exercise)
+    return added, duplicates
+
+
+def migrate_json_to_sqlite(json_file: Optional[str] = None, sqlite_file: Optional[str] = None) -> int:
+    """Copy the JSON catalog (and its journal) into the SQLite store, returning the number added."""
+    json_file = json_file or EXERCISES_FILE
+    snapshot = _load_snapshot(json_file, _catalog_signature(json_file))
+    added, duplicates = _sqlite_insert_exercises(_sqlite_connection(sqlite_file), snapshot.exercises)
+    print(f"Migrated {len(added)} exercises to {sqlite_file or SQLITE_FILE} "
+          f"({len(duplicates)} already present)")
+    return len(added)
+
+
+def main():
+    """Command-line entry point for catalog maintenance."""
+    parser = argparse.ArgumentParser(description="Exercise catalog maintenance.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    migrate_parser = subparsers.add_parser("migrate-sqlite", help="Copy exercises.json into a SQLite database.")
+    migrate_parser.add_argument("--json", default=EXERCISES_FILE, help="Source JSON catalog.")
+    migrate_parser.add_argument("--db", default=SQLITE_FILE, help="Target SQLite database.")
+
+    subparsers.add_parser("compact", help="Fold the exercise journal into exercises.json.")
+
+    bulk_parser = subparsers.add_parser("bulk-generate", help="Generate workouts for many users as JSON Lines.")
+    bulk_parser.add_argument("--input", default="-", help="JSON Lines requests (user, equipment, focus_area, seed).")
+    bulk_parser.add_argument("--output", default="-", help="Where to write the plans.")
+    bulk_parser.add_argument("--workers", type=int, default=1, help="Worker processes.")
+    bulk_parser.add_argument("--chunk-size", type=int, default=10000, help="Requests per work unit.")
+    args = parser.parse_args()
+
+    if args.command == "migrate-sqlite":
+        migrate_json_to_sqlite(args.json, args.db)
+    elif args.command == "compact":
+        compact_exercise_journal()
+    elif args.command == "bulk-generate":
+        source = sys.stdin if args.input == "-" else open(args.input, 'r', encoding='utf-8')
+        target = sys.stdout if args.output == "-" else open(args.output, 'w', encoding='utf-8')
+        try:
+            count = generate_workouts_bulk(read_workout_requests(source), target, args.workers, args.chunk_size)
+        finally:
+            if source is not sys.stdin:
+                source.close()
+            if target is not sys.stdout:
+                target.close()
+        print(f"Generated {count} workouts", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,147 @@
+import argparse
+import hashlib
 import os
-import requests
-import streamlit as st
+import tempfile
+import threading
+from typing import Any, Dict, Iterable, Optional, Tuple
 
-# Constants
-IMAGE_DIR = "images"
-PLACEHOLDER_IMAGE = os.path.join(IMAGE_DIR, "placeholder.png")
+from data_loader import IMAGE_DIR, PROJECT_ROOT, ensure_image
+from instrumentation import path_exists, phase, stat
 
+try:
+    from PIL import Image
+except ImportError:  # Thumbnails are optional; originals are served without Pillow
+    Image = None
+
+# Derivatives are written once per (source content, width) and reused across reruns
+THUMBNAIL_DIR = os.environ.get("WORKOUT_THUMBNAIL_DIR", os.path.join(PROJECT_ROOT, ".cache", "thumbnails"))
+THUMBNAIL_WIDTH = 200
+THUMBNAIL_SCALES = (1, 2)
+THUMBNAIL_QUALITY = 80
+
+# (source path, mtime_ns, size, width) -> derivative path
+_thumbnail_paths: Dict[Tuple[str, int, int, int], str] = {}
+# One lock per key being generated, so a slow decode only holds up requests for the same derivative
+_thumbnail_locks: Dict[Tuple[str, int, int, int], threading.Lock] = {}
+_thumbnail_locks_lock = threading.Lock()
+
+
+def _thumbnail_format() -> Tuple[str, str]:
+    """Return (Pillow format, extension), preferring WebP when Pillow was built with it."""
+    Image.init()
+    if "WEBP" in Image.SAVE:
+        return "WEBP", ".webp"
+    return "JPEG", ".jpg"
+
+
+def _content_hash(image_path: str) -> str:
+    """Hash the source image bytes so renamed or duplicated files share derivatives."""
+    digest = hashlib.sha256()
+    with open(image_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _write_thumbnail(image_path: str, thumbnail_path: str, width: int, image_format: str) -> None:
+    """Resize image_path to width and save it atomically to thumbnail_path."""
+    with Image.open(image_path) as image:
+        image.load()
+        if image.width > width:
+            height = max(1, round(image.height * width / image.width))
+            image = image.resize((width, height), Image.LANCZOS)
+
+        if image_format == "JPEG" and image.mode not in ("RGB", "L"):
+            image = image.convert("RGB")
+
+        fd, temp_path = tempfile.mkstemp(suffix=".tmp", dir=os.path.dirname(thumbnail_path))
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                image.save(f, format=image_format, quality=THUMBNAIL_QUALITY)
+            os.replace(temp_path, thumbnail_path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+
+def thumbnail_for(image_path: str, width: int = THUMBNAIL_WIDTH) -> str:
+    """Get a cached, resized copy of image_path, falling back to the original."""
+    if Image is None:
+        return image_path
+
+    try:
+        image_stat = stat(image_path)
+    except OSError:
+        return image_path
+
+    key = (image_path, image_stat.st_mtime_ns, image_stat.st_size, width)
+    cached = _thumbnail_paths.get(key)
+    if cached is not None:
+        return cached
+
+    with _thumbnail_locks_lock:
+        key_lock = _thumbnail_locks.setdefault(key, threading.Lock())
+    try:
+        with key_lock:
+            cached = _thumbnail_paths.get(key)
+            if cached is not None:
+                return cached
+
+            try:
+                image_format, extension = _thumbnail_format()
+                os.makedirs(THUMBNAIL_DIR, exist_ok=True)
+                thumbnail_path = os.path.join(THUMBNAIL_DIR, f"{_content_hash(image_path)}_{width}{extension}")
+                # Sources with the same content share this path; the write is atomic, so racing them is harmless
+                if not path_exists(thumbnail_path):
+                    _write_thumbnail(image_path, thumbnail_path, width, image_format)
+            except Exception as e:
+                print(f"Warning: Could not create thumbnail for {image_path}: {e}")
+                return image_path
+
+            _thumbnail_paths[key] = thumbnail_path
+            return thumbnail_path
+    finally:
+        with _thumbnail_locks_lock:
+            if _thumbnail_locks.get(key) is key_lock:
+                del _thumbnail_locks[key]
+
+
+def get_thumbnail(exercise: Dict[str, Any], width: int = THUMBNAIL_WIDTH, scale: int = 1) -> str:
+    """Get the thumbnail for an exercise's image at width * scale pixels."""
+    with phase("ensure_image"):
+        image_path = ensure_image(exercise)
+    return thumbnail_for(image_path, width * scale)
+
+
+def warm_thumbnail_cache(image_dir: Optional[str] = None, width: int = THUMBNAIL_WIDTH,
+                         scales: Iterable[int] = THUMBNAIL_SCALES) -> int:
+    """Pre-generate thumbnails for every image in image_dir, returning how many were processed."""
+    image_dir = image_dir or IMAGE_DIR
+    count = 0
+    for filename in sorted(os.listdir(image_dir)):
+        if os.path.splitext(filename)[1].lower() not in ('.png', '.jpg', '.jpeg', '.gif', '.webp'):
+            continue
+        for scale in scales:
+            thumbnail_for(os.path.join(image_dir, filename), width * scale)
+        count += 1
+    return count
+
+
+def main():
+    """Pre-generate the thumbnail cache."""
+    parser = argparse.ArgumentParser(description="Pre-generate exercise image thumbnails.")
+    parser.add_argument("--image-dir", default=IMAGE_DIR, help="Directory of source images.")
+    parser.add_argument("--width", type=int, default=THUMBNAIL_WIDTH, help="Display width in pixels.")
+    args = parser.parse_args()
+
+    if Image is None:
+        print("Pillow is not installed; thumbnails can't be generated.")
+        return
+
+    count = warm_thumbnail_cache(args.image_dir, args.width)
+    print(f"Thumbnails ready for {count} images in {THUMBNAIL_DIR}")
+
+
+if __name__ == "__main__":
+    main()
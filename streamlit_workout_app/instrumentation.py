@@ -0,0 +1,241 @@
+"""Opt-in timing of the app's reruns, phase by phase.
+
+Set WORKOUT_INSTRUMENTATION=1 and every rerun records how long each phase
+took and how many files it opened and stat'ed. Nothing is measured while it
+is off beyond one flag check per phase. The diagnostics page (app.py
+?diagnostics=1), which can also switch it on, is only served with
+WORKOUT_DIAGNOSTICS=1, as its switch applies to every session.
+
+Opens are counted by an audit hook. os.stat raises no audit event, so only
+the stats the app makes through stat() and path_exists(), or reports with
+count_stat() (data_loader's catalog and image lookups), are counted.
+
+Each Streamlit session reruns the script in its own thread, so the rerun
+being measured is kept per thread and only the finished totals are shared.
+Totals go into histograms that keep cumulative bucket counts, for the
+Prometheus export, and the last WINDOW samples, for percentiles of recent
+load on the diagnostics page.
+"""
+import math
+import os
+import sys
+import threading
+import time
+from bisect import bisect_left
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+# Samples kept per histogram for the recent percentiles
+WINDOW = 1000
+SECONDS_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+
+# Phases within a rerun nest: ensure_image runs inside cards, and everything inside rerun
+RERUN_PHASE = "rerun"
+
+
+class Histogram:
+    """Cumulative bucket counts plus a rolling window of the most recent samples."""
+
+    def __init__(self, buckets: Tuple[float, ...], window: int = WINDOW):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # the last one is +Inf
+        self.sum = 0.0
+        self.count = 0
+        self.recent: deque = deque(maxlen=window)
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+        self.recent.append(value)
+
+    def summary(self) -> Dict[str, float]:
+        """Get the mean and nearest-rank percentiles of the recent samples."""
+        values = sorted(self.recent)
+        if not values:
+            return {'samples': 0}
+
+        def rank(fraction: float) -> float:
+            return values[max(0, math.ceil(fraction * len(values)) - 1)]
+
+        return {'samples': len(values), 'mean': sum(values) / len(values), 'p50': rank(0.5), 'p90': rank(0.9),
+                'p99': rank(0.99), 'max': values[-1]}
+
+
+class _Rerun:
+    """What the rerun running on one thread has measured so far."""
+    __slots__ = ('phases', 'opens', 'stats')
+
+    def __init__(self):
+        self.phases: Dict[str, float] = {}
+        self.opens = 0
+        self.stats = 0
+
+
+def _env_flag(name: str) -> bool:
+    return os.environ.get(name, "").strip().lower() not in ("", "0", "false", "no")
+
+
+_enabled = _env_flag("WORKOUT_INSTRUMENTATION")
+# Whether app.py serves the diagnostics page
+DIAGNOSTICS_PAGE = _env_flag("WORKOUT_DIAGNOSTICS")
+_local = threading.local()
+_lock = threading.Lock()
+_phases: Dict[str, Histogram] = {}
+_opens = Histogram(COUNT_BUCKETS)
+_stats = Histogram(COUNT_BUCKETS)
+_audit_hook_installed = False
+
+
+def _current() -> Optional[_Rerun]:
+    return getattr(_local, 'rerun', None)
+
+
+def _audit(event: str, args: Tuple[Any, ...]) -> None:
+    # Audit hooks can't be removed, so this stays installed once enabled and returns early when idle
+    if event == "open":
+        current = getattr(_local, 'rerun', None)
+        if current is not None:
+            current.opens += 1
+
+
+def count_stat() -> None:
+    """Count a file stat made elsewhere against the current rerun."""
+    current = getattr(_local, 'rerun', None)
+    if current is not None:
+        current.stats += 1
+
+
+def stat(path: str) -> os.stat_result:
+    """os.stat, counted against the current rerun."""
+    count_stat()
+    return os.stat(path)
+
+
+def path_exists(path: str) -> bool:
+    """os.path.exists, counted against the current rerun."""
+    count_stat()
+    return os.path.exists(path)
+
+
+def is_enabled() -> bool:
+    return _enabled
+
+
+def set_enabled(enabled: bool) -> None:
+    """Switch instrumentation on or off for the whole process."""
+    global _enabled, _audit_hook_installed
+    with _lock:
+        if enabled and not _audit_hook_installed:
+            sys.addaudithook(_audit)
+            _audit_hook_installed = True
+        _enabled = enabled
+
+
+def _phase_histogram(name: str) -> Histogram:
+    # Callers hold _lock
+    histogram = _phases.get(name)
+    if histogram is None:
+        histogram = _phases[name] = Histogram(SECONDS_BUCKETS)
+    return histogram
+
+
+@contextmanager
+def phase(name: str) -> Iterator[None]:
+    """Time a phase of the current rerun.
+
+    A phase entered several times in one rerun (ensure_image, once per
+    card) is recorded as its total. Outside a rerun, as in a fragment rerun
+    or a download, each call is recorded on its own.
+    """
+    if not _enabled:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        current = _current()
+        if current is not None:
+            current.phases[name] = current.phases.get(name, 0.0) + elapsed
+        else:
+            with _lock:
+                _phase_histogram(name).observe(elapsed)
+
+
+@contextmanager
+def rerun() -> Iterator[None]:
+    """Measure one full rerun of the app, recording its phases when it ends."""
+    if not _enabled or _current() is not None:
+        yield
+        return
+    current = _local.rerun = _Rerun()
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        current.phases[RERUN_PHASE] = time.perf_counter() - start
+        _local.rerun = None
+        with _lock:
+            for name, seconds in current.phases.items():
+                _phase_histogram(name).observe(seconds)
+            _opens.observe(current.opens)
+            _stats.observe(current.stats)
+
+
+def reset() -> None:
+    """Forget everything recorded so far."""
+    global _opens, _stats
+    with _lock:
+        _phases.clear()
+        _opens = Histogram(COUNT_BUCKETS)
+        _stats = Histogram(COUNT_BUCKETS)
+
+
+def snapshot() -> Dict[str, Dict[str, float]]:
+    """Summarise the recent samples: each phase in seconds, then file opens and stats per rerun."""
+    with _lock:
+        summary = {name: histogram.summary() for name, histogram in sorted(_phases.items())}
+        summary['file_opens'] = _opens.summary()
+        summary['file_stats'] = _stats.summary()
+    return summary
+
+
+def _format_value(value: float) -> str:
+    return "+Inf" if value == math.inf else repr(float(value))
+
+
+def _histogram_lines(metric: str, labels: str, histogram: Histogram) -> List[str]:
+    prefix = f"{labels}," if labels else ""
+    lines = []
+    cumulative = 0
+    for bound, count in zip(histogram.buckets + (math.inf,), histogram.counts):
+        cumulative += count
+        lines.append(f'{metric}_bucket{{{prefix}le="{_format_value(bound)}"}} {cumulative}')
+    suffix = f"{{{labels}}}" if labels else ""
+    lines.append(f"{metric}_sum{suffix} {_format_value(histogram.sum)}")
+    lines.append(f"{metric}_count{suffix} {histogram.count}")
+    return lines
+
+
+def prometheus_text() -> str:
+    """Export the cumulative histograms in the Prometheus text exposition format."""
+    with _lock:
+        lines = ["# HELP workout_phase_seconds Time spent in each phase of an app rerun.",
+                 "# TYPE workout_phase_seconds histogram"]
+        for name, histogram in sorted(_phases.items()):
+            lines += _histogram_lines("workout_phase_seconds", f'phase="{name}"', histogram)
+        lines += ["# HELP workout_rerun_file_opens Files opened during one app rerun.",
+                  "# TYPE workout_rerun_file_opens histogram"]
+        lines += _histogram_lines("workout_rerun_file_opens", "", _opens)
+        lines += ["# HELP workout_rerun_file_stats Files stat'ed by the app during one app rerun.",
+                  "# TYPE workout_rerun_file_stats histogram"]
+        lines += _histogram_lines("workout_rerun_file_stats", "", _stats)
+    return "\n".join(lines) + "\n"
+
+
+if _enabled:
+    set_enabled(True)
@@ -1,111 +1,336 @@
+import argparse
 import json
-import streamlit as st
+import sys
 from collections import Counter
+from typing import Any, Dict, Iterator, List, Optional, TextIO
 
+from data_loader import EXERCISES_FILE, parse_duration
 
-def analyze_json_structure():
-    """Analyze the structure of your exercises.json file"""
-    st.title("🔍 JSON Structure Analyzer")
+# The values the app expects
+EXPECTED_EQUIPMENT = ('bodyweight', 'dumbbells')
+EXPECTED_FOCUS = ('full_body', 'upper', 'lower', 'core')
 
-    try:
-        with open('exercises.json', 'r') as f:
-            data = json.load(f)
+# Characters read per chunk; memory stays around one chunk plus the largest single exercise
+CHUNK_SIZE = 1 << 20
+# A value still undecodable after this many characters is treated as corrupt rather than read further
+MAX_VALUE_SIZE = 1 << 26
 
-        st.success("✅ JSON file loaded successfully!")
+_WHITESPACE = ' \t\n\r'
+_decoder = json.JSONDecoder()
 
-        # Show basic info
-        st.subheader("📊 Basic Information")
-        st.write(f"**Data type:** {type(data).__name__}")
 
-        if isinstance(data, dict):
-            st.write(f"**Keys in JSON:** {list(data.keys())}")
-            if 'exercises' in data:
-                exercises = data['exercises']
-                st.write(f"**Number of exercises:** {len(exercises)}")
-            else:
-                st.error("❌ No 'exercises' key found in JSON object")
-                return
-        elif isinstance(data, list):
-            exercises = data
-            st.write(f"**Number of exercises:** {len(exercises)}")
-        else:
-            st.error("❌ JSON is neither a list nor a dict with 'exercises' key")
+class _Stream:
+    """A window over a text file for decoding one JSON value at a time."""
+
+    def __init__(self, f: TextIO, chunk_size: int = CHUNK_SIZE):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.buffer = ""
+        self.pos = 0
+        self.eof = False
+
+    def fill(self) -> bool:
+        """Read another chunk, dropping what has been consumed; False at end of file."""
+        if self.eof:
+            return False
+        chunk = self.f.read(self.chunk_size)
+        if not chunk:
+            self.eof = True
+            return False
+        self.buffer = self.buffer[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self) -> str:
+        """Skip whitespace and get the next character ('' at end of file)."""
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buffer) or not self.fill():
+                return self.buffer[self.pos:self.pos + 1]
+
+    def expect(self, char: str) -> None:
+        if self.peek() != char:
+            self.error(f"Expecting '{char}'")
+        self.pos += 1
+
+    def value(self) -> Any:
+        """Decode the next complete JSON value, reading more of the file as needed."""
+        self.peek()
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError:
+                if len(self.buffer) - self.pos < MAX_VALUE_SIZE and self.fill():
+                    continue
+                raise
+            # A number ending at (or, like "4.5e", just short of) the end of the buffer may continue in
+            # the next chunk; no other value decodes successfully from a truncated buffer
+            if isinstance(value, (int, float)) and len(self.buffer) - end <= 2 and self.fill():
+                continue
+            self.pos = end
+            return value
+
+    def error(self, message: str) -> None:
+        raise json.JSONDecodeError(message, self.buffer, self.pos)
+
+
+def _stream_array(stream: _Stream) -> Iterator[Any]:
+    stream.expect('[')
+    if stream.peek() == ']':
+        return
+    yield stream.value()
+    while stream.peek() != ']':
+        stream.expect(',')
+        yield stream.value()
+
+
+def iter_catalog(f: TextIO, chunk_size: int = CHUNK_SIZE) -> Iterator[Any]:
+    """Yield the exercises of a catalog one at a time without loading the whole file.
+
+    The catalog is either a JSON array of exercises or an object whose
+    'exercises' key holds one; any other keys of the object are skipped.
+    Raises ValueError for any other shape and json.JSONDecodeError for
+    invalid JSON.
+    """
+    stream = _Stream(f, chunk_size)
+    first = stream.peek()
+    if first == '[':
+        yield from _stream_array(stream)
+        return
+    if first != '{':
+        raise ValueError("JSON is neither a list nor a dict with 'exercises' key")
+
+    stream.pos += 1
+    first_key = True
+    while stream.peek() != '}':
+        if not first_key:
+            stream.expect(',')
+        first_key = False
+        key = stream.value()
+        stream.expect(':')
+        if key == 'exercises':
+            if stream.peek() != '[':
+                raise ValueError("'exercises' in the JSON object is not a list")
+            # The rest of the file doesn't matter once the exercises have been read
+            yield from _stream_array(stream)
             return
+        stream.value()
+    raise ValueError("No 'exercises' key found in JSON object")
+
+
+def _label(value: Any) -> str:
+    """Get a countable form of a facet value, which may not be a string in a malformed catalog."""
+    return value if isinstance(value, str) else json.dumps(value)
+
+
+class CatalogProfile:
+    """Statistics of a catalog, gathered in a single pass over its exercises.
 
-        if not exercises:
-            st.error("❌ No exercises found")
+    Memory grows with the number of distinct field names, facet values and
+    muscles, not with the number of exercises.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.non_objects = 0
+        self.first: Optional[Dict[str, Any]] = None
+        self.fields: Counter = Counter()
+        self.equipment: Counter = Counter()
+        self.focus_areas: Counter = Counter()
+        self.muscles: Counter = Counter()
+        self.durations: Counter = Counter()
+        self.bad_durations = 0
+
+    def add(self, exercise: Any) -> None:
+        """Fold one exercise into the statistics."""
+        self.count += 1
+        if not isinstance(exercise, dict):
+            self.non_objects += 1
             return
+        if self.first is None:
+            self.first = exercise
+        self.fields.update(exercise.keys())
+        if 'equipment' in exercise:
+            self.equipment[_label(exercise['equipment'])] += 1
+        if 'focus_area' in exercise:
+            self.focus_areas[_label(exercise['focus_area'])] += 1
+        muscles = exercise.get('muscles_worked')
+        if isinstance(muscles, list):
+            self.muscles.update(_label(muscle) for muscle in muscles)
+        if 'duration' in exercise:
+            duration = parse_duration(exercise['duration'])
+            if duration is None:
+                self.bad_durations += 1
+            else:
+                self.durations[duration] += 1
+
+    def duration_stats(self) -> Dict[str, Any]:
+        """Get min, max, mean and median of the parsed durations (in seconds)."""
+        total = sum(self.durations.values())
+        if not total:
+            return {'count': 0, 'unparseable': self.bad_durations}
+        ordered = sorted(self.durations)
+        seen, median = 0, ordered[-1]
+        for duration in ordered:
+            seen += self.durations[duration]
+            if seen * 2 >= total:
+                median = duration
+                break
+        return {'count': total, 'unparseable': self.bad_durations, 'min': ordered[0], 'max': ordered[-1],
+                'mean': round(sum(d * n for d, n in self.durations.items()) / total, 1), 'median': median}
+
+    def recommendations(self) -> List[str]:
+        """Describe facet values the app doesn't expect."""
+        notes = []
+        unexpected = sorted(set(self.equipment) - set(EXPECTED_EQUIPMENT))
+        if unexpected:
+            notes.append(f"Non-standard equipment values found: {unexpected}. "
+                         f"Consider updating these to {' or '.join(map(repr, EXPECTED_EQUIPMENT))}")
+        unexpected = sorted(set(self.focus_areas) - set(EXPECTED_FOCUS))
+        if unexpected:
+            notes.append(f"Non-standard focus area values found: {unexpected}. "
+                         f"Consider updating these to {', '.join(map(repr, EXPECTED_FOCUS))}")
+        if self.non_objects:
+            notes.append(f"{self.non_objects} entries are not JSON objects")
+        if self.bad_durations:
+            notes.append(f"{self.bad_durations} exercises have a duration that isn't a positive number of seconds")
+        return notes
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Get the profile as plain JSON data."""
+        return {
+            'exercises': self.count,
+            'fields': dict(self.fields.most_common()),
+            'equipment': dict(self.equipment.most_common()),
+            'focus_areas': dict(self.focus_areas.most_common()),
+            'muscles': dict(self.muscles.most_common()),
+            'duration': self.duration_stats(),
+            'recommendations': self.recommendations(),
+        }
 
-        # Analyze first exercise
-        st.subheader("🔬 First Exercise Analysis")
-        first_exercise = exercises[0]
-        st.write("**Structure of first exercise:**")
-        st.json(first_exercise)
-
-        # Show all available fields
-        st.subheader("📋 Available Fields")
-        all_fields = set()
-        for exercise in exercises:
-            if isinstance(exercise, dict):
-                all_fields.update(exercise.keys())
-
-        st.write(f"**All fields found across exercises:** {sorted(all_fields)}")
-
-        # Analyze equipment values
-        if 'equipment' in all_fields:
-            equipment_values = []
-            for exercise in exercises:
-                if 'equipment' in exercise:
-                    equipment_values.append(exercise['equipment'])
-
-            equipment_counts = Counter(equipment_values)
-            st.subheader("🏋️ Equipment Analysis")
-            st.write("**Equipment values found:**")
-            for equipment, count in equipment_counts.items():
-                st.write(f"- '{equipment}': {count} exercises")
-
-        # Analyze focus_area values
-        if 'focus_area' in all_fields:
-            focus_values = []
-            for exercise in exercises:
-                if 'focus_area' in exercise:
-                    focus_values.append(exercise['focus_area'])
-
-            focus_counts = Counter(focus_values)
-            st.subheader("🎯 Focus Area Analysis")
-            st.write("**Focus area values found:**")
-            for focus, count in focus_counts.items():
-                st.write(f"- '{focus}': {count} exercises")
-
-        # Show what the app expects
-        st.subheader("⚠️ Expected Values")
-        st.write("**The app expects these exact values:**")
-        st.write("**Equipment:** 'bodyweight', 'dumbbells'")
-        st.write("**Focus Area:** 'full_body', 'upper', 'lower', 'core'")
-
-        # Check for mismatches
-        st.subheader("🔧 Recommendations")
-        if 'equipment' in all_fields:
-            equipment_values = set(ex.get('equipment') for ex in exercises if 'equipment' in ex)
-            expected_equipment = {'bodyweight', 'dumbbells'}
-            if not equipment_values.issubset(expected_equipment):
-                st.warning(f"❌ Non-standard equipment values found: {equipment_values - expected_equipment}")
-                st.write("Consider updating these to 'bodyweight' or 'dumbbells'")
-
-        if 'focus_area' in all_fields:
-            focus_values = set(ex.get('focus_area') for ex in exercises if 'focus_area' in ex)
-            expected_focus = {'full_body', 'upper', 'lower', 'core'}
-            if not focus_values.issubset(expected_focus):
-                st.warning(f"❌ Non-standard focus area values found: {focus_values - expected_focus}")
-                st.write("Consider updating these to 'full_body', 'upper', 'lower', or 'core'")
 
+def profile_catalog(path: Optional[str] = None, chunk_size: int = CHUNK_SIZE) -> CatalogProfile:
+    """Stream a catalog file into a CatalogProfile."""
+    profile = CatalogProfile()
+    with open(path or EXERCISES_FILE, 'r', encoding='utf-8') as f:
+        for exercise in iter_catalog(f, chunk_size):
+            profile.add(exercise)
+    return profile
+
+
+def format_profile(profile: CatalogProfile) -> str:
+    """Render a profile as plain text."""
+    def counts(title: str, counter: Counter) -> List[str]:
+        return [f"{title}:"] + [f"  {value}: {count}" for value, count in counter.most_common()]
+
+    lines = [f"Exercises: {profile.count}"]
+    lines += counts("Fields", profile.fields)
+    lines += counts("Equipment", profile.equipment)
+    lines += counts("Focus areas", profile.focus_areas)
+    lines += counts("Muscles", profile.muscles)
+    duration = profile.duration_stats()
+    if duration['count']:
+        lines.append(f"Duration: {duration['min']}-{duration['max']} s, mean {duration['mean']} s, "
+                     f"median {duration['median']} s")
+    lines += [f"Warning: {note}" for note in profile.recommendations()]
+    return "\n".join(lines)
+
+
+def analyze_json_structure(path: Optional[str] = None):
+    """Analyze the structure of your exercises.json file"""
+    import streamlit as st
+
+    st.title("🔍 JSON Structure Analyzer")
+
+    try:
+        profile = profile_catalog(path)
     except FileNotFoundError:
         st.error("❌ exercises.json file not found")
+        return
     except json.JSONDecodeError as e:
         st.error(f"❌ JSON parsing error: {e}")
-    except Exception as e:
-        st.error(f"❌ Unexpected error: {e}")
+        return
+    except ValueError as e:
+        st.error(f"❌ {e}")
+        return
+
+    st.success("✅ JSON file loaded successfully!")
+
+    # Show basic info
+    st.subheader("📊 Basic Information")
+    st.write(f"**Number of exercises:** {profile.count}")
+    if profile.first is None:
+        st.error("❌ No exercises found")
+        return
+
+    # Analyze first exercise
+    st.subheader("🔬 First Exercise Analysis")
+    st.write("**Structure of first exercise:**")
+    st.json(profile.first)
+
+    # Show all available fields
+    st.subheader("📋 Available Fields")
+    st.write(f"**All fields found across exercises:** {sorted(profile.fields)}")
+
+    if profile.equipment:
+        st.subheader("🏋️ Equipment Analysis")
+        st.write("**Equipment values found:**")
+        for equipment, count in profile.equipment.items():
+            st.write(f"- '{equipment}': {count} exercises")
+
+    if profile.focus_areas:
+        st.subheader("🎯 Focus Area Analysis")
+        st.write("**Focus area values found:**")
+        for focus, count in profile.focus_areas.items():
+            st.write(f"- '{focus}': {count} exercises")
+
+    if profile.muscles:
+        st.subheader("💪 Muscle Analysis")
+        st.write(", ".join(f"{muscle} ({count})" for muscle, count in profile.muscles.most_common()))
+
+    duration = profile.duration_stats()
+    if duration['count']:
+        st.subheader("⏱️ Duration Analysis")
+        st.write(f"**Range:** {duration['min']}-{duration['max']} seconds, mean {duration['mean']}, "
+                 f"median {duration['median']}")
+
+    # Show what the app expects
+    st.subheader("⚠️ Expected Values")
+    st.write("**The app expects these exact values:**")
+    st.write(f"**Equipment:** {', '.join(map(repr, EXPECTED_EQUIPMENT))}")
+    st.write(f"**Focus Area:** {', '.join(map(repr, EXPECTED_FOCUS))}")
+
+    # Check for mismatches
+    st.subheader("🔧 Recommendations")
+    for note in profile.recommendations():
+        st.warning(f"❌ {note}")
+
+
+def _running_in_streamlit() -> bool:
+    if 'streamlit' not in sys.modules:
+        return False
+    from streamlit import runtime
+    return runtime.exists()
+
+
+def main():
+    """Profile a catalog from the command line."""
+    parser = argparse.ArgumentParser(description="Profile an exercise catalog in one streaming pass.")
+    parser.add_argument("path", nargs='?', default=EXERCISES_FILE, help="Catalog JSON file.")
+    parser.add_argument("--json", action="store_true", help="Print the profile as JSON.")
+    args = parser.parse_args()
+
+    try:
+        profile = profile_catalog(args.path)
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+    print(json.dumps(profile.to_dict(), indent=2) if args.json else format_profile(profile))
 
 
 if __name__ == "__main__":
-    analyze_json_structure()
\ No newline at end of file
+    if _running_in_streamlit():
+        analyze_json_structure()
+    else:
+        main()
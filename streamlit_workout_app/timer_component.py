@@ -0,0 +1,23 @@
+import os
+from typing import Any, Dict, Optional
+
+import streamlit.components.v1 as components
+
+# Static frontend: a single HTML file, served by Streamlit without a build step
+FRONTEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "timer_frontend")
+
+_countdown_timer = components.declare_component("countdown_timer", path=FRONTEND_DIR)
+
+
+def countdown_timer(remaining_seconds: float, running: bool, token: str, low_threshold: int = 5,
+                    key: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """Render a countdown that ticks in the browser.
+
+    The browser counts down from remaining_seconds on its own clock and only
+    contacts the server when it reaches zero, returning
+    {"event": "completed", "token": token}. Because a component keeps its
+    last value across reruns, callers must compare the token with the run
+    they are currently displaying.
+    """
+    return _countdown_timer(remaining=remaining_seconds, running=running, token=token,
+                            low_threshold=low_threshold, key=key, default=None)
@@ -0,0 +1,181 @@
+import csv
+import hashlib
+import io
+import json
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, NamedTuple, Sequence, TextIO, Tuple
+
+from data_loader import Exercise
+
+# Rest between exercises, matching calculate_workout_duration() in data_loader
+REST_SECONDS = 10
+EXPORT_CACHE_SIZE = 128
+
+
+class ExportFormat(NamedTuple):
+    """How to label, name and write one export format."""
+    label: str
+    extension: str
+    mime: str
+    writer: Callable[[Sequence[Exercise], TextIO, datetime], None]
+    timestamped: bool = True  # the output depends on when it is generated, so it isn't memoized
+
+
+def write_text(workout: Sequence[Exercise], out: TextIO, generated_at: datetime) -> None:
+    """Write the workout as the plain-text plan."""
+    out.write("Your 10-Minute Workout Plan\n" + "=" * 50 + "\n\n")
+    out.write(f"Generated on: {generated_at.strftime('%Y-%m-%d %H:%M:%S')}\n\n")
+
+    for i, exercise in enumerate(workout, 1):
+        out.write(f"{i}. {exercise.name}\n")
+        out.write(f"Duration: {exercise.duration_text}\n")
+        out.write(f"Equipment: {exercise.equipment_label}\n")
+        out.write(f"Focus Area: {exercise.focus_label}\n")
+        out.write(f"Muscles: {exercise.muscles_text}\n")
+        out.write(f"Description: {exercise.description}\n\n")
+
+        out.write("Instructions:\n")
+        for j, instruction in enumerate(exercise.instructions, 1):
+            out.write(f"  {j}. {instruction}\n")
+
+        out.write("\nTips:\n")
+        for tip in exercise.tips:
+            out.write(f"  • {tip}\n")
+
+        out.write("\n" + "-" * 50 + "\n\n")
+
+
+def write_markdown(workout: Sequence[Exercise], out: TextIO, generated_at: datetime) -> None:
+    """Write the workout as a Markdown document."""
+    out.write("# Your 10-Minute Workout Plan\n\n")
+    out.write(f"_Generated on {generated_at.strftime('%Y-%m-%d %H:%M:%S')}_\n")
+
+    for i, exercise in enumerate(workout, 1):
+        out.write(f"\n## {i}. {exercise.name}\n\n")
+        out.write(f"- **Duration:** {exercise.duration_text}\n")
+        out.write(f"- **Equipment:** {exercise.equipment_label}\n")
+        out.write(f"- **Focus Area:** {exercise.focus_label}\n")
+        out.write(f"- **Muscles:** {exercise.muscles_text}\n\n")
+        out.write(f"{exercise.description}\n\n")
+
+        out.write("### Instructions\n\n")
+        for j, instruction in enumerate(exercise.instructions, 1):
+            out.write(f"{j}. {instruction}\n")
+
+        out.write("\n### Tips\n\n")
+        for tip in exercise.tips:
+            out.write(f"- {tip}\n")
+
+
+def write_json(workout: Sequence[Exercise], out: TextIO, generated_at: datetime) -> None:
+    """Write the workout as a JSON document."""
+    total_seconds = sum(exercise.duration for exercise in workout)
+    total_seconds += max(0, len(workout) - 1) * REST_SECONDS
+    json.dump({
+        'generated_at': generated_at.isoformat(timespec='seconds'),
+        'total_duration_seconds': total_seconds,
+        'exercises': [dict(exercise) for exercise in workout],
+    }, out, indent=2, ensure_ascii=False)
+    out.write("\n")
+
+
+def write_csv(workout: Sequence[Exercise], out: TextIO, generated_at: datetime) -> None:
+    """Write one CSV row per exercise."""
+    writer = csv.writer(out)
+    writer.writerow(['order', 'name', 'duration_seconds', 'equipment', 'focus_area', 'muscles_worked',
+                     'description'])
+    for i, exercise in enumerate(workout, 1):
+        writer.writerow([i, exercise.name, exercise.duration, exercise.equipment, exercise.focus_area,
+                         '; '.join(exercise.muscles_worked), exercise.description])
+
+
+def _ical_escape(text: str) -> str:
+    """Escape a value for an iCalendar TEXT property."""
+    return (text.replace('\\', '\\\\').replace(';', '\\;').replace(',', '\\,')
+            .replace('\r\n', '\\n').replace('\n', '\\n'))
+
+
+def _write_ical_line(out: TextIO, line: str) -> None:
+    """Write a content line, folded at 75 octets as RFC 5545 requires."""
+    encoded = line.encode('utf-8')
+    while len(encoded) > 75:
+        cut = 75
+        # Don't split a multi-byte character
+        while (encoded[cut] & 0xC0) == 0x80:
+            cut -= 1
+        out.write(encoded[:cut].decode('utf-8') + "\r\n ")
+        encoded = encoded[cut:]
+    out.write(encoded.decode('utf-8') + "\r\n")
+
+
+def write_ical(workout: Sequence[Exercise], out: TextIO, generated_at: datetime) -> None:
+    """Write the workout as an iCalendar file with one event per exercise, starting now."""
+    stamp_format = '%Y%m%dT%H%M%SZ'
+    start = generated_at.astimezone(timezone.utc).replace(microsecond=0)
+    stamp = start.strftime(stamp_format)
+    uid_base = workout_identity(workout)
+
+    _write_ical_line(out, "BEGIN:VCALENDAR")
+    _write_ical_line(out, "VERSION:2.0")
+    _write_ical_line(out, "PRODID:-//Personal Productivity Lab//Workout Generator//EN")
+    for i, exercise in enumerate(workout, 1):
+        end = start + timedelta(seconds=exercise.duration)
+        _write_ical_line(out, "BEGIN:VEVENT")
+        _write_ical_line(out, f"UID:{uid_base}-{i}@workout-generator")
+        _write_ical_line(out, f"DTSTAMP:{stamp}")
+        _write_ical_line(out, f"DTSTART:{start.strftime(stamp_format)}")
+        _write_ical_line(out, f"DTEND:{end.strftime(stamp_format)}")
+        _write_ical_line(out, f"SUMMARY:{_ical_escape(f'{i}. ' + exercise.name)}")
+        _write_ical_line(out, f"DESCRIPTION:{_ical_escape(exercise.description)}")
+        _write_ical_line(out, "END:VEVENT")
+        start = end + timedelta(seconds=REST_SECONDS)
+    _write_ical_line(out, "END:VCALENDAR")
+
+
+EXPORT_FORMATS: Dict[str, ExportFormat] = {
+    'txt': ExportFormat("Text", "txt", "text/plain", write_text),
+    'md': ExportFormat("Markdown", "md", "text/markdown", write_markdown),
+    'json': ExportFormat("JSON", "json", "application/json", write_json),
+    'ics': ExportFormat("Calendar (iCal)", "ics", "text/calendar", write_ical),
+    'csv': ExportFormat("CSV", "csv", "text/csv", write_csv, timestamped=False),
+}
+
+# (workout identity, format) -> encoded export of an untimestamped format, most recently used last
+_export_cache: "OrderedDict[Tuple[str, str], bytes]" = OrderedDict()
+_export_lock = threading.Lock()
+
+
+def workout_identity(workout: Sequence[Dict[str, Any]]) -> str:
+    """Get a stable hash identifying a workout's content."""
+    payload = json.dumps(list(workout), sort_keys=True, ensure_ascii=False, default=dict)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+
+def export_workout(workout: Sequence[Dict[str, Any]], export_format: str = 'txt') -> bytes:
+    """Render a workout (records or plain exercise dicts) in the given format.
+
+    Formats that don't include the time of export are memoized per workout
+    identity; timestamped ones (the generated-on headers, calendar events
+    starting now) are rendered afresh on every call.
+    """
+    spec = EXPORT_FORMATS[export_format]
+    key = None if spec.timestamped else (workout_identity(workout), export_format)
+    if key is not None:
+        with _export_lock:
+            cached = _export_cache.get(key)
+            if cached is not None:
+                _export_cache.move_to_end(key)
+                return cached
+
+    out = io.StringIO()
+    spec.writer([Exercise.from_dict(exercise) for exercise in workout], out, datetime.now().astimezone())
+    data = out.getvalue().encode('utf-8')
+
+    if key is not None:
+        with _export_lock:
+            _export_cache[key] = data
+            while len(_export_cache) > EXPORT_CACHE_SIZE:
+                _export_cache.popitem(last=False)
+    return data
@@ -0,0 +1,28 @@
+import json
+import os
+import sys
+
+import pytest
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+# The apps are run as scripts from their own directories, so their modules import each other by bare name
+sys.path.insert(0, os.path.join(PROJECT_ROOT, 'streamlit_workout_app'))
+sys.path.insert(0, os.path.join(PROJECT_ROOT, 'pomodoro_timer'))
+
+
+@pytest.fixture
+def catalog_file(tmp_path, monkeypatch):
+    """Point data_loader at an empty catalog file in tmp_path; write exercises to it with write(exercises)."""
+    import data_loader
+
+    path = tmp_path / "exercises.json"
+    monkeypatch.setattr(data_loader, 'EXERCISES_FILE', str(path))
+    monkeypatch.setattr(data_loader, 'STORAGE_BACKEND', "json")
+
+    def write(exercises):
+        path.write_text(json.dumps(exercises), encoding='utf-8')
+        data_loader.clear_catalog_cache()
+        return str(path)
+
+    yield write
+    data_loader.clear_catalog_cache()
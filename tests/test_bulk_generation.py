@@ -0,0 +1,49 @@
+import io
+import json
+
+import data_loader
+
+
+def _exercise(i):
+    return {'name': f"Exercise {i}", 'description': "", 'instructions': ["Move"], 'muscles_worked': ["Core"],
+            'equipment': ('bodyweight', 'dumbbells')[i % 2], 'focus_area': 'core', 'duration': 30}
+
+
+def _generate(requests, **kwargs):
+    out = io.StringIO()
+    count = data_loader.generate_workouts_bulk(requests, out, **kwargs)
+    return count, [json.loads(line) for line in out.getvalue().splitlines()]
+
+
+def test_one_valid_line_per_request_skipping_bad_input(catalog_file):
+    catalog_file([_exercise(i) for i in range(30)])
+    lines = ['{"user": "ana", "equipment": "dumbbells", "seed": 1}', '', 'not json', '{"equipment": "all"}',
+             '{"user": 7, "focus_area": "core"}']
+
+    count, plans = _generate(data_loader.read_workout_requests(lines), chunk_size=2)
+
+    assert count == len(plans) == 2
+    assert [(plan['user'], plan['equipment'], plan['focus_area'], plan['seed']) for plan in plans] == \
+        [("ana", "dumbbells", "all", 1), ("7", "all", "core", None)]
+    assert all(int(name.split()[1]) % 2 == 1 for name in plans[0]['exercises'])
+    assert plans[1]['exercises']
+
+
+def test_seeded_requests_are_reproducible(catalog_file):
+    catalog_file([_exercise(i) for i in range(30)])
+    requests = [data_loader.WorkoutRequest(f"user{i}", seed=i % 5) for i in range(20)]
+
+    _, first = _generate(requests, chunk_size=3)
+    _, second = _generate(requests, chunk_size=7)
+    _, pooled = _generate(requests, workers=2, chunk_size=4)
+
+    assert first == second == pooled
+    assert first[0]['exercises'] == first[5]['exercises']
+
+
+def test_unmatched_filters_fall_back_to_the_whole_catalog(catalog_file):
+    catalog_file([_exercise(i) for i in range(30)])
+
+    _, plans = _generate([data_loader.WorkoutRequest("ana", equipment="kettlebell", seed=3)])
+
+    assert plans[0]['exercises']
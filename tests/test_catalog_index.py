@@ -0,0 +1,47 @@
+import data_loader
+
+
+def _exercise(name, equipment='bodyweight'):
+    return data_loader.Exercise.from_dict({
+        'name': name, 'description': "", 'instructions': ["Move"], 'muscles_worked': ["Core"],
+        'equipment': equipment, 'focus_area': 'core', 'duration': 30})
+
+
+def test_extending_leaves_the_earlier_index_unchanged():
+    index = data_loader.build_catalog_index([_exercise("Push-Up"), _exercise("Plank")])
+
+    extended = data_loader.extend_catalog_index(index, [_exercise("Kettlebell Swing", 'kettlebell')])
+
+    assert data_loader.query_exercise_ids(extended, 'kettlebell') == [2]
+    assert data_loader.find_exercise_ids_by_prefix(extended, "kettle") == [2]
+    assert extended.equipment_types == ('bodyweight', 'kettlebell')
+    assert data_loader.query_exercise_ids(index, 'kettlebell') == []
+    assert data_loader.find_exercise_ids_by_prefix(index, "kettle") == []
+    assert data_loader.find_exercise_ids_by_name(index, "kettlebell swing") == []
+    assert index.equipment_types == ('bodyweight',)
+
+
+def test_extending_an_already_extended_index_branches():
+    index = data_loader.build_catalog_index([_exercise("Push-Up")])
+    first = data_loader.extend_catalog_index(index, [_exercise("Plank")])
+
+    second = data_loader.extend_catalog_index(index, [_exercise("Squat")])
+
+    assert data_loader.find_exercise_ids_by_name(first, "plank") == [1]
+    assert data_loader.find_exercise_ids_by_name(first, "squat") == []
+    assert data_loader.find_exercise_ids_by_name(second, "squat") == [1]
+    assert data_loader.find_exercise_ids_by_name(second, "plank") == []
+
+
+def test_one_at_a_time_matches_a_single_build():
+    exercises = [_exercise(f"Move {i}", ('bodyweight', 'dumbbells')[i % 2]) for i in range(50)]
+    index = data_loader.build_catalog_index([])
+    for exercise in exercises:
+        index = data_loader.extend_catalog_index(index, [exercise])
+
+    built = data_loader.build_catalog_index(exercises)
+
+    assert index.sorted_names == built.sorted_names
+    assert index.equipment == built.equipment
+    assert data_loader.find_exercise_ids_by_prefix(index, "move 1", limit=20) == \
+        data_loader.find_exercise_ids_by_prefix(built, "move 1", limit=20)
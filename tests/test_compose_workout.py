@@ -0,0 +1,43 @@
+import random
+import time
+
+import data_loader
+
+
+def _exercise(i, duration):
+    return {'name': f"Exercise {i}", 'description': "", 'instructions': ["Move"], 'muscles_worked': ["Core"],
+            'equipment': 'bodyweight', 'focus_area': 'core', 'duration': duration}
+
+
+def test_compose_from_wide_duration_catalog_is_fast_and_fills_target(catalog_file):
+    rng = random.Random(0)
+    catalog_file([_exercise(i, rng.randint(10, 300)) for i in range(20000)])
+    data_loader.load_all_exercises()
+
+    for target in (600, 1800, 3600):
+        start = time.perf_counter()
+        workout = data_loader.compose_workout(target, seed=target)
+        elapsed = time.perf_counter() - start
+
+        assert elapsed < 0.1
+        total = data_loader.calculate_workout_duration(workout)
+        assert target - 10 <= total <= target
+        assert len(workout) >= data_loader.COMPOSE_MIN_EXERCISES
+        assert len({exercise.name for exercise in workout}) == len(workout)
+
+
+def test_compose_fills_exactly_with_few_durations(catalog_file):
+    catalog_file([_exercise(i, duration) for i, duration in enumerate([30] * 6 + [45] * 9 + [60])])
+
+    workout = data_loader.compose_workout(300, seed=1)
+
+    assert data_loader.calculate_workout_duration(workout) == 300
+
+
+def test_compose_is_reproducible_with_seed(catalog_file):
+    rng = random.Random(1)
+    catalog_file([_exercise(i, rng.randint(10, 300)) for i in range(500)])
+
+    first = data_loader.compose_workout(900, seed=7)
+    assert [exercise.name for exercise in data_loader.compose_workout(900, seed=7)] == \
+        [exercise.name for exercise in first]
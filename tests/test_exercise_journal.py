@@ -0,0 +1,39 @@
+import json
+
+import data_loader
+
+
+def _exercise(name, **extra):
+    return dict({'name': name, 'description': "", 'instructions': ["Move"], 'muscles_worked': ["Core"],
+                 'equipment': 'bodyweight', 'focus_area': 'core', 'duration': 30}, **extra)
+
+
+def test_compaction_keeps_records_as_stored(catalog_file):
+    path = catalog_file([_exercise("Plank", coach_note="Brace"), {'name': "No fields"}])
+    # The second line repeats a catalog name, so the load skips it and so must compaction
+    with open(data_loader.get_journal_path(path), 'a', encoding='utf-8') as f:
+        for exercise in (_exercise("Dead Bug", video="https://example.com/dead-bug"), _exercise("plank")):
+            f.write(json.dumps(exercise) + "\n")
+    version = data_loader.catalog_version()
+
+    assert data_loader.compact_exercise_journal()
+
+    with open(path, encoding='utf-8') as f:
+        assert json.load(f) == [_exercise("Plank", coach_note="Brace"), {'name': "No fields"},
+                                _exercise("Dead Bug", video="https://example.com/dead-bug")]
+    data_loader.clear_catalog_cache()
+    assert data_loader.catalog_version() == version
+
+
+def test_compaction_never_overwrites_an_unreadable_catalog(catalog_file):
+    path = catalog_file([])
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('[{"name": "Plank", ')
+    data_loader.clear_catalog_cache()
+    data_loader.save_custom_exercises([_exercise("Dead Bug")])
+
+    assert not data_loader.compact_exercise_journal()
+
+    with open(path, encoding='utf-8') as f:
+        assert f.read() == '[{"name": "Plank", '
+    assert data_loader.get_catalog_snapshot().journal_entries == 1
@@ -0,0 +1,16 @@
+import pytest
+
+import data_loader
+
+
+@pytest.mark.parametrize("duration, seconds", [(45, 45), ("45", 45), ("45 seconds", 45), (45.0, 45),
+                                               (45.5, None), (0, None), (True, None), ("soon", None), (None, None)])
+def test_parse_duration(duration, seconds):
+    assert data_loader.parse_duration(duration) == seconds
+
+
+def test_integral_float_durations_load_as_given(catalog_file):
+    catalog_file([{'name': "Plank", 'description': "", 'instructions': ["Hold"], 'muscles_worked': ["Core"],
+                   'equipment': 'bodyweight', 'focus_area': 'core', 'duration': 45.0}])
+
+    assert data_loader.load_all_exercises()[0].duration == 45
@@ -0,0 +1,36 @@
+import difflib
+
+import data_loader
+
+
+def _difflib_match(index, name):
+    key = data_loader.image_match_key(name)
+    close = difflib.get_close_matches(key, list(index.keys), n=1, cutoff=data_loader.IMAGE_MATCH_CUTOFF)
+    return index.keys.get(key) or (index.keys[close[0]] if close else data_loader.PLACEHOLDER_IMAGE)
+
+
+def test_prefiltered_match_agrees_with_difflib():
+    index = data_loader.get_image_index()
+    names = ["Dumbell Squats", "Wall sits", "Side Plank!", "Triceps dip", "bird dog", "Mountain Climber (slow)",
+             "Squat Variation 12", "Jumping Jacks", "Ünïcödé Plank", ""]
+
+    assert [data_loader._match_image(index, name) for name in names] == \
+        [_difflib_match(index, name) for name in names]
+
+
+def test_match_cache_is_bounded(monkeypatch):
+    monkeypatch.setattr(data_loader, 'IMAGE_MATCH_CACHE_SIZE', 8)
+    for i in range(50):
+        data_loader.ensure_image({'name': f"Squat Variation {i}"})
+
+    assert len(data_loader._image_matches) == 8
+    assert "Squat Variation 49" in data_loader._image_matches
+
+
+def test_resolve_image_agrees_with_ensure_image():
+    index = data_loader.get_image_index()
+    exercises = [{'name': "Dumbell Squats"}, {'name': "Wall sits"}, {'name': "Squat Variation 3"},
+                 {'name': "Plank", 'image': "missing.png"}, {'name': "Plank", 'image': "placeholder.png"}]
+
+    assert [data_loader.resolve_image(index, exercise) for exercise in exercises] == \
+        [data_loader.ensure_image(exercise) for exercise in exercises]
@@ -0,0 +1,87 @@
+import json
+
+import pytest
+
+import data_loader
+
+
+def test_plan_id_round_trips():
+    plan_id = data_loader.make_plan_id(12345, "bodyweight", "core", 600, 10)
+
+    plan = data_loader.parse_plan_id(plan_id)
+
+    assert (plan.seed, plan.equipment, plan.focus_area, plan.target_seconds, plan.rest_seconds) == \
+        (12345, "bodyweight", "core", 600, 10)
+
+
+@pytest.mark.parametrize("generator", ["c36000-10", "c0-10", "c600-100000", "c600--5"])
+def test_parse_rejects_generator_parameters_make_plan_id_would_not_emit(generator):
+    with pytest.raises(ValueError):
+        data_loader.parse_plan_id(f"0123456789ab:1:{generator}:all:all")
+
+
+def test_parse_rejects_oversized_seed():
+    with pytest.raises(ValueError):
+        data_loader.parse_plan_id(f"0123456789ab:{'z' * 20}:r:all:all")
+
+
+def test_make_rejects_target_over_limit():
+    with pytest.raises(ValueError):
+        data_loader.make_plan_id(1, target_seconds=data_loader.MAX_PLAN_TARGET_SECONDS + 1)
+
+
+def _exercises(names):
+    return [{'name': name, 'description': "", 'instructions': ["Move"], 'muscles_worked': ["Core"],
+             'equipment': 'bodyweight', 'focus_area': 'core', 'duration': 30} for name in names]
+
+
+def test_plan_survives_appended_exercises(catalog_file):
+    path = catalog_file(_exercises(f"Exercise {i}" for i in range(8)))
+    plan_id = data_loader.make_plan_id(5)
+    exercise_ids = data_loader.plan_exercise_ids(plan_id)
+    names = [exercise.name for exercise in data_loader.resolve_workout(plan_id, exercise_ids)]
+
+    assert data_loader.save_custom_exercise(_exercises(["Saved Here"])[0])
+    # Another process appending to the journal
+    with open(data_loader.get_journal_path(path), 'a', encoding='utf-8') as f:
+        f.write(json.dumps(_exercises(["Saved Elsewhere"])[0]) + "\n")
+
+    assert [exercise.name for exercise in data_loader.resolve_workout(plan_id, exercise_ids)] == names
+
+
+def test_plan_is_invalidated_when_ids_move(catalog_file):
+    path = catalog_file(_exercises(f"Exercise {i}" for i in range(8)))
+    plan_id = data_loader.make_plan_id(5)
+    exercise_ids = data_loader.plan_exercise_ids(plan_id)
+
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(_exercises(f"Exercise {i}" for i in reversed(range(9))), f)
+
+    with pytest.raises(ValueError):
+        data_loader.resolve_workout(plan_id, exercise_ids)
+
+
+@pytest.mark.parametrize("restart", [False, True])
+def test_older_plan_regenerates_alike_with_a_cold_cache(catalog_file, restart):
+    catalog_file(_exercises(f"Exercise {i}" for i in range(12)))
+    plan_ids = [data_loader.make_plan_id(seed, target_seconds=150) for seed in range(5)] + [data_loader.make_plan_id(9)]
+    expected = [data_loader.plan_exercise_ids(plan_id) for plan_id in plan_ids]
+
+    assert data_loader.save_custom_exercises(_exercises(f"Appended {i}" for i in range(6))) == 6
+    data_loader._plan_exercise_ids.cache_clear()
+    if restart:
+        data_loader.clear_catalog_cache()
+
+    assert [data_loader.plan_exercise_ids(plan_id) for plan_id in plan_ids] == expected
+
+
+def test_cached_plan_is_rejected_once_ids_move(catalog_file):
+    path = catalog_file(_exercises(f"Exercise {i}" for i in range(8)))
+    plan_id = data_loader.make_plan_id(5)
+    data_loader.plan_exercise_ids(plan_id)
+
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(_exercises(f"Exercise {i}" for i in reversed(range(9))), f)
+
+    with pytest.raises(ValueError):
+        data_loader.plan_exercise_ids(plan_id)
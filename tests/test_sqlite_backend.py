@@ -0,0 +1,87 @@
+import sqlite3
+
+import pytest
+
+import data_loader
+
+MUSCLES = ["Core", "Glutes", "Quadriceps", "Shoulders"]
+
+
+def _exercise(i):
+    return {'name': f"Exercise {i}", 'description': "", 'instructions': ["Move"],
+            'muscles_worked': [MUSCLES[i % 4], MUSCLES[(i * 3 + 1) % 4]],
+            'equipment': ('bodyweight', 'dumbbells')[i % 2], 'focus_area': ('core', 'lower', 'upper')[i % 3],
+            'duration': 30 + i % 4 * 15}
+
+
+@pytest.fixture
+def sqlite_file(catalog_file, tmp_path, monkeypatch):
+    """Write the same catalog as JSON and SQLite; returns the database path, with the JSON backend active."""
+    json_file = catalog_file([_exercise(i) for i in range(40)])
+    path = str(tmp_path / "exercises.db")
+    monkeypatch.setattr(data_loader, 'SQLITE_FILE', path)
+    assert data_loader.migrate_json_to_sqlite(json_file, path) == 40
+    return path
+
+
+def _in_both_backends(monkeypatch, query):
+    json_result = query()
+    monkeypatch.setattr(data_loader, 'STORAGE_BACKEND', "sqlite")
+    try:
+        return json_result, query()
+    finally:
+        monkeypatch.setattr(data_loader, 'STORAGE_BACKEND', "json")
+
+
+def test_connecting_creates_the_schema(tmp_path):
+    path = str(tmp_path / "new.db")
+    data_loader._sqlite_connection(path)
+
+    names = {row[0] for row in sqlite3.connect(path).execute("SELECT name FROM sqlite_master")}
+    assert {"exercises", "exercise_muscles", "idx_exercises_equipment_focus",
+            "idx_exercise_muscles_exercise"} <= names
+
+
+def test_migration_fills_the_muscle_join_table(sqlite_file):
+    rows = sqlite3.connect(sqlite_file).execute(
+        "SELECT e.name, m.muscle FROM exercise_muscles m JOIN exercises e ON e.id = m.exercise_id "
+        "WHERE e.name = 'Exercise 1'").fetchall()
+
+    assert sorted(muscle for _, muscle in rows) == sorted(_exercise(1)['muscles_worked'])
+
+
+def test_muscle_queries_match_any_or_all(sqlite_file, monkeypatch):
+    monkeypatch.setattr(data_loader, 'STORAGE_BACKEND', "sqlite")
+    expected_any = [f"Exercise {i}" for i in range(40) if {"Core", "Glutes"} & set(_exercise(i)['muscles_worked'])]
+    expected_all = [f"Exercise {i}" for i in range(40) if {"Core", "Glutes"} <= set(_exercise(i)['muscles_worked'])]
+
+    assert [e.name for e in data_loader.query_exercises(muscles=["Core", "Glutes"])] == expected_any
+    assert [e.name for e in data_loader.query_exercises(muscles=["Core", "Glutes"], match_all_muscles=True)] == \
+        expected_all
+    assert expected_all
+
+
+@pytest.mark.parametrize("query", [
+    dict(),
+    dict(equipment="dumbbells"),
+    dict(equipment="dumbbells", focus_area=["core", "upper"]),
+    dict(muscles="Shoulders"),
+    dict(focus_area="lower", muscles=["Core", "Quadriceps"], match_all_muscles=True),
+    dict(equipment="kettlebell"),
+])
+def test_facet_queries_agree_with_json(sqlite_file, monkeypatch, query):
+    json_result, sqlite_result = _in_both_backends(
+        monkeypatch, lambda: [dict(exercise) for exercise in data_loader.query_exercises(**query)])
+
+    assert json_result == sqlite_result
+
+
+def test_catalog_helpers_agree_with_json(sqlite_file, monkeypatch):
+    def helpers():
+        return (data_loader.get_equipment_types(), data_loader.get_focus_areas(), data_loader.get_muscles_worked(),
+                data_loader.count_exercises(), data_loader.catalog_version(),
+                dict(data_loader.get_exercise_by_name("exercise 7")),
+                [e.name for e in data_loader.search_exercises_by_prefix("Exercise 1")])
+
+    json_result, sqlite_result = _in_both_backends(monkeypatch, helpers)
+    assert json_result == sqlite_result
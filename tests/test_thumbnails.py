@@ -0,0 +1,51 @@
+import threading
+
+import pytest
+
+pytest.importorskip("PIL")
+from PIL import Image  # noqa: E402
+
+import image_utils  # noqa: E402
+
+
+@pytest.fixture
+def images(tmp_path, monkeypatch):
+    monkeypatch.setattr(image_utils, 'THUMBNAIL_DIR', str(tmp_path / "thumbnails"))
+    monkeypatch.setattr(image_utils, '_thumbnail_paths', {})
+    paths = []
+    for i, color in enumerate(("red", "blue")):
+        path = tmp_path / f"image_{i}.png"
+        Image.new("RGB", (400, 300), color).save(path)
+        paths.append(str(path))
+    return paths
+
+
+def test_thumbnail_is_resized_and_reused(images):
+    thumbnail = image_utils.thumbnail_for(images[0], 100)
+
+    with Image.open(thumbnail) as image:
+        assert image.size == (100, 75)
+    assert image_utils.thumbnail_for(images[0], 100) == thumbnail
+
+
+def test_slow_thumbnail_does_not_hold_up_other_images(images, monkeypatch):
+    write_thumbnail = image_utils._write_thumbnail
+    started, release = threading.Event(), threading.Event()
+
+    def slow_write(image_path, *args):
+        if image_path == images[0]:
+            started.set()
+            release.wait(5)
+        write_thumbnail(image_path, *args)
+
+    monkeypatch.setattr(image_utils, '_write_thumbnail', slow_write)
+    slow = threading.Thread(target=image_utils.thumbnail_for, args=(images[0], 100))
+    slow.start()
+    try:
+        assert started.wait(5)
+        assert image_utils.thumbnail_for(images[1], 100) != images[1]
+        assert slow.is_alive()
+    finally:
+        release.set()
+        slow.join()
+    assert not image_utils._thumbnail_locks
@@ -0,0 +1,97 @@
+import asyncio
+import base64
+import hashlib
+import json
+import os
+import struct
+
+from timer_engine import WORK
+from timer_server import _WEBSOCKET_GUID, TimerServer, _read_frame
+
+
+async def _serving(run):
+    """Run run(server, port) against a TimerServer listening on a free local port."""
+    server = TimerServer()
+    listener = await asyncio.start_server(server._handle_connection, "127.0.0.1", 0)
+    try:
+        return await asyncio.wait_for(run(server, listener.sockets[0].getsockname()[1]), 10)
+    finally:
+        for name in list(server.engine.timers):
+            server.engine.stop(name)
+        listener.close()
+        await listener.wait_closed()
+
+
+async def _request(reader, writer, method, path, body=None):
+    data = b"" if body is None else json.dumps(body).encode('utf-8')
+    writer.write(f"{method} {path} HTTP/1.1\r\nHost: localhost\r\nContent-Length: {len(data)}\r\n\r\n"
+                 .encode('ascii') + data)
+    status_line = await reader.readline()
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line == b"\r\n":
+            break
+        key, _, value = line.decode('latin-1').partition(":")
+        headers[key.strip().lower()] = value.strip()
+    payload = json.loads(await reader.readexactly(int(headers['content-length'])))
+    return int(status_line.split()[1]), payload
+
+
+def _masked_frame(message):
+    payload = json.dumps(message).encode('utf-8')
+    mask = os.urandom(4)
+    return struct.pack("!BBI", 0x81, 0x80 | len(payload), int.from_bytes(mask, 'big')) + \
+        bytes(byte ^ mask[i % 4] for i, byte in enumerate(payload))
+
+
+def test_http_api_controls_timers_over_one_connection():
+    async def run(server, port):
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        responses = [
+            await _request(reader, writer, "POST", "/timers/ana/start", {'work': 60, 'break': 10}),
+            await _request(reader, writer, "POST", "/timers/ana/pause"),
+            await _request(reader, writer, "GET", "/timers"),
+            await _request(reader, writer, "GET", "/timers/bob"),
+            await _request(reader, writer, "POST", "/timers/bob/resume"),
+            await _request(reader, writer, "POST", "/timers/ana"),
+            await _request(reader, writer, "POST", "/timers/ana/start", {'work': "soon"}),
+        ]
+        writer.close()
+        return responses
+
+    started, paused, listed, missing, missing_action, wrong_method, bad_body = asyncio.run(_serving(run))
+
+    assert started == (200, {'name': "ana", 'phase': WORK, 'left': 60, 'running': True, 'paused': False,
+                             'sessions': 0})
+    assert paused[1]['paused'] and not paused[1]['running']
+    assert listed == (200, [paused[1]])
+    assert missing[0] == missing_action[0] == 404
+    assert wrong_method[0] == 405
+    assert bad_body[0] == 400 and 'error' in bad_body[1]
+
+
+def test_websocket_subscribers_get_ticks_and_phase_ends():
+    async def run(server, port):
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        key = base64.b64encode(os.urandom(16)).decode('ascii')
+        writer.write(f"GET /ws HTTP/1.1\r\nHost: localhost\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+                     f"Sec-WebSocket-Key: {key}\r\nSec-WebSocket-Version: 13\r\n\r\n".encode('ascii'))
+        handshake = (await reader.readuntil(b"\r\n\r\n")).decode('ascii')
+
+        server.start("ana", {'work': 2, 'break': 1})
+        writer.write(_masked_frame({'subscribe': ["ana"]}))
+        messages = []
+        while not messages or messages[-1]['e'] != 'end':
+            _, payload = await _read_frame(reader)
+            messages.append(json.loads(payload))
+        writer.close()
+        return key, handshake, messages
+
+    key, handshake, messages = asyncio.run(_serving(run))
+
+    accept = base64.b64encode(hashlib.sha1(key.encode('ascii') + _WEBSOCKET_GUID).digest()).decode('ascii')
+    assert handshake.startswith("HTTP/1.1 101")
+    assert f"Sec-WebSocket-Accept: {accept}\r\n" in handshake
+    assert [message['s'] for message in messages[:-1]] == [2, 1]
+    assert messages[-1] == {'e': 'end', 't': "ana", 'p': WORK, 'n': 1}
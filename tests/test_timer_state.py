@@ -0,0 +1,79 @@
+import asyncio
+import os
+import time
+
+import pytest
+
+from timer_engine import BREAK, WORK, TimerEngine
+from timer_state import RESTORE_GRACE_SECONDS, TimerState, load_state, process_alive, process_start_time
+
+
+def _restore(tmp_path, deadline):
+    """Restore one checkpointed work phase with the given deadline; returns (timer, phase ends seen)."""
+    ended = []
+
+    async def run():
+        engine = TimerEngine(on_phase_end=lambda timer, phase: ended.append(phase))
+        state = TimerState(engine, str(tmp_path / "state.json"))
+        record = {'name': "pomodoro", 'work': 1500, 'break': 300, 'cycles': None, 'phase': WORK,
+                  'sessions': 3, 'paused': False, 'deadline': deadline, 'remaining': 1500}
+        timer, = state.restore([record])
+        await asyncio.sleep(0.05)
+        left = engine.time_left(timer)
+        for name in list(engine.timers):
+            engine.stop(name)
+        return timer, left
+
+    timer, left = asyncio.run(run())
+    return timer, left, ended
+
+
+def test_long_outage_restarts_the_interrupted_phase_without_logging(tmp_path):
+    timer, left, ended = _restore(tmp_path, time.time() - 3 * 24 * 3600)
+
+    assert ended == []
+    assert timer.phase == WORK
+    assert timer.sessions_completed == 3
+    assert left > 1499
+
+
+def test_short_outage_ends_the_due_phase_once(tmp_path):
+    timer, left, ended = _restore(tmp_path, time.time() - RESTORE_GRACE_SECONDS / 2)
+
+    assert ended == [WORK]
+    assert timer.phase == BREAK
+    assert left > 299
+
+
+def test_running_phase_resumes_with_its_time_left(tmp_path):
+    timer, left, ended = _restore(tmp_path, time.time() + 600)
+
+    assert ended == []
+    assert 599 < left <= 600
+
+
+def test_reused_pid_is_not_taken_for_the_owner():
+    parent = os.getppid()
+    started = process_start_time(parent)
+    if started is None:
+        pytest.skip("process start times need /proc")
+
+    assert process_alive(parent, started)
+    assert not process_alive(parent, started + 1)
+
+
+def test_checkpoint_records_the_owner_start_time(tmp_path):
+    async def run():
+        engine = TimerEngine()
+        state = TimerState(engine, str(tmp_path / "state.json"))
+        engine.add("pomodoro")
+        engine.start("pomodoro")
+        state.save()
+        saved = load_state(state.path)
+        engine.stop("pomodoro")
+        return saved
+
+    saved = asyncio.run(run())
+
+    assert saved['pid'] == os.getpid()
+    assert saved['pid_started'] == process_start_time(os.getpid())
@@ -0,0 +1,37 @@
+import json
+from datetime import datetime, timezone
+
+import workout_export
+from data_loader import Exercise
+
+WORKOUT = (Exercise.from_dict({'name': "Plank", 'description': "Hold it", 'instructions': ["Hold"],
+                               'muscles_worked': ["Core"], 'equipment': 'bodyweight', 'focus_area': 'core',
+                               'duration': 30}),)
+
+
+def _export_at(monkeypatch, when, export_format):
+    class FixedDatetime(datetime):
+        @classmethod
+        def now(cls, tz=None):
+            return when
+
+    monkeypatch.setattr(workout_export, 'datetime', FixedDatetime)
+    return workout_export.export_workout(WORKOUT, export_format)
+
+
+def test_exports_at_different_times_get_their_own_timestamps(monkeypatch):
+    morning = datetime(2026, 1, 5, 8, 0, tzinfo=timezone.utc)
+    evening = datetime(2026, 1, 5, 19, 30, tzinfo=timezone.utc)
+
+    for export_format in ('txt', 'md'):
+        assert _export_at(monkeypatch, morning, export_format) != _export_at(monkeypatch, evening, export_format)
+
+    first = json.loads(_export_at(monkeypatch, morning, 'json'))
+    second = json.loads(_export_at(monkeypatch, evening, 'json'))
+    assert (first['generated_at'], second['generated_at']) == (morning.isoformat(), evening.isoformat())
+
+    assert b"DTSTART:20260105T193000Z" in _export_at(monkeypatch, evening, 'ics')
+
+
+def test_untimestamped_exports_are_memoized():
+    assert workout_export.export_workout(WORKOUT, 'csv') is workout_export.export_workout(WORKOUT, 'csv')
@@ -1,126 +1,147 @@
+import argparse
 import json
-import random
 import os
-import argparse
+import random
+import sys
+from typing import Dict, Iterable, List, Optional, Sequence, TextIO
 
-EXERCISES_FILE = os.path.join(os.path.dirname(__file__), 'exercises.json')
-
-def load_exercises():
-    if not os.path.exists(EXERCISES_FILE):
-        # This part is now for fallback, the main json has descriptions
-        default_exercises = {}
-        with open(EXERCISES_FILE, 'w') as f:
-            json.dump(default_exercises, f, indent=2)
-        return default_exercises
-    try:
-        with open(EXERCISES_FILE, 'r') as f:
-            return json.load(f)
-    except (json.JSONDecodeError, FileNotFoundError):
-        print(f"Error reading {EXERCISES_FILE}. A default set will be created.")
-        return load_exercises()
-
-def generate_workout(exercises, equipment, muscle_focus_list):
-    combined_exercise_list = {}
-    for focus in muscle_focus_list:
-        try:
-            exercise_dict = exercises[equipment][focus]
-            if not exercise_dict:
-                print(f"Warning: No exercises found for {equipment} - {focus}. Skipping.")
-                continue
-            combined_exercise_list.update(exercise_dict)
-        except KeyError:
-            print(f"Warning: Invalid muscle focus '{focus}'. Skipping.")
-            continue
-
-    if not combined_exercise_list:
-        print("No exercises found for the selected criteria. Please check your choices.")
-        return None
-
-    exercise_names = list(combined_exercise_list.keys())
-    num_exercises = min(len(exercise_names), 6)
-    if num_exercises == 0:
-        print("No exercises available to generate a workout.")
-        return None
-        
-    selected_exercise_names = random.sample(exercise_names, num_exercises)
-    
-    selected_exercises = [(name, combined_exercise_list[name]) for name in selected_exercise_names]
-    return selected_exercises
+# The CLI shares the exercise catalog and filtering with the Streamlit app
+APP_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'streamlit_workout_app')
+sys.path.insert(0, os.path.abspath(APP_DIR))
 
-def main():
-    parser = argparse.ArgumentParser(description="Generate a 10-minute low-impact workout plan.")
-    parser.add_argument("equipment", nargs='?', default=None, help="The equipment to use (e.g., bodyweight, dumbbells)")
-    parser.add_argument("muscle_focus", nargs='?', default=None, help="Comma-separated list of muscle groups (e.g., 'lower,core')")
-    args = parser.parse_args()
+from data_loader import Exercise, catalog_version, get_equipment_types, get_exercises, get_focus_areas  # noqa: E402
 
-    exercises = load_exercises()
+WORKOUT_SIZE = 6
+OUTPUT_FORMATS = ("text", "json")
 
-    print("Welcome to the 10-Minute Low-Impact Workout Generator!")
 
-    equipment = args.equipment
-    muscle_focus_input = args.muscle_focus
+def parse_focus_areas(muscle_focus: str) -> List[str]:
+    """Split a comma-separated focus list such as 'lower,core'."""
+    return [focus.strip().lower() for focus in muscle_focus.split(',') if focus.strip()]
 
-    if not equipment:
-        while True:
-            try:
-                equipment = input(f"Choose your equipment ({', '.join(exercises.keys())}): ").lower()
-                if equipment in exercises:
-                    break
-                print("Invalid equipment. Please choose from the available options.")
-            except EOFError:
-                print("\nOperation cancelled.")
-                return
 
-    muscle_focus_list = []
-    if not muscle_focus_input:
-        while True:
-            try:
-                muscle_focus_input = input(f"Choose your muscle focus ({', '.join(exercises[equipment].keys())}). You can enter multiple, separated by commas: ").lower()
-                
-                potential_focuses = [focus.strip() for focus in muscle_focus_input.split(',')]
-                valid_focuses = []
-                invalid_focuses = []
-
-                for focus in potential_focuses:
-                    if focus in exercises[equipment]:
-                        valid_focuses.append(focus)
-                    else:
-                        invalid_focuses.append(focus)
-                
-                if invalid_focuses:
-                    print(f"Invalid muscle focus options: {', '.join(invalid_focuses)}. Please choose from the available options.")
-                
-                if valid_focuses:
-                    muscle_focus_list = valid_focuses
-                    break
-                else:
-                    print("Please enter at least one valid muscle focus.")
-
-            except EOFError:
-                print("\nOperation cancelled.")
+def prompt_choice(prompt: str, options: Sequence[str], multiple: bool = False) -> Optional[List[str]]:
+    """Ask until the answer is one (or, with multiple, several) of options; None if input ends."""
+    while True:
+        try:
+            answer = input(f"{prompt} ({', '.join(options)}): ").lower()
+        except EOFError:
+            print("\nOperation cancelled.")
+            return None
+
+        choices = parse_focus_areas(answer) if multiple else answer.split()[:1]
+        invalid = [choice for choice in choices if choice not in options]
+        if invalid:
+            print(f"Invalid options: {', '.join(invalid)}. Please choose from the available options.")
+        elif choices:
+            return choices
+        else:
+            print("Please enter at least one valid option.")
+
+
+def generate_workout(pool: Sequence[Exercise], rng: Optional[random.Random] = None) -> List[Exercise]:
+    """Pick up to WORKOUT_SIZE distinct exercises from pool."""
+    return (rng or random).sample(pool, min(len(pool), WORKOUT_SIZE))
+
+
+def write_text(workouts: List[List[Exercise]], out: TextIO) -> None:
+    """Print workouts as readable plans."""
+    for number, workout in enumerate(workouts, 1):
+        title = "Your 10-minute workout plan" if len(workouts) == 1 else f"Workout {number}"
+        out.write(f"\n{title}:\n--------------------------------\n")
+        out.write("Rest for 10 seconds between exercises.\n")
+        for i, exercise in enumerate(workout, 1):
+            out.write(f"\n{i}. {exercise.name} ({exercise.duration_text})\n")
+            out.write(f"   Description: {exercise.description}\n")
+        out.write("\n--------------------------------\n")
+    out.write("Enjoy your workout!\n")
+
+
+def write_json_lines(workouts: Iterable[List[Exercise]], out: TextIO, equipment: str, focus_areas: List[str],
+                     seed: Optional[int]) -> None:
+    """Write one JSON object per workout, encoding each exercise only once."""
+    encode = json.JSONEncoder(ensure_ascii=False).encode
+    encoded: Dict[int, str] = {}
+    header = (f'{{"catalog_version": {encode(catalog_version())}, "seed": {encode(seed)}, '
+              f'"equipment": {encode(equipment)}, "focus_areas": {encode(focus_areas)}')
+
+    for number, workout in enumerate(workouts, 1):
+        pieces = []
+        for exercise in workout:
+            piece = encoded.get(id(exercise))
+            if piece is None:
+                piece = encoded[id(exercise)] = encode({
+                    'name': exercise.name,
+                    'duration_seconds': exercise.duration,
+                    'description': exercise.description,
+                })
+            pieces.append(piece)
+        out.write(f'{header}, "workout": {number}, "exercises": [{", ".join(pieces)}]}}\n')
+
+
+def main():
+    """Generate workouts interactively, or in batch with --count/--format."""
+    parser = argparse.ArgumentParser(description="Generate a 10-minute low-impact workout plan.")
+    parser.add_argument("equipment", nargs='?', default=None,
+                        help="The equipment to use (e.g., bodyweight, dumbbells, or all)")
+    parser.add_argument("muscle_focus", nargs='?', default=None,
+                        help="Comma-separated list of focus areas (e.g., 'lower,core', or all)")
+    parser.add_argument("--count", type=int, default=None,
+                        help="Generate this many workouts without prompting")
+    parser.add_argument("--seed", type=int, default=None, help="Seed for reproducible workouts")
+    parser.add_argument("--format", choices=OUTPUT_FORMATS, default="text",
+                        help="Output format; json writes one JSON object per workout per line")
+    args = parser.parse_args()
+
+    equipment_types = get_equipment_types()
+    focus_areas = get_focus_areas()
+    interactive = args.count is None and args.format == "text"
+
+    equipment = args.equipment.lower() if args.equipment else None
+    if equipment is None:
+        if not interactive:
+            equipment = "all"
+        else:
+            print("Welcome to the 10-Minute Low-Impact Workout Generator!")
+            choice = prompt_choice("Choose your equipment", equipment_types + ["all"])
+            if choice is None:
                 return
+            equipment = choice[0]
+    elif equipment != "all" and equipment not in equipment_types:
+        parser.error(f"invalid equipment '{equipment}' (choose from {', '.join(equipment_types)}, all)")
+
+    if args.muscle_focus:
+        muscle_focus_list = parse_focus_areas(args.muscle_focus)
+        invalid = [focus for focus in muscle_focus_list if focus != "all" and focus not in focus_areas]
+        if invalid:
+            parser.error(f"invalid muscle focus {', '.join(invalid)} (choose from {', '.join(focus_areas)}, all)")
+    elif not interactive:
+        muscle_focus_list = ["all"]
     else:
-        muscle_focus_list = [focus.strip() for focus in muscle_focus_input.split(',')]
-        for focus in muscle_focus_list:
-            if focus not in exercises[equipment]:
-                print(f"Invalid muscle focus '{focus}' provided in arguments. Exiting.")
-                return
+        muscle_focus_list = prompt_choice(
+            "Choose your muscle focus. You can enter multiple, separated by commas", focus_areas + ["all"], True)
+        if muscle_focus_list is None:
+            return
+
+    count = 1 if args.count is None else args.count
+    if count < 1:
+        parser.error("--count must be at least 1")
+
+    # One catalog load and one filtered pool serve every workout in the batch
+    focus_filter = "all" if "all" in muscle_focus_list else muscle_focus_list
+    pool = get_exercises(equipment, focus_filter)
+    if not pool:
+        print("No exercises found for the selected criteria. Please check your choices.", file=sys.stderr)
+        sys.exit(1)
+
+    rng = random.Random(args.seed)
+    workouts = (generate_workout(pool, rng) for _ in range(count))
+
+    if args.format == "json":
+        write_json_lines(workouts, sys.stdout, equipment, muscle_focus_list, args.seed)
+    else:
+        write_text(list(workouts), sys.stdout)
 
-    if not muscle_focus_list:
-        print("No valid muscle focus selected. Exiting.")
-        return
-
-    workout = generate_workout(exercises, equipment, muscle_focus_list)
-
-    if workout:
-        print("\nYour 10-minute workout plan:")
-        print("--------------------------------")
-        print("Aim for 60 seconds of work for each exercise, followed by 40 seconds of rest.")
-        for i, (name, description) in enumerate(workout):
-            print(f"\n{i+1}. {name}")
-            print(f"   Description: {description}")
-        print("\n--------------------------------")
-        print("Enjoy your workout!")
 
 if __name__ == "__main__":
     main()